@@ -0,0 +1,213 @@
+"""Admission control: per-principal limits and load shedding.
+
+Two layers keep one client, or a burst of them, from taking the service down:
+
+* :class:`LoadSheddingMiddleware` caps the requests in flight across the
+  process. Requests past the cap are refused with 503 and ``Retry-After``
+  before any work is done for them, authentication included.
+* :func:`admit`, a dependency of the graph routes that runs once the caller
+  is authenticated, gives every principal a token bucket and a cap on its
+  requests in flight. Each request spends its route's cost weight from the
+  bucket, so expensive endpoints such as ``/search`` drain it faster than
+  entity lookups. Requests over either limit are refused with 429
+  (:class:`RateLimitedError`).
+"""
+
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+
+from fastapi import Depends, Request
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .auth.dependencies import get_current_user
+from .metrics import Metrics, route_label
+from .registry import GRAPH_PREFIX
+
+# Seconds clients are asked to wait after being shed.
+SHED_RETRY_AFTER = 1
+# Token buckets kept; the least recently used are dropped, which refills them.
+MAX_PRINCIPALS = 10000
+# Probes and scrapes must keep answering under load.
+EXEMPT_PATHS = frozenset({"/health", "/ready", "/metrics"})
+
+
+class RateLimitedError(Exception):
+    """Raised by :func:`admit` when a principal is over one of its limits.
+
+    Attributes:
+        reason: ``rate`` (token bucket empty) or ``concurrency`` (too many
+            requests in flight).
+        retry_after: Seconds until the request could be admitted.
+    """
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Too many requests ({reason} limit)")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    """Tokens refilled at ``rate`` per second, up to ``burst``."""
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, cost: float, now: float) -> float:
+        """Spend ``cost`` tokens if there are enough.
+
+        A cost above ``burst`` is charged as ``burst``, so that every request
+        can eventually be admitted.
+
+        Returns:
+            float: 0 if the tokens were spent, otherwise the seconds until
+            enough have been refilled.
+        """
+        cost = min(cost, self.burst)
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Per-principal token buckets and in-flight limits.
+
+    Args:
+        rate: Tokens each principal gets per second; None disables rate
+            limiting.
+        burst: Tokens a principal can save up.
+        max_in_flight: Requests one principal may have in flight; None for no
+            limit.
+        costs: Tokens a request spends, by route template (without the
+            ``/graphs/{graph}`` prefix); unlisted routes cost 1.
+    """
+
+    def __init__(
+        self,
+        rate: float | None,
+        burst: float,
+        max_in_flight: int | None = None,
+        costs: dict[str, float] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.costs = costs or {}
+        self._clock = clock
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._in_flight: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate is not None or self.max_in_flight is not None
+
+    def cost(self, route: str) -> float:
+        return self.costs.get(route.removeprefix(GRAPH_PREFIX), 1.0)
+
+    def in_flight(self, principal: str) -> int:
+        return self._in_flight.get(principal, 0)
+
+    def acquire(self, principal: str, route: str) -> None:
+        """Admit a request of ``principal`` to ``route``.
+
+        Raises:
+            RateLimitedError: If the principal has too many requests in flight
+                or not enough tokens left. Refused requests spend nothing.
+        """
+        in_flight = self.in_flight(principal)
+        if self.max_in_flight is not None and in_flight >= self.max_in_flight:
+            raise RateLimitedError("concurrency", SHED_RETRY_AFTER)
+        if self.rate is not None:
+            wait = self._bucket(principal).take(self.cost(route), self._clock())
+            if wait:
+                raise RateLimitedError("rate", wait)
+        self._in_flight[principal] = in_flight + 1
+
+    def release(self, principal: str) -> None:
+        """Mark a request admitted by :meth:`acquire` as finished."""
+        remaining = self._in_flight.pop(principal) - 1
+        if remaining:
+            self._in_flight[principal] = remaining
+
+    def _bucket(self, principal: str) -> TokenBucket:
+        bucket = self._buckets.get(principal)
+        if bucket is None:
+            bucket = self._buckets[principal] = TokenBucket(
+                self.rate, self.burst, self._clock()
+            )
+            if len(self._buckets) > MAX_PRINCIPALS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(principal)
+        return bucket
+
+
+async def admit(request: Request, user=Depends(get_current_user)):
+    """Dependency holding an admission slot of the caller for the request.
+
+    Raises:
+        RateLimitedError: If the caller is over its rate or in-flight limit.
+    """
+    controller: AdmissionController = request.app.state.admission
+    if not controller.enabled:
+        yield
+        return
+    principal = str(user.id)
+    controller.acquire(principal, route_label(request.scope))
+    try:
+        yield
+    finally:
+        controller.release(principal)
+
+
+class LoadSheddingMiddleware:
+    """Refuse requests with 503 once ``max_in_flight`` are being served.
+
+    Pure ASGI, so a streamed response holds its slot until its last chunk.
+    Paths in ``exempt`` (health, readiness and metrics) are never shed.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_in_flight: int,
+        metrics: Metrics,
+        exempt: Iterable[str] = EXEMPT_PATHS,
+    ):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.metrics = metrics
+        self.exempt = frozenset(exempt)
+        self.in_flight = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+        if self.in_flight >= self.max_in_flight:
+            self.metrics.admission_rejections.inc(reason="overload")
+            response = JSONResponse(
+                {"detail": "Service overloaded"},
+                status_code=503,
+                headers={"Retry-After": str(SHED_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -1,41 +1,89 @@
+import asyncio
+import contextlib
+import functools
 import os
 from contextlib import asynccontextmanager
 
 from apikey.db import init_db
-from apikey.dependencies import LOGIN_URL, get_current_user
+from apikey.dependencies import LOGIN_URL
 from apikey.router import api_key_router
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastapi_mcp import AuthConfig, FastApiMCP
 from graph_reader.config import GraphReaderConfig
-from graph_reader.reader import GraphReader
 
+from .admission import (
+    AdmissionController,
+    LoadSheddingMiddleware,
+    RateLimitedError,
+    admit,
+)
+from .async_reader import AsyncGraphReader, ReaderOverloadedError, ReaderTimeoutError
+from .auth.cache import TokenCache
+from .auth.dependencies import get_current_user
+from .cache import CacheBudgets
+from .caching import CacheHeadersMiddleware, NotModified, not_modified_response
 from .config import APIConfig
-from .routers import community, entity, search
+from .ingest import IngestionManager
+from .metrics import CONTENT_TYPE, Metrics, MetricsMiddleware, add_app_collectors
+from .registry import GRAPH_PREFIX, GraphRegistry
+from .routers import community, entity, graphs, ingest, path, rank, search
+from .serialization import CompressionMiddleware
+from .startup import StartupState, run_warmup
+from .store import GraphStore
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for FastAPI app.
 
-    This handles startup and shutdown events.
+    This handles startup and shutdown events. The graph is loaded here rather
+    than in :func:`create_app`, and warmup continues in the background once
+    the server accepts connections; ``/ready`` reports when it is done.
     """
     # Startup
-    await init_db()
+    state: StartupState = app.state.startup
+    config: APIConfig = app.state.config
+    if config.init_auth_db:
+        with state.phase("auth_db"):
+            await init_db()
+    reader: AsyncGraphReader = app.state.reader
+    with state.phase("graph_load"):
+        await asyncio.to_thread(reader.load)
+    ingestion: IngestionManager | None = app.state.ingest
+    if ingestion is not None:
+        # Replay the logs before serving, so restarts never serve reads
+        # without the updates that are not compacted yet. Other graphs replay
+        # theirs when the registry opens them.
+        with state.phase("ingest_replay"):
+            await ingestion.attach(config.default_graph, reader.reader)
+    warmup = asyncio.create_task(run_warmup(reader, state, config))
     yield
     # Shutdown
-    # Add any cleanup code here if needed
+    warmup.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await warmup
+    if ingestion is not None:
+        await ingestion.stop()
+    app.state.registry.close()
 
 
-def create_app(base_dir: str = "resources/kg") -> FastAPI:
+def create_app(
+    base_dir: str = "resources/kg", config: APIConfig | None = None
+) -> FastAPI:
     """Create and configure the FastAPI application.
 
     Args:
         base_dir: The base directory for graph data storage.
+        config: Optional API configuration. When given, its ``base_dir`` takes
+            precedence over the ``base_dir`` argument.
 
     Returns:
         FastAPI: The configured FastAPI application.
     """
+    config = config or APIConfig(base_dir=base_dir)
+
     # Initialize FastAPI app with OpenAPI metadata
     application = FastAPI(
         title="Graph Reader API",
@@ -47,7 +95,32 @@ def create_app(base_dir: str = "resources/kg") -> FastAPI:
     # Get allowed origins from environment variable or use default
     allowed_origins = os.getenv("ALLOWED_ORIGINS", LOGIN_URL).split(",")
 
-    # Add CORS middleware with explicit headers
+    application.add_middleware(
+        CacheHeadersMiddleware, cache_control=config.cache_control
+    )
+
+    if config.compression_min_size is not None:
+        application.add_middleware(
+            CompressionMiddleware,
+            minimum_size=config.compression_min_size,
+            gzip_level=config.gzip_level,
+            zstd_level=config.zstd_level,
+        )
+
+    metrics = Metrics()
+    if config.max_requests_in_flight is not None:
+        application.add_middleware(
+            LoadSheddingMiddleware,
+            max_in_flight=config.max_requests_in_flight,
+            metrics=metrics,
+        )
+
+    # Wraps everything but CORS, so it sees the full request time.
+    application.add_middleware(MetricsMiddleware, metrics=metrics)
+
+    # Added last so it is the outermost layer, and responses produced by the
+    # middleware inside it (such as 503 when shedding load) carry CORS
+    # headers too.
     application.add_middleware(
         CORSMiddleware,
         allow_origins=allowed_origins,
@@ -62,19 +135,120 @@ def create_app(base_dir: str = "resources/kg") -> FastAPI:
         """Health check endpoint for Docker."""
         return {"status": "healthy"}
 
-    # Initialize graph reader
-    config = APIConfig(base_dir=base_dir)
-    reader = GraphReader(
-        GraphReaderConfig(
-            base_dir=config.base_dir,
-            indexer_type=config.indexer_type,
-            cache_size=config.cache_size,
+    @application.get("/ready")
+    async def readiness_check():
+        """Readiness probe: 200 once the graph is loaded and warmed up."""
+        startup: StartupState = application.state.startup
+        return JSONResponse(
+            status_code=200 if startup.ready else 503, content=startup.status()
+        )
+
+    @application.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint():
+        """Prometheus metrics."""
+        return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+    @application.exception_handler(ReaderOverloadedError)
+    async def reader_overloaded_handler(request: Request, exc: ReaderOverloadedError):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": str(exc)},
+            headers={"Retry-After": "1"},
+        )
+
+    @application.exception_handler(RateLimitedError)
+    async def rate_limited_handler(request: Request, exc: RateLimitedError):
+        metrics.admission_rejections.inc(reason=exc.reason)
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(exc)},
+            headers={"Retry-After": exc.retry_after_header},
+        )
+
+    @application.exception_handler(ReaderTimeoutError)
+    async def reader_timeout_handler(request: Request, exc: ReaderTimeoutError):
+        return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+    @application.exception_handler(NotModified)
+    async def not_modified_handler(request: Request, exc: NotModified):
+        return not_modified_response(exc, config.cache_control)
+
+    def open_reader(name: str, graph_dir: str) -> AsyncGraphReader:
+        # Graphs are loaded by the lifespan (the default one) or on first use,
+        # not here, so creating the app is cheap.
+        reader = AsyncGraphReader(
+            lambda: GraphStore(
+                GraphReaderConfig(base_dir=graph_dir, indexer_type=config.indexer_type),
+                CacheBudgets(
+                    entities=config.entity_cache_bytes,
+                    neighbors=config.neighbor_cache_bytes,
+                    search=config.search_cache_bytes,
+                ),
+            ),
+            max_workers=config.reader_workers,
+            max_pending=config.reader_max_pending,
+            timeout=config.reader_timeout,
+            coalesce=config.reader_coalesce,
+        )
+        # Reader metrics are labelled with the graph's name.
+        reader.observer = functools.partial(metrics.observe_reader_call, name)
+        reader.coalesced_observer = functools.partial(
+            metrics.observe_coalesced_call, name
+        )
+        reader.rejection_observer = functools.partial(
+            metrics.observe_reader_rejection, name
         )
+        return reader
+
+    registry = GraphRegistry(
+        {**config.graphs, config.default_graph: config.base_dir},
+        open_reader,
+        default=config.default_graph,
+        memory_budget=config.graph_memory_budget,
+    )
+    reader = registry.default_reader
+    application.state.config = config
+    application.state.registry = registry
+    application.state.reader = reader
+    application.state.auth_cache = TokenCache(
+        max_size=config.auth_cache_size,
+        ttl=config.auth_cache_ttl,
+        negative_ttl=config.auth_cache_negative_ttl,
+    )
+    application.state.admission = AdmissionController(
+        rate=config.rate_limit,
+        burst=config.rate_limit_burst,
+        max_in_flight=config.principal_max_in_flight,
+        costs=config.admission_costs,
     )
+    application.state.startup = StartupState()
+    application.state.metrics = metrics
+    application.state.ingest = (
+        IngestionManager(registry, config.ingest_poll_interval)
+        if config.ingest_logs
+        else None
+    )
+
+    add_app_collectors(metrics, application.state)
 
-    application.include_router(entity.init_router(reader))
-    application.include_router(community.init_router(reader))
-    application.include_router(search.init_router(reader))
+    for router in (
+        entity.init_router(config),
+        community.init_router(),
+        search.init_router(),
+        path.init_router(config),
+        rank.init_router(),
+    ):
+        application.include_router(router, dependencies=[Depends(admit)])
+        # The same routes for a named graph; the header form is the one
+        # documented in the schema (and exposed over MCP).
+        application.include_router(
+            router,
+            prefix=GRAPH_PREFIX,
+            include_in_schema=False,
+            dependencies=[Depends(admit)],
+        )
+    application.include_router(graphs.init_router(registry))
+    application.include_router(ingest.init_router())
 
     # Configure MCP with basic token passthrough
     mcp = FastApiMCP(
@@ -84,6 +258,8 @@ def create_app(base_dir: str = "resources/kg") -> FastAPI:
         describe_all_responses=True,
         describe_full_response_schema=True,
         auth_config=AuthConfig(dependencies=[Depends(get_current_user)]),
+        # Operational endpoints are not graph tools.
+        exclude_tags=["ingest"],
     )
     mcp.mount()
 
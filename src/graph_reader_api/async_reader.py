@@ -0,0 +1,509 @@
+"""Asynchronous facade over the blocking ``GraphReader``.
+
+``GraphReader`` scans shard files and index structures synchronously. Calling it
+directly from an ``async def`` handler stalls the event loop, so every reader
+call made by the routers goes through :class:`AsyncGraphReader`, which runs the
+work on a dedicated, bounded thread pool.
+
+The store can be given as a loader, in which case it is only constructed by
+:meth:`AsyncGraphReader.load`, so creating the app stays cheap.
+
+Identical calls made while one is already in flight (e.g. an agent fanning
+out over the same hub entity) are coalesced: they wait for the running call
+and share its result instead of queueing their own.
+"""
+
+import asyncio
+import contextlib
+import copy
+import functools
+import itertools
+import sqlite3
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from graph_reader.reader import GraphReader
+
+from . import context, projection, traversal
+from .metrics import request_phase
+from .pagination import take_page
+from .query import PropertyQuery
+from .store import GraphStore, NeighborQuery
+
+T = TypeVar("T")
+
+
+class ReaderOverloadedError(RuntimeError):
+    """Raised when the reader queue is full and a call is rejected."""
+
+
+class ReaderTimeoutError(TimeoutError):
+    """Raised when a reader call does not finish within its timeout."""
+
+
+class ReaderClosedError(RuntimeError):
+    """Raised when a closed reader is used before :meth:`load` reopens it."""
+
+
+class AsyncGraphReader:
+    """Run ``GraphReader`` calls on a bounded thread pool.
+
+    At most ``max_workers`` calls execute concurrently and at most
+    ``max_pending`` calls may be admitted (running or queued) at any time;
+    further calls fail fast with :class:`ReaderOverloadedError` instead of
+    piling up behind a slow shard scan. With ``coalesce``, a call identical
+    to one in flight joins it rather than taking a slot of its own.
+    """
+
+    def __init__(
+        self,
+        reader: GraphStore | Callable[[], GraphStore],
+        max_workers: int = 4,
+        max_pending: int = 64,
+        timeout: float | None = 10.0,
+        coalesce: bool = True,
+    ):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_pending < max_workers:
+            raise ValueError("max_pending must be at least max_workers")
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.coalesce = coalesce
+        # Calls in flight by key; see _coalesced().
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._reader: GraphStore | None = None
+        self._loader: Callable[[], GraphStore] | None = None
+        self._closed = False
+        # Called with (method name, seconds) after each call finishes on the
+        # pool, with the method name of each coalesced call, and with the
+        # reason ("overloaded" or "timeout") of each rejected call; see
+        # graph_reader_api.metrics.
+        self.observer: Callable[[str, float], None] | None = None
+        self.coalesced_observer: Callable[[str], None] | None = None
+        self.rejection_observer: Callable[[str], None] | None = None
+        if callable(reader):
+            self._loader = reader
+        else:
+            self._attach(reader)
+
+    @property
+    def reader(self) -> GraphStore:
+        """The underlying store, loaded on first access if needed.
+
+        Raises:
+            ReaderClosedError: If the reader was closed; only an explicit
+                :meth:`load` opens the store again.
+        """
+        if self._reader is None:
+            if self._closed:
+                raise ReaderClosedError("The graph reader is closed")
+            return self.load()
+        return self._reader
+
+    @property
+    def loaded(self) -> bool:
+        return self._reader is not None
+
+    def load(self) -> GraphStore:
+        """Construct the store from the loader given at construction.
+
+        The app's lifespan calls this (off the event loop) before serving, so
+        importing or creating the app never touches the graph files. Safe to
+        call more than once and from several threads.
+        """
+        with self._load_lock:
+            if self._reader is None:
+                self._attach(self._loader())
+            self._closed = False
+        return self._reader
+
+    def _attach(self, reader: GraphStore) -> None:
+        _share_sqlite_indexer(reader)
+        self._reader = reader
+
+    @property
+    def version(self) -> str:
+        """Version of the graph snapshot being served."""
+        return self.reader.version
+
+    @property
+    def pending(self) -> int:
+        """Number of calls currently running or queued on the pool."""
+        return self._pending
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``func(*args, **kwargs)`` on the reader pool.
+
+        Args:
+            func: Blocking callable to execute.
+            *args: Positional arguments for ``func``.
+            **kwargs: Keyword arguments for ``func``.
+
+        Returns:
+            The value returned by ``func``.
+
+        Raises:
+            ReaderOverloadedError: If ``max_pending`` calls are already admitted.
+            ReaderTimeoutError: If the call exceeds ``timeout`` seconds.
+        """
+        name = getattr(func, "__name__", "call")
+        return await self._coalesced(
+            name,
+            (func, args, tuple(sorted(kwargs.items()))),
+            lambda: self._run_named(name, func, *args, **kwargs),
+        )
+
+    async def _coalesced(
+        self, name: str, key: Hashable, start: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Await ``start()``, or the identical call already in flight.
+
+        Calls are identical when their keys are equal; lists and sets in the
+        key are compared by content. Calls whose key cannot be hashed always
+        run. The shared call is shielded, so a waiter that is cancelled (e.g.
+        because its client went away) does not cancel it for the others.
+
+        Only calls started under the same snapshot :attr:`version` are shared:
+        a request that arrives after an overlay update derives its ETag from
+        the new version, so it must not get a result read before the update.
+
+        Waiters after the first get a shallow copy of the result (and of the
+        items of a tuple result), so they may change it at the top level.
+        Nested objects, such as the properties of an entity, stay shared with
+        the other waiters and with the store's caches, and must not be
+        mutated.
+        """
+        if not self.coalesce:
+            return await start()
+        try:
+            key = _freeze((getattr(self._reader, "version", None), key))
+            running = self._in_flight.get(key)
+        except TypeError:
+            return await start()
+        if running is not None:
+            if self.coalesced_observer is not None:
+                self.coalesced_observer(name)
+            return _unshare(await asyncio.shield(running))
+        task = asyncio.ensure_future(start())
+        self._in_flight[key] = task
+        task.add_done_callback(functools.partial(self._forget, key))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the outcome as retrieved, in case every waiter was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    async def _run_named(
+        self, name: str, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                self._rejected("overloaded")
+                raise ReaderOverloadedError("Graph reader queue is full")
+            self._pending += 1
+
+        call = functools.partial(func, *args, **kwargs)
+        if self.observer is not None:
+            call = functools.partial(_observed, self.observer, name, call)
+        loop = asyncio.get_running_loop()
+        with request_phase("reader"):
+            future = loop.run_in_executor(self._get_executor(), call)
+            # The slot is held until the worker actually finishes, even if the
+            # awaiting request times out, so the pool can never be
+            # oversubscribed.
+            future.add_done_callback(self._release)
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except TimeoutError as e:
+                self._rejected("timeout")
+                raise ReaderTimeoutError("Graph reader call timed out") from e
+
+    def _rejected(self, reason: str) -> None:
+        if self.rejection_observer is not None:
+            self.rejection_observer(reason)
+
+    async def iterate(
+        self,
+        func: Callable[..., Iterator[T]],
+        *args: Any,
+        offset: int = 0,
+        chunk_size: int = 256,
+        transform: Callable[[list], list] | None = None,
+    ) -> AsyncIterator[Any]:
+        """Drain a blocking iterator on the pool, ``chunk_size`` items at a time.
+
+        Only one chunk is held in memory at once, so results of any size can be
+        streamed with bounded memory. Each chunk is a separate pool call and is
+        subject to the same admission limit and timeout as any other call.
+        ``transform``, when given, maps each chunk to as many items in the
+        same pool call (e.g. to resolve IDs with one batched read).
+        """
+        source = func(*args)
+        iterator = itertools.islice(source, offset, None)
+        name = getattr(func, "__name__", "iterate")
+        try:
+            while True:
+                chunk = await self._run_named(
+                    name, _take, iterator, chunk_size, transform
+                )
+                for item in chunk:
+                    yield item
+                if len(chunk) < chunk_size:
+                    return
+        finally:
+            # The generator may still be running if the last chunk timed out.
+            if hasattr(source, "close"):
+                with contextlib.suppress(ValueError):
+                    source.close()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so the pool can be restarted after close(), e.g. when
+        # the same app goes through several lifespan cycles.
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="graph-reader"
+            )
+        return self._executor
+
+    def _release(self, _future: asyncio.Future) -> None:
+        with self._pending_lock:
+            self._pending -= 1
+
+    async def get_entity(
+        self, entity_id: Any, fields: frozenset[str] | None = None
+    ) -> dict | None:
+        entity = await self.run(self.reader.get_entity, entity_id)
+        return projection.project(entity, fields)
+
+    async def get_entities(
+        self, entity_ids: list[Any], fields: frozenset[str] | None = None
+    ) -> tuple[dict, list]:
+        found, missing = await self.run(self.reader.get_entities, entity_ids)
+        if fields is not None:
+            found = {key: projection.project(e, fields) for key, e in found.items()}
+        return found, missing
+
+    async def resolve_entities(
+        self, entity_ids: list[Any], fields: frozenset[str] | None = None
+    ) -> list[dict | None]:
+        return await self.run(
+            projection.resolve_entities, self.reader, entity_ids, fields
+        )
+
+    async def get_neighbors(self, entity_id: Any) -> list[dict]:
+        return await self.run(self.reader.get_neighbors, entity_id)
+
+    async def get_neighbor_page(
+        self, query: NeighborQuery, offset: int = 0, limit: int | None = None
+    ) -> tuple[list[dict], int | None]:
+        return await self.run(self.reader.get_neighbor_page, query, offset, limit)
+
+    async def attach_entities(
+        self,
+        entity_id: Any,
+        relations: list[dict],
+        fields: frozenset[str] | None = None,
+    ) -> list[dict]:
+        return await self.run(
+            projection.attach_entities, self.reader, entity_id, relations, fields
+        )
+
+    async def get_entity_community(self, entity_id: Any) -> Any | None:
+        return await self.run(self.reader.get_entity_community, entity_id)
+
+    async def get_community_members(self, community_id: Any) -> list[Any]:
+        return await self.run(self.reader.get_community_members, community_id)
+
+    async def search_by_property(self, key: str, value: Any) -> list[Any]:
+        return await self.run(self.reader.search_by_property, key, value)
+
+    async def get_community_members_page(
+        self, community_id: Any, offset: int, limit: int
+    ) -> tuple[list, int | None]:
+        name = "get_community_members_page"
+        return await self._coalesced(
+            name,
+            (name, community_id, offset, limit),
+            lambda: self._run_named(
+                name,
+                take_page,
+                self.reader.iter_community_members(community_id),
+                offset,
+                limit,
+            ),
+        )
+
+    async def community_stats(self, community_id: Any) -> dict | None:
+        return await self.run(self.reader.community_stats, community_id)
+
+    async def list_communities(
+        self, offset: int, limit: int, order: str = "id"
+    ) -> tuple[list[dict], int | None, int]:
+        return await self.run(self.reader.list_communities, offset, limit, order)
+
+    async def get_centrality(self, entity_id: Any) -> dict | None:
+        return await self.run(self.reader.get_centrality, entity_id)
+
+    async def rank_entities(
+        self, metric: str, k: int, community_id: Any | None = None
+    ) -> list[dict]:
+        return await self.run(self.reader.rank_entities, metric, k, community_id)
+
+    async def search_by_property_page(
+        self, key: str, value: Any, offset: int, limit: int
+    ) -> tuple[list, int | None]:
+        name = "search_by_property_page"
+        return await self._coalesced(
+            name,
+            (name, key, value, offset, limit),
+            lambda: self._run_named(
+                name,
+                take_page,
+                self.reader.iter_search_by_property(key, value),
+                offset,
+                limit,
+            ),
+        )
+
+    def iter_community_members(
+        self, community_id: Any, offset: int = 0
+    ) -> AsyncIterator[Any]:
+        return self.iterate(
+            self.reader.iter_community_members, community_id, offset=offset
+        )
+
+    def iter_community_member_entities(
+        self, community_id: Any, offset: int = 0, fields: frozenset[str] | None = None
+    ) -> AsyncIterator[dict | None]:
+        return self.iterate(
+            self.reader.iter_community_members,
+            community_id,
+            offset=offset,
+            transform=functools.partial(
+                projection.resolve_entities, self.reader, fields=fields
+            ),
+        )
+
+    def iter_search_by_property(
+        self, key: str, value: Any, offset: int = 0
+    ) -> AsyncIterator[Any]:
+        return self.iterate(
+            self.reader.iter_search_by_property, key, value, offset=offset
+        )
+
+    async def query_properties(self, query: PropertyQuery) -> list[Any]:
+        return await self.run(self.reader.query_properties, query)
+
+    async def subgraph(
+        self,
+        root: Any,
+        budget: traversal.TraversalBudget,
+        relation_types: set[str] | None = None,
+    ) -> dict:
+        return await self.run(
+            traversal.subgraph, self.reader, root, budget, relation_types
+        )
+
+    async def entity_context(self, query: context.ContextQuery) -> dict | None:
+        return await self.run(context.entity_context, self.reader, query)
+
+    async def shortest_paths(
+        self, query: traversal.PathQuery, budget: traversal.TraversalBudget
+    ) -> dict:
+        return await self.run(traversal.shortest_paths, self.reader, query, budget)
+
+    def close(self) -> None:
+        """Shut the pool down without waiting for queued calls.
+
+        A store this reader loaded itself is closed as well, unless calls are
+        still running on it. It is not loaded again on next use: the reader
+        raises :class:`ReaderClosedError` until :meth:`load` is called.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._loader is None or self._pending:
+            return
+        with self._load_lock:
+            store, self._reader = self._reader, None
+            self._closed = True
+        if store is not None:
+            store.close()
+
+
+def _take(
+    iterator: Iterator, size: int, transform: Callable[[list], list] | None
+) -> list:
+    chunk = list(itertools.islice(iterator, size))
+    return chunk if transform is None else transform(chunk)
+
+
+def _unshare(result: Any) -> Any:
+    """Shallow copy of a shared call result, and of the items of a tuple."""
+    if isinstance(result, dict | list | set):
+        return copy.copy(result)
+    if type(result) is tuple:
+        return tuple(_unshare(item) for item in result)
+    return result
+
+
+def _freeze(key: Any) -> Hashable:
+    """``key`` with lists and sets (also nested in tuples) made hashable."""
+    if isinstance(key, tuple | list):
+        return tuple(_freeze(item) for item in key)
+    if isinstance(key, set):
+        return frozenset(key)
+    hash(key)
+    return key
+
+
+def _observed(
+    observer: Callable[[str, float], None], name: str, call: Callable[[], Any]
+) -> Any:
+    started = time.perf_counter()
+    try:
+        return call()
+    finally:
+        observer(name, time.perf_counter() - started)
+
+
+def _share_sqlite_indexer(reader: GraphReader) -> None:
+    """Allow the SQLite indexer to be used from the pool threads.
+
+    The SQLite indexer opens its connection on the constructing thread, which
+    the ``sqlite3`` module refuses to use from any other thread. Reopen it with
+    ``check_same_thread=False`` and serialize searches behind a lock.
+
+    Other indexers are left alone, so a ``GraphStore`` does not build its
+    in-memory indexer unless a search needs it.
+    """
+    if reader.config.indexer_type != "sqlite":
+        return
+    indexer = reader.indexer
+    db_path = getattr(indexer, "db_path", None)
+    if db_path is None or not isinstance(
+        getattr(indexer, "conn", None), sqlite3.Connection
+    ):
+        return
+    indexer.conn.close()
+    indexer.conn = sqlite3.connect(db_path, check_same_thread=False)
+    lock = threading.Lock()
+    search = indexer.search
+
+    def locked_search(expression):
+        with lock:
+            return search(expression)
+
+    indexer.search = locked_search
@@ -0,0 +1,94 @@
+"""Bounded TTL cache for verified credentials."""
+
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+
+def credential_key(kind: str, credential: str) -> str:
+    """Hash a credential so raw tokens and API keys are never kept in memory."""
+    return hashlib.sha256(f"{kind}:{credential}".encode()).hexdigest()
+
+
+class TokenCache:
+    """LRU cache of verification outcomes with per-entry expiry.
+
+    Successful verifications store the authenticated user; failed ones store
+    the rejection (negative caching) so a flood of requests with a bad token
+    does not hit the validator every time.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl: float = 60.0,
+        negative_ttl: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, bool, Any]] = OrderedDict()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> tuple[bool, Any] | None:
+        """Look up ``key``.
+
+        Returns:
+            tuple[bool, Any] | None: ``(True, user)`` for a cached success,
+            ``(False, rejection)`` for a cached failure, None on a miss.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if entry[1]:
+            self.hits += 1
+        else:
+            self.negative_hits += 1
+        return entry[1], entry[2]
+
+    def put(self, key: str, user: Any, ttl: float | None = None) -> None:
+        """Cache a successful verification for ``ttl`` (capped at ``self.ttl``)."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._store(key, True, user, ttl)
+
+    def put_negative(self, key: str, rejection: Any) -> None:
+        """Cache a failed verification for ``negative_ttl`` seconds."""
+        self._store(key, False, rejection, self.negative_ttl)
+
+    def _store(self, key: str, ok: bool, value: Any, ttl: float) -> None:
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries[key] = (self._clock() + ttl, ok, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,110 @@
+"""Authentication dependency with a verification cache.
+
+Drop-in replacement for ``apikey.dependencies.get_current_user``: it accepts
+the same bearer token / API key credentials and performs the same validation,
+but remembers the outcome in the app's :class:`TokenCache` so repeated
+requests with the same credential skip JWT decoding and the API key lookup.
+
+Successes are cached for at most the cache TTL, and never beyond a JWT's
+``exp`` or an API key's ``expires_at``. Revoking a key does not reach the
+cache, which is per process: a revoked key keeps working until its entry
+expires, up to ``APIConfig.auth_cache_ttl`` seconds, in each worker that
+cached it.
+"""
+
+import time
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+
+from apikey.db import get_async_session
+from apikey.dependencies import (
+    api_key_header,
+    api_key_query,
+    bearer_auth,
+    validate_api_key,
+    validate_jwt,
+)
+from apikey.models import APIKey, User
+from apikey.utils import hash_api_key
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..metrics import request_phase
+from .cache import TokenCache, credential_key
+
+session_scope = asynccontextmanager(get_async_session)
+
+
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_auth),
+    api_key_header_val: str | None = Depends(api_key_header),
+    api_key_query_val: str | None = Depends(api_key_query),
+) -> User:
+    """Get the current authenticated user from an API key or JWT."""
+    with request_phase("auth"):
+        return await _authenticate(
+            request, credentials, api_key_header_val or api_key_query_val
+        )
+
+
+async def _authenticate(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials | None,
+    api_key: str | None,
+) -> User:
+    if api_key:
+        key = credential_key("api_key", api_key)
+    elif credentials:
+        key = credential_key("jwt", credentials.credentials)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="No authentication provided",
+        )
+
+    cache: TokenCache | None = getattr(request.app.state, "auth_cache", None)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        ok, value = cached
+        if ok:
+            return value
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=value)
+
+    try:
+        if api_key:
+            async with session_scope() as session:
+                user = await validate_api_key(api_key, session)
+                ttl = await _seconds_until_key_expiry(api_key, session)
+        else:
+            user = await validate_jwt(credentials)
+            ttl = _seconds_until_expiry(credentials.credentials)
+    except HTTPException as e:
+        if cache is not None and e.status_code == status.HTTP_401_UNAUTHORIZED:
+            cache.put_negative(key, e.detail)
+        raise
+
+    if cache is not None:
+        cache.put(key, user, ttl)
+    return user
+
+
+def _seconds_until_expiry(token: str) -> float:
+    # Only called after validate_jwt succeeded, so the claims are trusted.
+    return jwt.get_unverified_claims(token)["exp"] - time.time()
+
+
+async def _seconds_until_key_expiry(
+    api_key: str, session: AsyncSession
+) -> float | None:
+    # validate_api_key does not return the key's record, so read its expiry.
+    stmt = select(APIKey.expires_at).where(APIKey.key_hash == hash_api_key(api_key))
+    expires_at = (await session.execute(stmt)).scalar_one_or_none()
+    if expires_at is None:
+        return None
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=UTC)
+    return (expires_at - datetime.now(UTC)).total_seconds()
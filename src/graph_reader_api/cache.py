@@ -0,0 +1,254 @@
+"""Byte-budgeted, scan-resistant caches for the graph store.
+
+:class:`TinyLFUCache` implements W-TinyLFU, sized in bytes rather than
+entries:
+
+* New entries go to a small LRU *window* (1% of the budget), so a burst of
+  fresh keys can still be served from the cache.
+* Entries leaving the window compete for the *main* space, a segmented LRU
+  (*probation*, then *protected* once read again). A candidate only replaces
+  the main space's least recently used entries if it has been read more
+  often than each of them, per a count-min sketch of recent read frequencies
+  (:class:`FrequencySketch`).
+
+A sweep over many keys that are each read once, such as a large search
+result or a scan of a community's members, therefore passes through the
+window without displacing the entries that are read over and over.
+
+Entry sizes are estimated per object by :func:`estimate_size`, so a hub's
+neighbor list costs as much of the budget as the memory it holds.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any
+
+MIB = 1024 * 1024
+# Share of the budget held by the window; the rest is the main space.
+WINDOW_FRACTION = 0.01
+# Share of the main space held by protected entries.
+PROTECTED_FRACTION = 0.8
+# Entry size assumed to size the frequency sketch from a byte budget.
+SKETCH_BYTES_PER_ENTRY = 1024
+
+_MASK64 = (1 << 64) - 1
+# Odd 64-bit multipliers, one per sketch row.
+_SEEDS = (
+    0x9E3779B97F4A7C15,
+    0xC2B2AE3D27D4EB4F,
+    0x165667B19E3779F9,
+    0xD6E8FEB86659FD93,
+)
+_HALVE = bytes(count >> 1 for count in range(256))
+
+
+@dataclass(frozen=True)
+class CacheBudgets:
+    """Byte budgets of the graph store's caches."""
+
+    entities: int = 32 * MIB
+    neighbors: int = 32 * MIB
+    search: int = 8 * MIB
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate bytes held by ``value`` and the objects it contains."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, list | tuple | set | frozenset):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class FrequencySketch:
+    """Count-min sketch of read frequencies, with 4-bit counters and aging.
+
+    After ``10 * width`` increments every counter is halved, so frequencies
+    reflect recent reads and keys that stopped being read lose their claim
+    on the cache.
+    """
+
+    MAX_COUNT = 15
+
+    def __init__(self, width: int):
+        bits = max(4, (width - 1).bit_length())
+        self.width = 1 << bits
+        self._shift = 64 - bits
+        self._table = bytearray(self.width * len(_SEEDS))
+        self.sample_size = 10 * self.width
+        self.additions = 0
+
+    def _indexes(self, key: Hashable) -> Iterator[int]:
+        h = hash(key) & _MASK64
+        for row, seed in enumerate(_SEEDS):
+            yield row * self.width + (((h * seed) & _MASK64) >> self._shift)
+
+    def increment(self, key: Hashable) -> None:
+        table = self._table
+        for index in self._indexes(key):
+            if table[index] < self.MAX_COUNT:
+                table[index] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._table = bytearray(self._table.translate(_HALVE))
+            self.additions //= 2
+
+    def frequency(self, key: Hashable) -> int:
+        return min(self._table[index] for index in self._indexes(key))
+
+
+class _Segment:
+    """LRU-ordered entries with the total of their sizes."""
+
+    def __init__(self):
+        self.entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self.size = 0
+
+    def add(self, key: Hashable, value: Any, size: int) -> None:
+        self.entries[key] = (value, size)
+        self.size += size
+
+    def pop(self, key: Hashable) -> tuple[Any, int]:
+        value, size = self.entries.pop(key)
+        self.size -= size
+        return value, size
+
+    def pop_oldest(self) -> tuple[Hashable, Any, int]:
+        key, (value, size) = self.entries.popitem(last=False)
+        self.size -= size
+        return key, value, size
+
+
+class TinyLFUCache:
+    """Thread-safe W-TinyLFU cache holding at most ``max_bytes``.
+
+    Supports the mapping operations ``GraphReader`` uses on its entity cache
+    (``in``, ``[]``, assignment, iteration), which neither count as reads
+    nor reorder entries; :meth:`get` and :meth:`put` do.
+
+    Args:
+        max_bytes: Budget for the estimated sizes of the cached values.
+        sizeof: Estimates the size of a value.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = estimate_size):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.window_bytes = int(max_bytes * WINDOW_FRACTION)
+        self.main_bytes = max_bytes - self.window_bytes
+        self.protected_bytes = int(self.main_bytes * PROTECTED_FRACTION)
+        self.sketch = FrequencySketch(max(16, max_bytes // SKETCH_BYTES_PER_ENTRY))
+        self._window = _Segment()
+        self._probation = _Segment()
+        self._protected = _Segment()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def _segments(self) -> tuple[_Segment, _Segment, _Segment]:
+        return self._window, self._probation, self._protected
+
+    @property
+    def size(self) -> int:
+        """Estimated bytes held."""
+        return sum(segment.size for segment in self._segments)
+
+    def _find(self, key: Hashable) -> _Segment | None:
+        for segment in self._segments:
+            if key in segment.entries:
+                return segment
+        return None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Read ``key``, counting the read towards its frequency."""
+        with self._lock:
+            self.sketch.increment(key)
+            segment = self._find(key)
+            if segment is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            if segment is self._probation:
+                value, size = segment.pop(key)
+                self._protected.add(key, value, size)
+                while self._protected.size > self.protected_bytes:
+                    self._probation.add(*self._protected.pop_oldest())
+                return value
+            segment.entries.move_to_end(key)
+            return segment.entries[key][0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Cache ``value``; it may be evicted again right away.
+
+        Values larger than the main space are never cached.
+        """
+        size = self.sizeof(value)
+        with self._lock:
+            segment = self._find(key)
+            if segment is not None:
+                segment.pop(key)
+            if size > self.main_bytes:
+                self.evictions += 1
+                return
+            self._window.add(key, value, size)
+            while self._window.size > self.window_bytes:
+                self._admit(*self._window.pop_oldest())
+
+    def _admit(self, key: Hashable, value: Any, size: int) -> None:
+        """Move a window entry to probation if it beats the entries it displaces."""
+        needed = self._probation.size + self._protected.size + size - self.main_bytes
+        victims = []
+        if needed > 0:
+            frequency = self.sketch.frequency(key)
+            for victim in chain(self._probation.entries, self._protected.entries):
+                if self.sketch.frequency(victim) >= frequency:
+                    self.evictions += 1
+                    return
+                victims.append(victim)
+                needed -= self._find(victim).entries[victim][1]
+                if needed <= 0:
+                    break
+        for victim in victims:
+            self._find(victim).pop(victim)
+            self.evictions += 1
+        self._probation.add(key, value, size)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": sum(len(segment.entries) for segment in self._segments),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._find(key) is not None
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            segment = self._find(key)
+            if segment is None:
+                raise KeyError(key)
+            return segment.entries[key][0]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.put(key, value)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        with self._lock:
+            return iter([key for segment in self._segments for key in segment.entries])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(segment.entries) for segment in self._segments)
@@ -0,0 +1,112 @@
+"""HTTP caching for graph read endpoints.
+
+The KG directory only changes when the builder publishes new shards, so every
+GET response is fully determined by the graph snapshot version and the request
+URL. That lets the service derive a strong ETag *before* running the handler
+and answer ``If-None-Match`` with 304 without touching the reader.
+"""
+
+import hashlib
+
+from fastapi import Depends, Request
+from fastapi.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .async_reader import AsyncGraphReader
+from .auth.dependencies import get_current_user
+from .registry import GRAPH_HEADER, current_reader
+
+CACHEABLE_METHODS = {"GET", "HEAD"}
+# Request headers, besides the URL, that a response depends on.
+VARY_HEADERS = ("Accept", "Accept-Encoding", GRAPH_HEADER)
+
+
+class NotModified(Exception):  # noqa: N818 - mirrors the HTTP status name
+    """Raised by :func:`conditional_get` when the client's copy is current."""
+
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+def request_etag(request: Request, version: str) -> str:
+    """Strong ETag for ``request`` against graph snapshot ``version``.
+
+    The headers in :data:`VARY_HEADERS` are part of the digest, as they
+    select the graph, encoding and compression of the representation.
+    """
+    query = "&".join(sorted(request.url.query.split("&")))
+    headers = "|".join(request.headers.get(name, "") for name in VARY_HEADERS)
+    digest = hashlib.sha1(
+        f"{request.url.path}?{query}|{headers}".encode(), usedforsecurity=False
+    ).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Evaluate an ``If-None-Match`` header (weak comparison, RFC 9110)."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+async def conditional_get(
+    request: Request,
+    user=Depends(get_current_user),
+    reader: AsyncGraphReader = Depends(current_reader),
+) -> None:
+    """Router dependency that short-circuits unchanged GETs with 304.
+
+    Depends on authentication so that a 304 is only ever sent to an
+    authenticated client. For other requests it records the ETag for
+    :class:`CacheHeadersMiddleware` to attach to the response.
+    """
+    if request.method not in CACHEABLE_METHODS:
+        return
+    etag = request_etag(request, reader.version)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        raise NotModified(etag)
+    request.state.etag = etag
+
+
+def cache_headers(etag: str, cache_control: str) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Vary": f"Accept, {GRAPH_HEADER}",
+    }
+
+
+class CacheHeadersMiddleware:
+    """Attach ETag and Cache-Control to successful responses that have an ETag.
+
+    Implemented as a pure ASGI middleware so the headers also reach streamed
+    and directly returned responses.
+    """
+
+    def __init__(self, app: ASGIApp, cache_control: str):
+        self.app = app
+        self.cache_control = cache_control
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                etag = scope.get("state", {}).get("etag")
+                if etag is not None:
+                    headers = cache_headers(etag, self.cache_control)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (name.lower().encode(), value.encode())
+                        for name, value in headers.items()
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def not_modified_response(exc: NotModified, cache_control: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(exc.etag, cache_control))
@@ -0,0 +1,240 @@
+"""Offline centrality computation.
+
+Loads the adjacency of a knowledge graph into a SciPy sparse matrix and
+computes degree, PageRank and sampled betweenness centrality with vectorized
+NumPy operations, then writes ``entities/centrality.idx`` next to the shards
+(see :mod:`graph_reader_api.indexes.centrality`). Run it after the graph
+builder publishes new shards::
+
+    python -m graph_reader_api.centrality resources/kg
+
+This module needs the ``centrality`` extra (NumPy and SciPy); the API only
+reads the file it writes.
+"""
+
+import argparse
+import logging
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from scipy import sparse
+
+from .indexes.centrality import (
+    MAGIC,
+    METRICS,
+    centrality_path,
+    centrality_sources,
+)
+from .indexes.csr import open_csr
+from .indexes.entity_offsets import open_entity_offsets
+from .indexes.files import fingerprint, pack, write_atomic
+
+logger = logging.getLogger(__name__)
+
+# Cells (nodes x sources) of the dense matrices a betweenness batch holds.
+BATCH_CELLS = 4_000_000
+
+
+@dataclass(frozen=True)
+class CentralityParams:
+    damping: float = 0.85
+    max_iterations: int = 100
+    tolerance: float = 1e-10
+    # Source nodes sampled for betweenness; all nodes when it exceeds them.
+    betweenness_samples: int = 256
+    seed: int = 0
+
+
+def load_adjacency(base_dir: str) -> tuple[np.ndarray, sparse.csr_array]:
+    """Read the CSR snapshot of ``base_dir`` into a sparse matrix.
+
+    Returns:
+        tuple[np.ndarray, sparse.csr_array]: The sorted entity IDs, and the
+        matrix whose entry ``(i, j)`` counts the relations from entity ``i``
+        to entity ``j``. Entities without relations are included.
+
+    Raises:
+        ValueError: If the graph has no CSR snapshot (e.g. non-integer IDs).
+    """
+    csr = open_csr(base_dir)
+    if csr is None:
+        raise ValueError("Centrality requires the CSR adjacency snapshot")
+    try:
+        sources = np.repeat(
+            np.frombuffer(csr.node_ids, dtype=np.int64),
+            np.diff(np.frombuffer(csr.offsets, dtype=np.int64)),
+        )
+        targets = np.frombuffer(csr.targets, dtype=np.int64).copy()
+    finally:
+        csr.close()
+    known = [sources, targets]
+    entities = open_entity_offsets(base_dir)
+    if entities is not None:
+        known.append(np.frombuffer(entities.ids, dtype=np.int64).copy())
+    node_ids = np.unique(np.concatenate(known))
+    n = len(node_ids)
+    matrix = sparse.csr_array(
+        (
+            np.ones(len(sources)),
+            (np.searchsorted(node_ids, sources), np.searchsorted(node_ids, targets)),
+        ),
+        shape=(n, n),
+    )
+    matrix.sum_duplicates()
+    return node_ids, matrix
+
+
+def pagerank(matrix: sparse.csr_array, params: CentralityParams) -> np.ndarray:
+    """PageRank by power iteration, with parallel relations as edge weights.
+
+    The rank of dangling entities (no outgoing relations) is spread evenly
+    over all entities.
+    """
+    n = matrix.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    out_weight = np.asarray(matrix.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inverse = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    transition = (sparse.diags_array(inverse) @ matrix).T.tocsr()
+    rank = np.full(n, 1.0 / n)
+    for _ in range(params.max_iterations):
+        spread = (1 - params.damping + params.damping * rank[dangling].sum()) / n
+        updated = params.damping * (transition @ rank) + spread
+        delta = np.abs(updated - rank).sum()
+        rank = updated
+        if delta < n * params.tolerance:
+            break
+    return rank / rank.sum()
+
+
+def betweenness(matrix: sparse.csr_array, params: CentralityParams) -> np.ndarray:
+    """Approximate normalized betweenness centrality.
+
+    Runs Brandes' algorithm from a random sample of source entities and
+    scales the result up to all sources. Each batch of sources is processed
+    at once: a BFS level is one sparse-by-dense product over every source in
+    the batch, and so is each step of the dependency accumulation.
+    """
+    n = matrix.shape[0]
+    scores = np.zeros(n)
+    if n < 3:
+        return scores
+    adjacency = matrix.astype(bool).astype(np.float64)
+    reverse = adjacency.T.tocsr()
+    samples = min(params.betweenness_samples, n)
+    rng = np.random.default_rng(params.seed)
+    sources = rng.choice(n, size=samples, replace=False)
+    batch = max(1, BATCH_CELLS // n)
+    for start in range(0, samples, batch):
+        scores += _brandes_batch(adjacency, reverse, sources[start : start + batch])
+    scores *= n / samples
+    return scores / ((n - 1) * (n - 2))
+
+
+def _brandes_batch(
+    adjacency: sparse.csr_array, reverse: sparse.csr_array, sources: np.ndarray
+) -> np.ndarray:
+    """Summed dependencies of every entity on shortest paths from ``sources``."""
+    n, columns = adjacency.shape[0], np.arange(len(sources))
+    depth = np.full((n, len(sources)), -1, dtype=np.int32)
+    paths = np.zeros((n, len(sources)))
+    depth[sources, columns] = 0
+    paths[sources, columns] = 1.0
+    level = 0
+    while True:
+        # Shortest-path counts flow from this level to unvisited successors.
+        reached = reverse @ np.where(depth == level, paths, 0.0)
+        discovered = (reached > 0) & (depth < 0)
+        if not discovered.any():
+            break
+        level += 1
+        depth[discovered] = level
+        paths[discovered] = reached[discovered]
+
+    dependency = np.zeros_like(paths)
+    for current in range(level - 1, -1, -1):
+        ratio = np.divide(
+            1.0 + dependency,
+            paths,
+            out=np.zeros_like(paths),
+            where=depth == current + 1,
+        )
+        mask = depth == current
+        dependency[mask] = (paths * (adjacency @ ratio))[mask]
+    dependency[sources, columns] = 0.0
+    return dependency.sum(axis=1)
+
+
+def compute_centrality(
+    base_dir: str, params: CentralityParams | None = None
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Compute every metric in :data:`METRICS` for the graph in ``base_dir``.
+
+    Returns:
+        tuple[np.ndarray, dict[str, np.ndarray]]: The sorted entity IDs and
+        the scores of each metric, aligned with them.
+    """
+    params = params or CentralityParams()
+    node_ids, matrix = load_adjacency(base_dir)
+    out_degree = np.asarray(matrix.sum(axis=1)).ravel()
+    in_degree = np.asarray(matrix.sum(axis=0)).ravel()
+    scores = {
+        "degree": in_degree + out_degree,
+        "in_degree": in_degree,
+        "out_degree": out_degree,
+    }
+    for metric, compute in (("pagerank", pagerank), ("betweenness", betweenness)):
+        started = time.perf_counter()
+        scores[metric] = compute(matrix, params)
+        logger.info("Computed %s in %.2fs", metric, time.perf_counter() - started)
+    return node_ids, scores
+
+
+def build_centrality(base_dir: str, params: CentralityParams | None = None) -> bytes:
+    """Compute the centrality scores of ``base_dir`` in the on-disk format."""
+    params = params or CentralityParams()
+    sources = centrality_sources(base_dir)
+    node_ids, scores = compute_centrality(base_dir, params)
+    arrays: list[np.ndarray] = [node_ids.astype(np.int64)]
+    for metric in METRICS:
+        values = scores[metric].astype(np.float64)
+        # Highest score first; ties go to the lower entity ID.
+        order = np.lexsort((node_ids, -values)).astype(np.int64)
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(1, len(order) + 1)
+        arrays.extend([values, order, ranks])
+    meta = {
+        "nodes": len(node_ids),
+        "metrics": list(METRICS),
+        "params": vars(params),
+        "computed_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "fingerprint": fingerprint(sources),
+    }
+    return pack(MAGIC, meta, arrays)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base_dir", help="Knowledge graph directory")
+    parser.add_argument("--damping", type=float, default=CentralityParams.damping)
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=CentralityParams.betweenness_samples,
+        help="Source entities sampled for betweenness",
+    )
+    parser.add_argument("--seed", type=int, default=CentralityParams.seed)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    params = CentralityParams(
+        damping=args.damping, betweenness_samples=args.samples, seed=args.seed
+    )
+    path = centrality_path(args.base_dir)
+    write_atomic(path, build_centrality(args.base_dir, params))
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,90 @@
 # graph_reader_api/config.py
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any
 
 
 @dataclass
 class APIConfig:
     base_dir: str
     indexer_type: str = "memory"
-    cache_size: int = 1000
+    # Other graphs served by this process, by name: their routes are mounted
+    # under /graphs/{name}/ and also selected by an X-Graph header. base_dir
+    # is served as default_graph, used when a request names no graph.
+    graphs: dict[str, str] = field(default_factory=dict)
+    default_graph: str = "default"
+    # Estimated bytes the open graphs may hold (see GraphStore.footprint);
+    # least recently used graphs are closed to stay within it. None keeps
+    # every graph open once loaded.
+    graph_memory_budget: int | None = None
+    # Byte budgets of each graph's caches (see graph_reader_api.cache):
+    # entity records, neighbor lists and search results.
+    entity_cache_bytes: int = 32 * 1024 * 1024
+    neighbor_cache_bytes: int = 32 * 1024 * 1024
+    search_cache_bytes: int = 8 * 1024 * 1024
+    # Thread pool that runs blocking GraphReader calls off the event loop.
+    reader_workers: int = 4
+    # Calls admitted (running + queued) before new ones are rejected with 503.
+    reader_max_pending: int = 64
+    # Per-call timeout in seconds; None disables it.
+    reader_timeout: float | None = 10.0
+    # Let identical reader calls share the one already in flight.
+    reader_coalesce: bool = True
+    # Admission control. Requests in flight across the process beyond
+    # max_requests_in_flight are shed with 503; None disables shedding.
+    max_requests_in_flight: int | None = 256
+    # Per-principal token bucket: rate_limit tokens per second, saved up to
+    # rate_limit_burst. Each request spends its route's admission_costs
+    # entry (1 for unlisted routes); None disables rate limiting.
+    rate_limit: float | None = None
+    rate_limit_burst: float = 50.0
+    admission_costs: dict[str, float] = field(
+        default_factory=lambda: {
+            "/entity/batch": 5.0,
+            "/entity/{entity_id}/subgraph": 5.0,
+            "/entity/{entity_id}/context": 3.0,
+            "/community/{community_id}/members": 3.0,
+            "/search": 5.0,
+            "/search/query": 5.0,
+            "/path": 10.0,
+        }
+    )
+    # Requests one principal may have in flight; None for no limit.
+    principal_max_in_flight: int | None = None
+    # Hard caps for GET /entity/{entity_id}/subgraph.
+    subgraph_max_depth: int = 3
+    subgraph_max_nodes: int = 1000
+    subgraph_time_budget: float = 2.0
+    # Hard caps for GET /path. max_nodes bounds the nodes discovered over the
+    # whole search, including the reruns needed for k > 1.
+    path_max_depth: int = 6
+    path_max_nodes: int = 100000
+    path_max_k: int = 10
+    path_time_budget: float = 2.0
+    # Token budgets of GET /entity/{entity_id}/context, and the neighbor
+    # properties it includes unless the request names others.
+    context_default_tokens: int = 2000
+    context_max_tokens: int = 32000
+    context_properties: list[str] = field(default_factory=lambda: ["name", "type"])
+    # Create the auth tables at startup. graph_reader_api.serve turns this off
+    # in its workers, having created them once in the parent process.
+    init_auth_db: bool = True
+    # Verified-credential cache in front of get_current_user; ttl 0 disables it.
+    auth_cache_size: int = 10000
+    auth_cache_ttl: float = 60.0
+    auth_cache_negative_ttl: float = 5.0
+    # Cache-Control sent with ETag'd GET responses. The default makes clients
+    # revalidate every time, which is cheap since unchanged data yields a 304.
+    cache_control: str = "private, no-cache"
+    # Responses of at least this many bytes are compressed with zstd or gzip,
+    # as negotiated from Accept-Encoding; None disables compression.
+    compression_min_size: int | None = 1024
+    gzip_level: int = 6
+    zstd_level: int = 3
+    # Follow logs/*.jsonl and serve updates before they are compacted. The
+    # logs are replayed from the start at startup to rebuild the overlay.
+    ingest_logs: bool = True
+    ingest_poll_interval: float = 1.0
+    # Startup warmup, run before /ready passes: pages the indexes in and
+    # loads these entities (and their neighbor lists) into the cache.
+    warmup: bool = True
+    warmup_entities: list[Any] = field(default_factory=list)
@@ -0,0 +1,118 @@
+"""Composite entity context, sized for an agent's token budget.
+
+:func:`entity_context` gathers in one reader call what an agent would
+otherwise assemble from several tool calls: the entity, a summary of its
+community, and its neighbors in both directions with their key properties,
+fetched in batches. Neighbors are added most relevant first until the
+estimated size of the response reaches the budget.
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+from .serialization import encode
+from .store import GraphStore, relation_type
+
+# Rough size of a token in bytes of JSON, to estimate response sizes.
+BYTES_PER_TOKEN = 4
+# Neighbors whose properties are fetched together.
+FETCH_BATCH = 64
+
+
+@dataclass(frozen=True)
+class ContextQuery:
+    entity_id: Any
+    max_tokens: int
+    # Neighbor properties to include; the others are left out.
+    properties: tuple[str, ...] = ("name", "type")
+
+
+def estimate_tokens(value: Any) -> int:
+    """Approximate token count of ``value`` once encoded as JSON."""
+    return -(-len(encode(value)) // BYTES_PER_TOKEN)
+
+
+def _linked_neighbors(store: GraphStore, entity_id: Any) -> list[tuple[Any, list]]:
+    """Neighbors in either direction with their relations, most relevant first.
+
+    Relevance is the number of relations linking the neighbor to the entity,
+    then the neighbor's PageRank when centrality has been computed.
+    """
+    links: dict[str, tuple[Any, list[dict]]] = {}
+
+    def link(neighbor_id: Any, relation: dict, direction: str) -> None:
+        if neighbor_id == entity_id:
+            return
+        key = str(neighbor_id)
+        if key not in links:
+            links[key] = (neighbor_id, [])
+        links[key][1].append({"type": relation_type(relation), "direction": direction})
+
+    for relation in store.get_relations([entity_id])[entity_id]:
+        link(relation["target_id"], relation, "out")
+    for relation in store.get_incoming_relations([entity_id])[entity_id]:
+        link(relation["source_id"], relation, "in")
+
+    centrality = store.centrality
+
+    def relevance(item: tuple[Any, list]) -> tuple:
+        neighbor_id, relations = item
+        pagerank = centrality.score("pagerank", neighbor_id) if centrality else None
+        return -len(relations), -(pagerank or 0.0), str(neighbor_id)
+
+    return sorted(links.values(), key=relevance)
+
+
+def entity_context(store: GraphStore, query: ContextQuery) -> dict | None:
+    """The entity, its community and as many neighbors as the budget allows.
+
+    The entity and its community summary are always included, even when they
+    alone exceed the budget.
+
+    Returns:
+        dict | None: ``entity``, ``community`` (statistics, or None),
+        ``neighbors`` (``entity_id``, selected ``properties`` and the
+        ``relations`` linking it, by ``type`` and ``direction``),
+        ``neighbor_count`` (all neighbors), ``truncated`` and
+        ``estimated_tokens``; None if the entity does not exist.
+    """
+    entity = store.get_entity(query.entity_id)
+    if entity is None:
+        return None
+    community_id = entity["properties"].get("community_id")
+    neighbors = _linked_neighbors(store, query.entity_id)
+    context = {
+        "entity": entity,
+        "community": (
+            store.community_stats(community_id) if community_id is not None else None
+        ),
+        "neighbors": [],
+        "neighbor_count": len(neighbors),
+        "truncated": False,
+        "estimated_tokens": 0,
+    }
+    used = estimate_tokens(context)
+    for start in range(0, len(neighbors), FETCH_BATCH):
+        batch = neighbors[start : start + FETCH_BATCH]
+        found, _ = store.get_entities(neighbor_id for neighbor_id, _ in batch)
+        for neighbor_id, relations in batch:
+            properties = found.get(neighbor_id, {}).get("properties", {})
+            item = {
+                "entity_id": neighbor_id,
+                "properties": {
+                    key: properties[key]
+                    for key in query.properties
+                    if key in properties
+                },
+                "relations": relations,
+            }
+            # Plus one for the separating comma.
+            cost = estimate_tokens(item) + 1
+            if used + cost > query.max_tokens:
+                context["truncated"] = True
+                context["estimated_tokens"] = used
+                return context
+            context["neighbors"].append(item)
+            used += cost
+    context["estimated_tokens"] = used
+    return context
@@ -0,0 +1,48 @@
+"""Build the derived index files of a knowledge graph directory.
+
+Run after the graph builder publishes new shards so that API instances can
+memory-map the indexes at startup instead of compiling them on first load::
+
+    python -m graph_reader_api.indexes.build resources/kg
+"""
+
+import argparse
+import logging
+import time
+
+from .communities import build_community_index, communities_path
+from .csr import build_csr, csr_path
+from .entity_offsets import build_entity_offsets, offsets_path
+from .files import write_atomic
+from .properties import build_property_index, properties_path
+
+logger = logging.getLogger(__name__)
+
+
+def build_indexes(base_dir: str) -> list[str]:
+    """Build every index of ``base_dir`` and return the paths written."""
+    written = []
+    for name, path, build in (
+        ("CSR snapshot", csr_path(base_dir), build_csr),
+        ("entity offset index", offsets_path(base_dir), build_entity_offsets),
+        ("property index", properties_path(base_dir), build_property_index),
+        ("community index", communities_path(base_dir), build_community_index),
+    ):
+        started = time.perf_counter()
+        write_atomic(path, build(base_dir))
+        written.append(path)
+        logger.info("Built %s in %.2fs", name, time.perf_counter() - started)
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base_dir", help="Knowledge graph directory")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for path in build_indexes(args.base_dir):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
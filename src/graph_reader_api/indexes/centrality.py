@@ -0,0 +1,150 @@
+"""Precomputed centrality scores.
+
+``entities/centrality.idx`` is written by the offline job in
+:mod:`graph_reader_api.centrality` and holds, for every entity, its score and
+rank under each metric:
+
+* ``node_ids`` -- sorted entity IDs (int64)
+* per metric: ``scores`` (float64), ``order`` (positions of the entities by
+  descending score, int64) and ``ranks`` (1-based rank of each entity, int64)
+
+Serving only reads the file, so the API needs neither NumPy nor SciPy: a
+score lookup is a binary search and a top-k query is a slice of ``order``.
+Unlike the other indexes it is never rebuilt on load; a stale file is
+ignored until the job runs again.
+"""
+
+import heapq
+import logging
+import os
+from bisect import bisect_left
+from collections.abc import Iterable
+from typing import Any
+
+from .csr import source_files
+from .entity_offsets import entity_shards
+from .files import StaleIndexError, close_index, fingerprint, map_file, unpack, view
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GRCEN001"
+METRICS = ("degree", "in_degree", "out_degree", "pagerank", "betweenness")
+# Metrics whose scores are counts, returned as integers.
+COUNT_METRICS = frozenset({"degree", "in_degree", "out_degree"})
+
+
+def centrality_path(base_dir: str) -> str:
+    return os.path.join(base_dir, "entities", "centrality.idx")
+
+
+def centrality_sources(base_dir: str) -> list[str]:
+    """Files the centrality scores are derived from."""
+    return [*entity_shards(base_dir), *source_files(base_dir)]
+
+
+class CentralityIndex:
+    """Score, rank and top-k lookups over a memory-mapped centrality file."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        meta, offset = unpack(buffer, MAGIC)
+        self.meta = meta
+        count = meta["nodes"]
+        self.node_ids, offset = view(buffer, offset, count, "q")
+        self.scores: dict[str, memoryview] = {}
+        self.order: dict[str, memoryview] = {}
+        self.ranks: dict[str, memoryview] = {}
+        for metric in meta["metrics"]:
+            self.scores[metric], offset = view(buffer, offset, count, "d")
+            self.order[metric], offset = view(buffer, offset, count, "q")
+            self.ranks[metric], offset = view(buffer, offset, count, "q")
+
+    @classmethod
+    def load(cls, base_dir: str) -> "CentralityIndex":
+        """Map the centrality file of ``base_dir``.
+
+        Raises:
+            FileNotFoundError: If the job has not been run.
+            StaleIndexError: If the shards changed since the job ran.
+        """
+        buffer = map_file(centrality_path(base_dir))
+        meta, _ = unpack(buffer, MAGIC)
+        if meta["fingerprint"] != fingerprint(centrality_sources(base_dir)):
+            raise StaleIndexError("Centrality scores are older than the shards")
+        return cls(buffer)
+
+    @property
+    def metrics(self) -> list[str]:
+        return self.meta["metrics"]
+
+    def buffers(self) -> list:
+        """The mapped file."""
+        return [self.buffer]
+
+    def close(self) -> None:
+        """Unmap the index; it must not be used afterwards."""
+        close_index(self)
+
+    def _slot(self, entity_id: Any) -> int | None:
+        if isinstance(entity_id, bool) or not isinstance(entity_id, int):
+            return None
+        slot = bisect_left(self.node_ids, entity_id)
+        if slot < len(self.node_ids) and self.node_ids[slot] == entity_id:
+            return slot
+        return None
+
+    def _score(self, metric: str, slot: int) -> float | int:
+        score = self.scores[metric][slot]
+        return int(score) if metric in COUNT_METRICS else score
+
+    def score(self, metric: str, entity_id: Any) -> float | int | None:
+        """Score of ``entity_id`` under ``metric``, or None if unscored."""
+        slot = self._slot(entity_id)
+        return None if slot is None else self._score(metric, slot)
+
+    def entity(self, entity_id: Any) -> dict | None:
+        """Scores and 1-based ranks of ``entity_id``, or None if unscored."""
+        slot = self._slot(entity_id)
+        if slot is None:
+            return None
+        return {
+            "entity_id": entity_id,
+            "scores": {m: self._score(m, slot) for m in self.metrics},
+            "ranks": {m: self.ranks[m][slot] for m in self.metrics},
+        }
+
+    def top(
+        self, metric: str, k: int, within: Iterable[Any] | None = None
+    ) -> list[dict]:
+        """The ``k`` highest-scoring entities, optionally among ``within``.
+
+        Over the whole graph this is a slice of the precomputed order; within
+        a set of entities (e.g. a community) it costs one lookup per entity.
+        """
+        if within is None:
+            slots = self.order[metric][:k]
+        else:
+            ranks = self.ranks[metric]
+            found = (self._slot(entity_id) for entity_id in within)
+            slots = heapq.nsmallest(
+                k, (s for s in found if s is not None), key=ranks.__getitem__
+            )
+        return [
+            {"entity_id": self.node_ids[slot], "score": self._score(metric, slot)}
+            for slot in slots
+        ]
+
+
+def open_centrality(base_dir: str) -> CentralityIndex | None:
+    """Load the centrality scores of ``base_dir``, if they are current.
+
+    Returns None when the job has not been run or the shards changed since,
+    in which case centrality endpoints report the scores as unavailable.
+    """
+    try:
+        return CentralityIndex.load(base_dir)
+    except FileNotFoundError:
+        return None
+    except StaleIndexError as e:
+        logger.warning("Ignoring %s: %s", centrality_path(base_dir), e)
+        return None
@@ -0,0 +1,331 @@
+"""Community index with precomputed community statistics.
+
+``entities/communities.idx`` groups entities by their ``community_id``
+property. For every community it stores the sorted member IDs and the
+statistics of the community as a subgraph:
+
+* ``internal_edges`` -- relations between two members
+* ``external_edges`` -- relations with exactly one endpoint in the community,
+  in either direction
+* ``top_members`` -- the members with the highest total (in + out) degree
+
+Community IDs and their order are kept in the metadata and everything else is
+memory-mapped, so looking a community up is a dictionary probe followed by
+slices over the mapping.
+"""
+
+import heapq
+import json
+import os
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from .csr import CSRAdjacency, open_csr, source_files
+from .entity_offsets import entity_shards
+from .files import (
+    StaleIndexError,
+    close_index,
+    fingerprint,
+    map_file,
+    open_index,
+    pack,
+    require_int,
+    unpack,
+    view,
+)
+
+MAGIC = b"GRCOM001"
+TOP_MEMBERS = 10
+ORDERS = ("id", "size")
+
+
+def communities_path(base_dir: str) -> str:
+    return os.path.join(base_dir, "entities", "communities.idx")
+
+
+def index_sources(base_dir: str) -> list[str]:
+    """Files a community index is derived from."""
+    return [*entity_shards(base_dir), *source_files(base_dir)]
+
+
+def density(size: int, internal_edges: int) -> float:
+    """Share of the possible directed member-to-member relations present."""
+    if size < 2:
+        return 0.0
+    return internal_edges / (size * (size - 1))
+
+
+def community_stats(
+    community_id: Any,
+    size: int,
+    internal_edges: int,
+    external_edges: int,
+    top_members: Iterable[tuple[Any, int]],
+) -> dict:
+    """The response shape of a community's statistics."""
+    return {
+        "community_id": community_id,
+        "size": size,
+        "internal_edges": internal_edges,
+        "external_edges": external_edges,
+        "density": density(size, internal_edges),
+        "top_members": [
+            {"entity_id": entity_id, "degree": degree}
+            for entity_id, degree in top_members
+        ],
+    }
+
+
+@dataclass
+class CommunitySummary:
+    """Members and edge counts of one community, computed in memory."""
+
+    community_id: Any
+    members: list[Any] = field(default_factory=list)
+    internal_edges: int = 0
+    external_edges: int = 0
+    top_members: list[tuple[Any, int]] = field(default_factory=list)
+
+    def stats(self) -> dict:
+        return community_stats(
+            self.community_id,
+            len(self.members),
+            self.internal_edges,
+            self.external_edges,
+            self.top_members,
+        )
+
+
+def summarize_communities(
+    memberships: Iterable[tuple[Any, Any]],
+    edges: Iterable[tuple[Any, Any]],
+    top_k: int = TOP_MEMBERS,
+) -> dict[str, CommunitySummary]:
+    """Group entities into communities and count their edges.
+
+    Args:
+        memberships: ``(entity_id, community_id)`` pairs in shard order. When
+            an entity appears more than once, the first occurrence wins,
+            matching ``GraphReader.get_entity``. Entities without a community
+            are passed with a None community.
+        edges: ``(source_id, target_id)`` pairs, one per relation.
+        top_k: Number of highest-degree members to keep per community.
+
+    Returns:
+        dict[str, CommunitySummary]: Summaries keyed by the string form of the
+        community ID, the key ``GraphReader`` compares communities by.
+    """
+    summaries: dict[str, CommunitySummary] = {}
+    community_of: dict[str, str | None] = {}
+    for entity_id, community_id in memberships:
+        entity_key = str(entity_id)
+        if entity_key in community_of:
+            continue
+        if community_id is None:
+            community_of[entity_key] = None
+            continue
+        key = str(community_id)
+        community_of[entity_key] = key
+        summary = summaries.get(key)
+        if summary is None:
+            summary = summaries[key] = CommunitySummary(community_id)
+        summary.members.append(entity_id)
+
+    degrees: dict[str, int] = {}
+    for source, target in edges:
+        source_key, target_key = str(source), str(target)
+        degrees[source_key] = degrees.get(source_key, 0) + 1
+        degrees[target_key] = degrees.get(target_key, 0) + 1
+        source_community = community_of.get(source_key)
+        target_community = community_of.get(target_key)
+        if source_community is not None and source_community == target_community:
+            summaries[source_community].internal_edges += 1
+            continue
+        if source_community is not None:
+            summaries[source_community].external_edges += 1
+        if target_community is not None:
+            summaries[target_community].external_edges += 1
+
+    for summary in summaries.values():
+        ranked = heapq.nsmallest(
+            top_k,
+            summary.members,
+            key=lambda member: (-degrees.get(str(member), 0), str(member)),
+        )
+        summary.top_members = [
+            (member, degrees.get(str(member), 0)) for member in ranked
+        ]
+    return summaries
+
+
+def ordered_keys(summaries: dict[str, CommunitySummary]) -> dict[str, list[str]]:
+    """Community keys for each listing order: by ID, and by descending size."""
+    by_id = sorted(summaries)
+    by_size = sorted(by_id, key=lambda key: -len(summaries[key].members))
+    return {"id": by_id, "size": by_size}
+
+
+def _shard_memberships(base_dir: str) -> Iterable[tuple[int, Any]]:
+    for path in entity_shards(base_dir):
+        with open(path, "rb") as f:
+            for line in f:
+                record = json.loads(line)
+                yield (
+                    require_int(record["entity_id"]),
+                    record["properties"].get("community_id"),
+                )
+
+
+def build_community_index(base_dir: str, csr: CSRAdjacency | None = None) -> bytes:
+    """Index the communities of the graph under ``base_dir``.
+
+    Edges are read from the CSR snapshot, which is opened (and built if
+    needed) unless ``csr`` is given.
+
+    Raises:
+        ValueError: If IDs are not integers or the graph has no CSR snapshot.
+    """
+    owned = csr is None
+    if owned:
+        csr = open_csr(base_dir)
+    if csr is None:
+        raise ValueError("Community index requires the CSR adjacency snapshot")
+    try:
+        summaries = summarize_communities(
+            _shard_memberships(base_dir), csr.edge_pairs()
+        )
+    finally:
+        if owned:
+            csr.close()
+    orders = ordered_keys(summaries)
+    slots = {key: slot for slot, key in enumerate(orders["id"])}
+
+    member_offsets, member_ids = array("q", [0]), array("q")
+    internal, external = array("q"), array("q")
+    top_offsets, top_ids, top_degrees = array("q", [0]), array("q"), array("q")
+    for key in orders["id"]:
+        summary = summaries[key]
+        member_ids.extend(sorted(summary.members))
+        member_offsets.append(len(member_ids))
+        internal.append(summary.internal_edges)
+        external.append(summary.external_edges)
+        for member, degree in summary.top_members:
+            top_ids.append(member)
+            top_degrees.append(degree)
+        top_offsets.append(len(top_ids))
+    by_size = array("q", (slots[key] for key in orders["size"]))
+
+    meta = {
+        "communities": [summaries[key].community_id for key in orders["id"]],
+        "members": len(member_ids),
+        "top_members": len(top_ids),
+        "fingerprint": fingerprint(index_sources(base_dir)),
+    }
+    return pack(
+        MAGIC,
+        meta,
+        [
+            member_offsets,
+            member_ids,
+            internal,
+            external,
+            top_offsets,
+            top_ids,
+            top_degrees,
+            by_size,
+        ],
+    )
+
+
+class CommunityIndex:
+    """Constant-time community lookups over a memory-mapped index."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        meta, offset = unpack(buffer, MAGIC)
+        self.meta = meta
+        self.community_ids: list[Any] = meta["communities"]
+        self.slots = {str(c): slot for slot, c in enumerate(self.community_ids)}
+        count = len(self.community_ids)
+        self.member_offsets, offset = view(buffer, offset, count + 1, "q")
+        self.member_ids, offset = view(buffer, offset, meta["members"], "q")
+        self.internal_edges, offset = view(buffer, offset, count, "q")
+        self.external_edges, offset = view(buffer, offset, count, "q")
+        self.top_offsets, offset = view(buffer, offset, count + 1, "q")
+        self.top_ids, offset = view(buffer, offset, meta["top_members"], "q")
+        self.top_degrees, offset = view(buffer, offset, meta["top_members"], "q")
+        self.by_size, offset = view(buffer, offset, count, "q")
+
+    @classmethod
+    def load(cls, base_dir: str) -> "CommunityIndex":
+        """Map the community index of ``base_dir``.
+
+        Raises:
+            FileNotFoundError: If no index has been built.
+            StaleIndexError: If the shards changed since the index was built.
+        """
+        buffer = map_file(communities_path(base_dir))
+        meta, _ = unpack(buffer, MAGIC)
+        if meta["fingerprint"] != fingerprint(index_sources(base_dir)):
+            raise StaleIndexError("Community index is older than the shards")
+        return cls(buffer)
+
+    def __len__(self) -> int:
+        return len(self.community_ids)
+
+    def buffers(self) -> list:
+        """The mapped index file."""
+        return [self.buffer]
+
+    def close(self) -> None:
+        """Unmap the index; it must not be used afterwards."""
+        close_index(self)
+
+    def members(self, community_id: Any) -> memoryview:
+        """Sorted, zero-copy view of the member IDs of ``community_id``."""
+        slot = self.slots.get(str(community_id))
+        if slot is None:
+            return self.member_ids[0:0]
+        return self.member_ids[
+            self.member_offsets[slot] : self.member_offsets[slot + 1]
+        ]
+
+    def _stats(self, slot: int) -> dict:
+        start, end = self.top_offsets[slot], self.top_offsets[slot + 1]
+        return community_stats(
+            self.community_ids[slot],
+            self.member_offsets[slot + 1] - self.member_offsets[slot],
+            self.internal_edges[slot],
+            self.external_edges[slot],
+            zip(self.top_ids[start:end], self.top_degrees[start:end], strict=True),
+        )
+
+    def stats(self, community_id: Any) -> dict | None:
+        """Statistics of ``community_id``, or None if it has no members."""
+        slot = self.slots.get(str(community_id))
+        return None if slot is None else self._stats(slot)
+
+    def page(self, offset: int, limit: int, order: str = "id") -> list[dict]:
+        """Statistics of one page of communities, by ID or descending size."""
+        slots = range(len(self)) if order == "id" else self.by_size
+        return [self._stats(slot) for slot in slots[offset : offset + limit]]
+
+
+def open_community_index(
+    base_dir: str, csr: CSRAdjacency | None
+) -> CommunityIndex | None:
+    """Load the community index of ``base_dir``, building it if needed.
+
+    Returns None when the graph has no CSR snapshot or uses non-integer IDs,
+    in which case callers compute community data by scanning the shards.
+    """
+    if csr is None or not entity_shards(base_dir):
+        return None
+    return open_index(
+        communities_path(base_dir),
+        lambda: CommunityIndex.load(base_dir),
+        lambda: build_community_index(base_dir, csr),
+        CommunityIndex,
+    )
@@ -0,0 +1,345 @@
+"""Compressed-sparse-row adjacency snapshot.
+
+``adjacency/adjacency.jsonl`` and the relation shards are compiled into a
+single binary file holding, per source entity, a contiguous run of edges:
+
+* ``node_ids`` -- sorted source entity IDs (int64)
+* ``offsets`` -- edge range of each source, ``offsets[i]:offsets[i + 1]``
+* ``targets``, ``relation_ids`` -- per-edge target and relation IDs (int64)
+* ``record_offsets``, ``record_shards``, ``record_lengths`` -- where the full
+  relation record lives in ``relations/shard_*.jsonl``
+* ``type_codes`` -- per-edge index into the relation type table (int32)
+* ``typed_edges`` -- each source's edges again, grouped by type code
+
+The same edges are indexed by target as well, for reverse lookups:
+
+* ``in_node_ids`` -- sorted target entity IDs (int64)
+* ``in_offsets`` -- incoming edge range of each target
+* ``in_edges`` -- forward edge index of each incoming edge, grouped by type
+  code and then ordered by source ID
+
+Because both edge lists are partitioned by type, filtering a row by relation
+type bisects to the run of each wanted type instead of checking every edge.
+
+The file is memory-mapped, so topology lookups are slices over the mapping
+rather than Python lists, and full relation records are read with a single
+``pread`` per edge instead of scanning every relation shard.
+"""
+
+import glob
+import json
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from itertools import pairwise
+from typing import Any
+
+from graph_reader.schema import Relation
+
+from .files import (
+    StaleIndexError,
+    close_index,
+    fingerprint,
+    map_file,
+    open_index,
+    pack,
+    require_int,
+    unpack,
+    view,
+)
+
+MAGIC = b"GRCSR003"
+
+
+def csr_path(base_dir: str) -> str:
+    return os.path.join(base_dir, "adjacency", "adjacency.csr")
+
+
+def relation_shards(base_dir: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(base_dir, "relations", "shard_*.jsonl")))
+
+
+def source_files(base_dir: str) -> list[str]:
+    """Files a CSR snapshot is derived from."""
+    adjacency_file = os.path.join(base_dir, "adjacency", "adjacency.jsonl")
+    return [adjacency_file, *relation_shards(base_dir)]
+
+
+def _record_type(record: dict) -> str:
+    return (record.get("properties") or {}).get("type", record.get("type", "default"))
+
+
+def build_csr(base_dir: str) -> bytes:
+    """Compile the adjacency and relation shards under ``base_dir``.
+
+    Raises:
+        ValueError: If entity or relation IDs are not integers.
+    """
+    sources = source_files(base_dir)
+    adjacency: dict[int, list[int]] = {}
+    with open(sources[0], encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            adjacency[require_int(record["entity_id"])] = [
+                require_int(rel_id) for rel_id in record.get("relations", [])
+            ]
+
+    types: dict[str, int] = {}
+    locations: dict[int, tuple[int, int, int, int, int]] = {}
+    shards = sources[1:]
+    for shard_index, path in enumerate(shards):
+        with open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                record = json.loads(line)
+                type_code = types.setdefault(_record_type(record), len(types))
+                locations[require_int(record["relation_id"])] = (
+                    require_int(record["target_id"]),
+                    shard_index,
+                    offset,
+                    len(line),
+                    type_code,
+                )
+                offset += len(line)
+
+    node_ids, offsets = array("q"), array("q", [0])
+    targets, relation_ids, record_offsets = array("q"), array("q"), array("q")
+    record_shards, record_lengths, type_codes = array("i"), array("i"), array("i")
+    for source in sorted(adjacency):
+        for rel_id in adjacency[source]:
+            location = locations.get(rel_id)
+            if location is None:
+                continue
+            target, shard_index, offset, length, type_code = location
+            targets.append(target)
+            relation_ids.append(rel_id)
+            record_offsets.append(offset)
+            record_shards.append(shard_index)
+            record_lengths.append(length)
+            type_codes.append(type_code)
+        node_ids.append(source)
+        offsets.append(len(targets))
+
+    # Edges are in source order, so stable sorts keep each type's edges in
+    # adjacency order within a source and in source order within a target.
+    typed_edges = array("q")
+    for start, end in pairwise(offsets):
+        typed_edges.extend(sorted(range(start, end), key=type_codes.__getitem__))
+    in_node_ids, in_offsets = array("q"), array("q", [0])
+    in_edges = array(
+        "q",
+        sorted(range(len(targets)), key=lambda edge: (targets[edge], type_codes[edge])),
+    )
+    for position, edge in enumerate(in_edges):
+        target = targets[edge]
+        if not in_node_ids or in_node_ids[-1] != target:
+            if in_node_ids:
+                in_offsets.append(position)
+            in_node_ids.append(target)
+    if in_node_ids:
+        in_offsets.append(len(in_edges))
+
+    meta = {
+        "nodes": len(node_ids),
+        "in_nodes": len(in_node_ids),
+        "edges": len(targets),
+        "types": list(types),
+        "relation_shards": [os.path.basename(path) for path in shards],
+        "fingerprint": fingerprint(sources),
+    }
+    return pack(
+        MAGIC,
+        meta,
+        [
+            node_ids,
+            offsets,
+            targets,
+            relation_ids,
+            record_offsets,
+            in_node_ids,
+            in_offsets,
+            in_edges,
+            record_shards,
+            record_lengths,
+            type_codes,
+            typed_edges,
+        ],
+    )
+
+
+def _row(ids: memoryview, offsets: memoryview, entity_id: Any) -> tuple[int, int]:
+    if isinstance(entity_id, bool) or not isinstance(entity_id, int):
+        return 0, 0
+    i = bisect_left(ids, entity_id)
+    if i < len(ids) and ids[i] == entity_id:
+        return offsets[i], offsets[i + 1]
+    return 0, 0
+
+
+class CSRAdjacency:
+    """Read-only view over a CSR snapshot buffer."""
+
+    def __init__(self, buffer, base_dir: str):
+        self.buffer = buffer
+        meta, offset = unpack(buffer, MAGIC)
+        nodes, in_nodes, edges = meta["nodes"], meta["in_nodes"], meta["edges"]
+        self.meta = meta
+        self.types: list[str] = meta["types"]
+        self.type_codes = {name: code for code, name in enumerate(self.types)}
+        self.node_ids, offset = view(buffer, offset, nodes, "q")
+        self.offsets, offset = view(buffer, offset, nodes + 1, "q")
+        self.targets, offset = view(buffer, offset, edges, "q")
+        self.relation_ids, offset = view(buffer, offset, edges, "q")
+        self.record_offsets, offset = view(buffer, offset, edges, "q")
+        self.in_node_ids, offset = view(buffer, offset, in_nodes, "q")
+        self.in_offsets, offset = view(buffer, offset, in_nodes + 1, "q")
+        self.in_edges, offset = view(buffer, offset, edges, "q")
+        self.record_shards, offset = view(buffer, offset, edges, "i")
+        self.record_lengths, offset = view(buffer, offset, edges, "i")
+        self.edge_types, offset = view(buffer, offset, edges, "i")
+        self.typed_edges, offset = view(buffer, offset, edges, "q")
+        self._fds = [
+            os.open(os.path.join(base_dir, "relations", name), os.O_RDONLY)
+            for name in meta["relation_shards"]
+        ]
+
+    @classmethod
+    def load(cls, base_dir: str) -> "CSRAdjacency":
+        """Map the snapshot file of ``base_dir``.
+
+        Raises:
+            FileNotFoundError: If no snapshot has been built.
+            StaleIndexError: If the shards changed since the snapshot was built.
+        """
+        buffer = map_file(csr_path(base_dir))
+        meta, _ = unpack(buffer, MAGIC)
+        if meta["fingerprint"] != fingerprint(source_files(base_dir)):
+            raise StaleIndexError("CSR snapshot is older than the shards")
+        return cls(buffer, base_dir)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def row(self, entity_id: Any) -> tuple[int, int]:
+        """Return the edge range of ``entity_id`` (empty if it has no edges)."""
+        return _row(self.node_ids, self.offsets, entity_id)
+
+    def in_row(self, entity_id: Any) -> tuple[int, int]:
+        """Return the range of ``in_edges`` holding ``entity_id``'s incoming edges."""
+        return _row(self.in_node_ids, self.in_offsets, entity_id)
+
+    def degree(self, entity_id: Any) -> int:
+        start, end = self.row(entity_id)
+        return end - start
+
+    def neighbor_ids(self, entity_id: Any) -> memoryview:
+        """Zero-copy view of the target IDs of ``entity_id``'s relations."""
+        start, end = self.row(entity_id)
+        return self.targets[start:end]
+
+    def in_degree(self, entity_id: Any) -> int:
+        start, end = self.in_row(entity_id)
+        return end - start
+
+    def edges(
+        self, entity_id: Any, relation_types: set[str] | None = None
+    ) -> Iterator[int]:
+        """Yield the edge indexes of ``entity_id``, optionally filtered by type.
+
+        Unfiltered edges are in adjacency order; filtered ones are grouped by
+        type, each type in adjacency order.
+        """
+        start, end = self.row(entity_id)
+        if relation_types is None:
+            return iter(range(start, end))
+        return self._of_types(self.typed_edges, start, end, relation_types)
+
+    def incoming_edges(
+        self, entity_id: Any, relation_types: set[str] | None = None
+    ) -> Iterator[int]:
+        """Yield the indexes of the edges pointing at ``entity_id``.
+
+        Edges are grouped by type, each type ordered by source ID, and
+        optionally filtered by type.
+        """
+        start, end = self.in_row(entity_id)
+        if relation_types is None:
+            return iter(self.in_edges[start:end])
+        return self._of_types(self.in_edges, start, end, relation_types)
+
+    def _of_types(
+        self, edges: memoryview, start: int, end: int, relation_types: set[str]
+    ) -> Iterator[int]:
+        """Yield the edges of ``edges[start:end]`` with one of ``relation_types``.
+
+        The range is sorted by type code, so each type is one contiguous run
+        found by bisection.
+        """
+        codes = sorted(
+            self.type_codes[t] for t in relation_types if t in self.type_codes
+        )
+        type_of = self.edge_types.__getitem__
+        for code in codes:
+            lo = bisect_left(edges, code, start, end, key=type_of)
+            hi = bisect_right(edges, code, lo, end, key=type_of)
+            yield from edges[lo:hi]
+
+    def edge_pairs(self) -> Iterator[tuple[int, int]]:
+        """Yield the ``(source_id, target_id)`` pair of every edge."""
+        for i, source in enumerate(self.node_ids):
+            for target in self.targets[self.offsets[i] : self.offsets[i + 1]]:
+                yield source, target
+
+    def relation(self, edge: int) -> dict:
+        """Read the full relation record of ``edge`` from its shard."""
+        line = os.pread(
+            self._fds[self.record_shards[edge]],
+            self.record_lengths[edge],
+            self.record_offsets[edge],
+        )
+        return Relation(**json.loads(line)).model_dump()
+
+    def relations(
+        self, entity_id: Any, relation_types: set[str] | None = None
+    ) -> list[dict]:
+        return [self.relation(edge) for edge in self.edges(entity_id, relation_types)]
+
+    def incoming_relations(
+        self, entity_id: Any, relation_types: set[str] | None = None
+    ) -> list[dict]:
+        return [
+            self.relation(edge)
+            for edge in self.incoming_edges(entity_id, relation_types)
+        ]
+
+    def buffers(self) -> list:
+        """The mapped snapshot file."""
+        return [self.buffer]
+
+    def close(self) -> None:
+        """Close the relation shards and unmap the snapshot.
+
+        The snapshot must not be used afterwards.
+        """
+        for fd in self._fds:
+            os.close(fd)
+        self._fds = []
+        close_index(self)
+
+
+def open_csr(base_dir: str) -> CSRAdjacency | None:
+    """Load the CSR snapshot of ``base_dir``, building it if missing or stale.
+
+    Returns None when the graph has no adjacency file or cannot be represented
+    as CSR, in which case callers fall back to the JSON adjacency.
+    """
+    if not os.path.exists(source_files(base_dir)[0]):
+        return None
+    return open_index(
+        csr_path(base_dir),
+        lambda: CSRAdjacency.load(base_dir),
+        lambda: build_csr(base_dir),
+        lambda data: CSRAdjacency(data, base_dir),
+    )
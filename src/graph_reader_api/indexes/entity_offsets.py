@@ -0,0 +1,170 @@
+"""Byte-offset index over the entity shards.
+
+``entities/offsets.idx`` maps every entity ID to the shard, byte offset and
+length of its line in ``entities/shard_*.jsonl``. Both the index and the shards
+are memory-mapped, so fetching an entity is a binary search followed by
+parsing exactly one line.
+"""
+
+import glob
+import json
+import os
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import Any
+
+from .files import (
+    StaleIndexError,
+    close_index,
+    fingerprint,
+    map_file,
+    open_index,
+    pack,
+    require_int,
+    unpack,
+    view,
+)
+
+MAGIC = b"GRENT001"
+
+
+def offsets_path(base_dir: str) -> str:
+    return os.path.join(base_dir, "entities", "offsets.idx")
+
+
+def entity_shards(base_dir: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(base_dir, "entities", "shard_*.jsonl")))
+
+
+def build_entity_offsets(base_dir: str) -> bytes:
+    """Index the entity shards under ``base_dir``.
+
+    When an ID appears more than once, the first occurrence wins, matching
+    ``GraphReader.get_entity``.
+
+    Raises:
+        ValueError: If entity IDs are not integers.
+    """
+    shards = entity_shards(base_dir)
+    locations: dict[int, tuple[int, int, int]] = {}
+    for shard_index, path in enumerate(shards):
+        with open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                entity_id = require_int(json.loads(line)["entity_id"])
+                locations.setdefault(entity_id, (shard_index, offset, len(line)))
+                offset += len(line)
+
+    ids, offsets = array("q"), array("q")
+    shard_indexes, lengths = array("i"), array("i")
+    for entity_id in sorted(locations):
+        shard_index, offset, length = locations[entity_id]
+        ids.append(entity_id)
+        offsets.append(offset)
+        shard_indexes.append(shard_index)
+        lengths.append(length)
+
+    meta = {
+        "entities": len(ids),
+        "shards": [os.path.basename(path) for path in shards],
+        "fingerprint": fingerprint(shards),
+    }
+    return pack(MAGIC, meta, [ids, offsets, shard_indexes, lengths])
+
+
+class EntityOffsetIndex:
+    """Seek-based entity lookups over memory-mapped shards."""
+
+    def __init__(self, buffer, base_dir: str):
+        self.buffer = buffer
+        meta, offset = unpack(buffer, MAGIC)
+        count = meta["entities"]
+        self.meta = meta
+        self.ids, offset = view(buffer, offset, count, "q")
+        self.offsets, offset = view(buffer, offset, count, "q")
+        self.shards, offset = view(buffer, offset, count, "i")
+        self.lengths, offset = view(buffer, offset, count, "i")
+        self.shard_paths = [
+            os.path.join(base_dir, "entities", name) for name in meta["shards"]
+        ]
+        self._maps = [map_file(path) for path in self.shard_paths]
+
+    @classmethod
+    def load(cls, base_dir: str) -> "EntityOffsetIndex":
+        """Map the offset index of ``base_dir``.
+
+        Raises:
+            FileNotFoundError: If no index has been built.
+            StaleIndexError: If the shards changed since the index was built.
+        """
+        buffer = map_file(offsets_path(base_dir))
+        meta, _ = unpack(buffer, MAGIC)
+        if meta["fingerprint"] != fingerprint(entity_shards(base_dir)):
+            raise StaleIndexError("Entity offset index is older than the shards")
+        return cls(buffer, base_dir)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def buffers(self) -> list:
+        """The mapped index and shard files."""
+        return [self.buffer, *self._maps]
+
+    def close(self) -> None:
+        """Unmap the index; it must not be used afterwards."""
+        close_index(self)
+
+    def position(self, entity_id: Any) -> int | None:
+        """Return the index slot of ``entity_id``, or None if it is unknown."""
+        if isinstance(entity_id, bool) or not isinstance(entity_id, int):
+            return None
+        slot = bisect_left(self.ids, entity_id)
+        if slot < len(self.ids) and self.ids[slot] == entity_id:
+            return slot
+        return None
+
+    def _read(self, slot: int) -> dict:
+        start = self.offsets[slot]
+        return json.loads(
+            self._maps[self.shards[slot]][start : start + self.lengths[slot]]
+        )
+
+    def read(self, entity_id: Any) -> dict | None:
+        """Return the raw record of ``entity_id``, or None if it is unknown."""
+        slot = self.position(entity_id)
+        return None if slot is None else self._read(slot)
+
+    def read_many(self, entity_ids: Iterable[Any]) -> dict[Any, dict]:
+        """Return the raw records of the known IDs among ``entity_ids``.
+
+        Lookups are grouped by shard and issued in file order, so each shard
+        is visited once, front to back.
+        """
+        by_shard: dict[int, list[tuple[int, int]]] = defaultdict(list)
+        for entity_id in entity_ids:
+            slot = self.position(entity_id)
+            if slot is not None:
+                by_shard[self.shards[slot]].append((self.offsets[slot], slot))
+        records = {}
+        for shard in sorted(by_shard):
+            for _, slot in sorted(by_shard[shard]):
+                records[self.ids[slot]] = self._read(slot)
+        return records
+
+
+def open_entity_offsets(base_dir: str) -> EntityOffsetIndex | None:
+    """Load the entity offset index of ``base_dir``, building it if needed.
+
+    Returns None when the graph has no entity shards or uses non-integer IDs,
+    in which case callers fall back to scanning the shards.
+    """
+    if not entity_shards(base_dir):
+        return None
+    return open_index(
+        offsets_path(base_dir),
+        lambda: EntityOffsetIndex.load(base_dir),
+        lambda: build_entity_offsets(base_dir),
+        lambda data: EntityOffsetIndex(data, base_dir),
+    )
@@ -0,0 +1,161 @@
+"""File helpers shared by the on-disk index formats."""
+
+import contextlib
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Callable, Iterable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("<8sQ")
+
+
+class StaleIndexError(ValueError):
+    """Raised when an index file does not match the files it was built from."""
+
+
+def require_int(value: Any) -> int:
+    """Return ``value`` if it is an integer ID, else raise ``ValueError``."""
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"Binary indexes require integer IDs, got {value!r}")
+    return value
+
+
+def fingerprint(paths: Iterable[str]) -> list[list]:
+    """Describe source files by name, size and modification time.
+
+    An index records the fingerprint of the shards it was built from, so a
+    loader can tell that the shards were republished since.
+    """
+    result = []
+    for path in paths:
+        stat = os.stat(path)
+        result.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    return result
+
+
+def snapshot_version(paths: Iterable[str]) -> str:
+    """Short, stable identifier of the current contents of ``paths``.
+
+    Missing paths are ignored, so a graph without e.g. an adjacency file still
+    gets a version.
+    """
+    existing = [path for path in paths if os.path.exists(path)]
+    payload = json.dumps(fingerprint(existing)).encode()
+    return hashlib.sha1(payload, usedforsecurity=False).hexdigest()[:12]
+
+
+def pack(magic: bytes, meta: dict, arrays: Iterable) -> bytes:
+    """Serialize ``meta`` and a sequence of ``array.array`` objects.
+
+    Layout: ``magic`` (8 bytes), the metadata length, JSON metadata padded to
+    8 bytes, then the raw arrays back to back. Arrays are written in the given
+    order; callers put 8-byte arrays before 4-byte ones to keep them aligned.
+    """
+    meta_bytes = json.dumps(meta).encode()
+    meta_bytes += b" " * (-len(meta_bytes) % 8)
+    parts = [HEADER.pack(magic, len(meta_bytes)), meta_bytes]
+    parts.extend(values.tobytes() for values in arrays)
+    return b"".join(parts)
+
+
+def unpack(buffer, magic: bytes) -> tuple[dict, int]:
+    """Read the header written by :func:`pack`.
+
+    Returns:
+        tuple[dict, int]: The metadata and the offset of the first array.
+    """
+    if len(buffer) < HEADER.size:
+        raise StaleIndexError("Index file is truncated")
+    found, meta_len = HEADER.unpack_from(buffer)
+    if found != magic:
+        raise StaleIndexError(f"Unexpected index format {found!r}")
+    start = HEADER.size
+    meta = json.loads(bytes(buffer[start : start + meta_len]))
+    return meta, start + meta_len
+
+
+def view(buffer, offset: int, count: int, typecode: str) -> tuple[memoryview, int]:
+    """Return a zero-copy typed view of ``count`` items and the next offset."""
+    size = struct.calcsize(typecode) * count
+    return memoryview(buffer)[offset : offset + size].cast(typecode), offset + size
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Write ``data`` to ``path`` so readers never observe a partial file."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def map_file(path: str) -> mmap.mmap | bytes:
+    """Memory-map ``path`` read-only (empty files cannot be mapped)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def close_index(index) -> None:
+    """Release the views ``index`` holds on its mapped files, then unmap them.
+
+    Views are looked up in the attributes of ``index`` and in the dicts among
+    them. Slices of those views held elsewhere (e.g. by a response that is
+    still streaming) stay valid; their files are unmapped by the garbage
+    collector once the slices are gone. The index must not be used afterwards.
+    """
+    for value in vars(index).values():
+        for item in value.values() if isinstance(value, dict) else (value,):
+            if isinstance(item, memoryview):
+                item.release()
+    for buffer in index.buffers():
+        if isinstance(buffer, mmap.mmap):
+            with contextlib.suppress(BufferError):
+                buffer.close()
+
+
+def prefetch(buffer) -> None:
+    """Ask the kernel to read a mapped file ahead of its first use."""
+    if isinstance(buffer, mmap.mmap) and hasattr(mmap, "MADV_WILLNEED"):
+        buffer.madvise(mmap.MADV_WILLNEED)
+
+
+def open_index(
+    path: str,
+    load: Callable[[], Any],
+    build: Callable[[], bytes],
+    from_buffer: Callable[[bytes], Any],
+) -> Any | None:
+    """Load an index file, rebuilding it when it is missing or stale.
+
+    The rebuilt index is written to ``path`` when its directory is writable
+    and kept in memory otherwise. Returns None when ``build`` reports, with a
+    ``ValueError``, that the graph cannot be indexed this way.
+    """
+    try:
+        return load()
+    except (FileNotFoundError, StaleIndexError) as e:
+        logger.info("Building %s (%s)", path, e)
+    try:
+        data = build()
+    except ValueError as e:
+        logger.warning("Index %s unavailable: %s", path, e)
+        return None
+    try:
+        write_atomic(path, data)
+    except OSError as e:
+        logger.warning("Could not persist %s, keeping it in memory: %s", path, e)
+        return from_buffer(data)
+    return load()
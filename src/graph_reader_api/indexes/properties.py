@@ -0,0 +1,222 @@
+"""Inverted index over entity properties.
+
+``entities/properties.idx`` maps every property key and value to the sorted
+list of IDs of the entities carrying it (a posting list). Keys are kept in
+the metadata; the sorted values of each key (as UTF-8, whose byte order is
+the code point order) and the posting lists are memory-mapped, so an equality
+lookup is a binary search over the mapped values followed by a zero-copy
+slice, and a prefix lookup is the same over a contiguous range of values.
+Nothing but the keys is copied into the process, so worker processes serving
+the same graph share the index through the page cache.
+"""
+
+import json
+import os
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any
+
+from .entity_offsets import entity_shards
+from .files import (
+    StaleIndexError,
+    close_index,
+    fingerprint,
+    map_file,
+    open_index,
+    pack,
+    require_int,
+    unpack,
+    view,
+)
+
+MAGIC = b"GRPRP002"
+
+
+def properties_path(base_dir: str) -> str:
+    return os.path.join(base_dir, "entities", "properties.idx")
+
+
+def index_tokens(value: Any) -> list[str]:
+    """Return the index terms of a property value.
+
+    Strings are indexed as-is and other scalars by their JSON encoding (so
+    ``30`` matches the query value ``"30"`` and ``True`` matches ``"true"``).
+    Each element of a list is indexed separately; objects and nulls are not
+    indexed.
+    """
+    if isinstance(value, list):
+        return [token for item in value for token in index_tokens(item)]
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, bool | int | float):
+        return [json.dumps(value)]
+    return []
+
+
+def build_property_index(base_dir: str) -> bytes:
+    """Index the properties of the entity shards under ``base_dir``.
+
+    When an ID appears more than once, the first occurrence wins, matching
+    ``GraphReader.get_entity``.
+
+    Raises:
+        ValueError: If entity IDs are not integers.
+    """
+    shards = entity_shards(base_dir)
+    seen: set[int] = set()
+    terms: dict[str, dict[str, list[int]]] = defaultdict(lambda: defaultdict(list))
+    for path in shards:
+        with open(path, "rb") as f:
+            for line in f:
+                record = json.loads(line)
+                entity_id = require_int(record["entity_id"])
+                if entity_id in seen:
+                    continue
+                seen.add(entity_id)
+                for key, value in record["properties"].items():
+                    for token in dict.fromkeys(index_tokens(value)):
+                        terms[key][token].append(entity_id)
+
+    keys = sorted(terms)
+    term_offsets, postings = array("q", [0]), array("q")
+    value_starts, value_bytes = array("q", [0]), bytearray()
+    key_terms = []
+    for key in keys:
+        key_values = sorted(terms[key])
+        key_terms.append(len(key_values))
+        for token in key_values:
+            postings.extend(sorted(terms[key][token]))
+            term_offsets.append(len(postings))
+            value_bytes += token.encode()
+            value_starts.append(len(value_bytes))
+
+    meta = {
+        "keys": keys,
+        "key_terms": key_terms,
+        "postings": len(postings),
+        "value_bytes": len(value_bytes),
+        "fingerprint": fingerprint(shards),
+    }
+    return pack(
+        MAGIC,
+        meta,
+        [term_offsets, postings, value_starts, array("B", value_bytes)],
+    )
+
+
+class _MappedValues:
+    """Sequence of the UTF-8 encoded values stored in the index file."""
+
+    def __init__(self, starts: memoryview, data: memoryview):
+        self.starts = starts
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.starts) - 1
+
+    def __getitem__(self, term: int) -> bytes:
+        return bytes(self.data[self.starts[term] : self.starts[term + 1]])
+
+
+class PropertyIndex:
+    """Posting-list lookups over a memory-mapped inverted index."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        meta, offset = unpack(buffer, MAGIC)
+        self.meta = meta
+        self.keys: list[str] = meta["keys"]
+        self.key_starts = [0]
+        for count in meta["key_terms"]:
+            self.key_starts.append(self.key_starts[-1] + count)
+        terms = self.key_starts[-1]
+        self.term_offsets, offset = view(buffer, offset, terms + 1, "q")
+        self.posting_ids, offset = view(buffer, offset, meta["postings"], "q")
+        value_starts, offset = view(buffer, offset, terms + 1, "q")
+        value_bytes, offset = view(buffer, offset, meta["value_bytes"], "B")
+        self.values = _MappedValues(value_starts, value_bytes)
+
+    @classmethod
+    def load(cls, base_dir: str) -> "PropertyIndex":
+        """Map the property index of ``base_dir``.
+
+        Raises:
+            FileNotFoundError: If no index has been built.
+            StaleIndexError: If the shards changed since the index was built.
+        """
+        buffer = map_file(properties_path(base_dir))
+        meta, _ = unpack(buffer, MAGIC)
+        if meta["fingerprint"] != fingerprint(entity_shards(base_dir)):
+            raise StaleIndexError("Property index is older than the shards")
+        return cls(buffer)
+
+    def buffers(self) -> list:
+        """The mapped index file."""
+        return [self.buffer]
+
+    def close(self) -> None:
+        """Unmap the index; it must not be used afterwards."""
+        self.values.starts.release()
+        self.values.data.release()
+        close_index(self)
+
+    def _key_slot(self, key: str) -> int | None:
+        slot = bisect_left(self.keys, key)
+        if slot < len(self.keys) and self.keys[slot] == key:
+            return slot
+        return None
+
+    def _term_range(self, key: str, value: str, prefix: bool) -> range:
+        """Global term numbers of ``key`` equal to, or starting with, ``value``."""
+        slot = self._key_slot(key)
+        if slot is None:
+            return range(0)
+        values, encoded = self.values, value.encode()
+        first, last = self.key_starts[slot], self.key_starts[slot + 1]
+        start = bisect_left(values, encoded, first, last)
+        if prefix:
+            end = start
+            while end < last and values[end].startswith(encoded):
+                end += 1
+        else:
+            end = start + (start < last and values[start] == encoded)
+        return range(start, end)
+
+    def _postings(self, term: int) -> memoryview:
+        return self.posting_ids[self.term_offsets[term] : self.term_offsets[term + 1]]
+
+    def postings(self, key: str, value: str, prefix: bool = False) -> list:
+        """Return the posting lists of the terms matching ``key``/``value``.
+
+        An equality lookup yields at most one list; a prefix lookup yields one
+        per matching value. Each list is a sorted, zero-copy view of IDs.
+        """
+        return [self._postings(term) for term in self._term_range(key, value, prefix)]
+
+    def count(self, key: str, value: str, prefix: bool = False) -> int:
+        """Number of postings matching ``key``/``value``, without reading them.
+
+        Exact for equality; for a prefix it may count an entity once per
+        matching value of a list property.
+        """
+        terms = self._term_range(key, value, prefix)
+        if not terms:
+            return 0
+        return self.term_offsets[terms.stop] - self.term_offsets[terms.start]
+
+
+def open_property_index(base_dir: str) -> PropertyIndex | None:
+    """Load the property index of ``base_dir``, building it if needed.
+
+    Returns None when the graph has no entity shards or uses non-integer IDs,
+    in which case callers fall back to scanning the shards.
+    """
+    if not entity_shards(base_dir):
+        return None
+    return open_index(
+        properties_path(base_dir),
+        lambda: PropertyIndex.load(base_dir),
+        lambda: build_property_index(base_dir),
+        PropertyIndex,
+    )
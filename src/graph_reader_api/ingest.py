@@ -0,0 +1,348 @@
+"""Live ingestion of the update logs.
+
+The builder appends entity and relation updates to ``logs/*.jsonl`` and only
+periodically compacts them into the shards. :class:`LogTailer` follows those
+logs from the last offset it consumed, folds new records into a fresh
+:class:`~graph_reader_api.overlay.Overlay` and swaps it onto the store, so
+updates become readable within one poll interval without rebuilding anything.
+
+The overlay only lives in memory, so a tailer starts at the beginning of the
+logs and its first poll rebuilds it. Replaying updates that were already
+compacted is harmless: they are merged over the compacted records in log
+order, which yields those same records.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+from graph_reader.schema import Entity, Relation
+from pydantic import ValidationError
+
+from .async_reader import AsyncGraphReader
+from .registry import GraphRegistry
+from .store import GraphStore
+
+logger = logging.getLogger(__name__)
+
+ENTITY_LOG = "entity_updates.jsonl"
+RELATION_LOG = "relation_updates.jsonl"
+# Bytes of a log read and applied at a time, so that replaying long logs at
+# startup never holds more than about this much of them in memory.
+READ_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def parse_update_time(value: str | None) -> float | None:
+    """Convert a log ``update_time`` (ISO 8601) to a POSIX timestamp."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class LogTailer:
+    """Follow the update logs of a :class:`GraphStore` and apply new records.
+
+    Offsets are tracked per log file, starting at 0 so that the first poll
+    replays the logs (see the module docstring). A log that shrinks is treated
+    as rotated and re-read from the start, and a trailing line without a
+    newline is left for the next poll.
+
+    Args:
+        store: Store to publish overlays to.
+        clock: Wall clock used for lag reporting.
+    """
+
+    def __init__(self, store: GraphStore, clock=time.time):
+        self.store = store
+        self.log_dir = os.path.join(store.config.base_dir, "logs")
+        self._clock = clock
+        self._task: asyncio.Task | None = None
+        self.offsets: dict[str, int] = {}
+        self.polls = 0
+        self.errors = 0
+        self.applied_entities = 0
+        self.applied_relations = 0
+        self.bytes_behind = 0
+        self.last_poll: float | None = None
+        self.last_update_time: float | None = None
+
+    def _log_path(self, name: str) -> str:
+        return os.path.join(self.log_dir, name)
+
+    def _size(self, name: str) -> int:
+        try:
+            return os.path.getsize(self._log_path(name))
+        except FileNotFoundError:
+            return 0
+
+    def _read_new_records(self, name: str, size: int) -> list[dict]:
+        """Read the next complete lines of ``name`` and advance its offset.
+
+        Reads about :data:`READ_CHUNK_SIZE` bytes, or up to the end of a
+        longer line, and never beyond ``size``.
+        """
+        offset = self.offsets.get(name, 0)
+        if size < offset:
+            logger.info("%s shrank, re-reading it from the start", name)
+            offset = 0
+        if size == offset:
+            self.offsets[name] = offset
+            return []
+        chunks = []
+        remaining = size - offset
+        with open(self._log_path(name), "rb") as f:
+            f.seek(offset)
+            while remaining > 0:
+                chunk = f.read(min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                remaining -= len(chunk)
+                if b"\n" in chunk:
+                    break
+        data = b"".join(chunks)
+        complete = data[: data.rfind(b"\n") + 1]
+        self.offsets[name] = offset + len(complete)
+        records = []
+        for line in complete.splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                self.errors += 1
+                logger.warning("Skipping malformed line in %s", name)
+        return records
+
+    def _merge_entities(self, updates: list[dict]) -> tuple[list[dict], list[dict]]:
+        """Merge partial entity updates over the latest known full records.
+
+        Updates that would leave their entity invalid (for example an
+        out-of-range ``age``) are skipped and counted in :attr:`errors`, like
+        malformed lines, so they never reach the readers.
+
+        Returns:
+            tuple[list[dict], list[dict]]: The merged records and the updates
+            that were applied.
+        """
+        overlay = self.store.overlay
+        merged: dict[str, dict] = {}
+        applied = []
+        for update in updates:
+            if not isinstance(update, dict) or "entity_id" not in update:
+                self._skip("entity update without an entity_id")
+                continue
+            entity_id = update["entity_id"]
+            key = str(entity_id)
+            base = (
+                merged.get(key)
+                or overlay.entities.get(key)
+                or self.store.get_entity_record(entity_id)
+                or {"entity_id": entity_id, "properties": {}}
+            )
+            record = {
+                "entity_id": entity_id,
+                "properties": {**base["properties"], **update.get("properties", {})},
+                "last_update_time": update.get(
+                    "update_time", base.get("last_update_time")
+                ),
+            }
+            try:
+                Entity(**record)
+            except (ValidationError, TypeError):
+                self._skip(f"invalid update of entity {entity_id!r}")
+                continue
+            merged[key] = record
+            applied.append(update)
+        return list(merged.values()), applied
+
+    def _validate_relations(self, updates: list[dict]) -> tuple[list[dict], list[dict]]:
+        """Validate relation updates, skipping and counting invalid ones.
+
+        Returns:
+            tuple[list[dict], list[dict]]: The relation records and the
+            updates they were read from.
+        """
+        relations, applied = [], []
+        for update in updates:
+            try:
+                relations.append(Relation(**update).model_dump())
+            except (ValidationError, TypeError):
+                self._skip("invalid relation update")
+                continue
+            applied.append(update)
+        return relations, applied
+
+    def _skip(self, what: str) -> None:
+        self.errors += 1
+        logger.warning("Skipping %s", what)
+
+    def poll(self) -> int:
+        """Apply the records appended since the last poll.
+
+        The logs are read and applied in batches of about
+        :data:`READ_CHUNK_SIZE` bytes each, each batch published as a new
+        overlay, up to their size when the poll started.
+
+        Returns:
+            int: The number of log records applied.
+        """
+        sizes = {name: self._size(name) for name in (ENTITY_LOG, RELATION_LOG)}
+        applied = 0
+        while True:
+            consumed = dict(self.offsets)
+            try:
+                entity_updates = self._read_new_records(ENTITY_LOG, sizes[ENTITY_LOG])
+                relation_updates = self._read_new_records(
+                    RELATION_LOG, sizes[RELATION_LOG]
+                )
+                entities, entity_updates = self._merge_entities(entity_updates)
+                relations, relation_updates = self._validate_relations(relation_updates)
+            except Exception:
+                # Retry the same records on the next poll rather than lose them.
+                self.offsets = consumed
+                raise
+            if self.offsets == consumed:
+                break
+            applied += self._apply(
+                entities, relations, entity_updates, relation_updates
+            )
+        self.bytes_behind = sum(
+            max(self._size(name) - offset, 0) for name, offset in self.offsets.items()
+        )
+        self.polls += 1
+        self.last_poll = self._clock()
+        return applied
+
+    def _apply(
+        self,
+        entities: list[dict],
+        relations: list[dict],
+        entity_updates: list[dict],
+        relation_updates: list[dict],
+    ) -> int:
+        """Publish one batch of records, given the log updates they came from."""
+        updates = entity_updates + relation_updates
+        if not updates:
+            return 0
+        self.store.apply_overlay(self.store.overlay.with_updates(entities, relations))
+        self.applied_entities += len(entity_updates)
+        self.applied_relations += len(relation_updates)
+        times = [parse_update_time(record.get("update_time")) for record in updates]
+        newest = max((t for t in times if t is not None), default=None)
+        if newest is not None:
+            self.last_update_time = max(newest, self.last_update_time or newest)
+        return len(updates)
+
+    async def poll_once(self) -> None:
+        """Poll off the event loop, counting and logging failures."""
+        try:
+            await asyncio.to_thread(self.poll)
+        except Exception:
+            self.errors += 1
+            logger.exception("Log ingestion failed")
+
+    async def run(self, interval: float) -> None:
+        """Poll every ``interval`` seconds until cancelled."""
+        while True:
+            await self.poll_once()
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float) -> None:
+        """Start polling in a background task on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def cancel(self) -> None:
+        """Stop polling without waiting for a poll in progress to finish."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        """Ingestion progress, including how far reads trail the logs.
+
+        ``lag_seconds`` is the time since the newest applied update was
+        written, or None before any update has been applied.
+        """
+        lag = None
+        if self.last_update_time is not None:
+            lag = max(self._clock() - self.last_update_time, 0.0)
+        return {
+            "enabled": True,
+            "overlay_seq": self.store.overlay.seq,
+            "overlay_entities": len(self.store.overlay.entities),
+            "overlay_relations": len(self.store.overlay.relations),
+            "applied_entities": self.applied_entities,
+            "applied_relations": self.applied_relations,
+            "lag_seconds": lag,
+            "bytes_behind": self.bytes_behind,
+            "polls": self.polls,
+            "errors": self.errors,
+            "last_poll": self.last_poll,
+        }
+
+
+class IngestionManager:
+    """The :class:`LogTailer` of every graph ``registry`` has open.
+
+    Graphs opened by the registry replay their logs before they serve
+    requests, then follow them until the registry closes them.
+
+    Args:
+        registry: The graphs to follow.
+        interval: Seconds between polls.
+    """
+
+    def __init__(self, registry: GraphRegistry, interval: float):
+        self.interval = interval
+        self.default = registry.default
+        self.tailers: dict[str, LogTailer] = {}
+        registry.on_open = self._on_open
+        registry.on_close = self.detach
+
+    async def _on_open(self, name: str, reader: AsyncGraphReader) -> None:
+        await self.attach(name, reader.reader)
+
+    async def attach(self, name: str, store: GraphStore) -> None:
+        """Replay the logs of graph ``name`` into ``store``, then follow them.
+
+        Does nothing if the graph is followed already.
+        """
+        if name in self.tailers:
+            return
+        tailer = self.tailers[name] = LogTailer(store)
+        await tailer.poll_once()
+        # The graph may have been closed during the replay.
+        if self.tailers.get(name) is tailer:
+            tailer.start(self.interval)
+
+    def detach(self, name: str) -> None:
+        """Stop following the logs of graph ``name``, e.g. once it is closed."""
+        tailer = self.tailers.pop(name, None)
+        if tailer is not None:
+            tailer.cancel()
+
+    async def stop(self) -> None:
+        tailers, self.tailers = list(self.tailers.values()), {}
+        for tailer in tailers:
+            await tailer.stop()
+
+    def stats(self) -> dict:
+        """Progress of the default graph, and of every graph under ``graphs``."""
+        graphs = {name: tailer.stats() for name, tailer in self.tailers.items()}
+        return {**graphs.get(self.default, {"enabled": True}), "graphs": graphs}
@@ -0,0 +1,561 @@
+"""Request and reader metrics in the Prometheus text format.
+
+The service exposes a small, dependency-free set of instruments: per-route
+latency and response size histograms, in-flight requests, per-method reader
+call durations, and gauges sampled at scrape time (reader queue depth, cache
+hit ratios). Each app owns its own :class:`Metrics`, so test apps do not share
+counts.
+
+Every request also gets a ``Server-Timing`` header splitting its time into
+``auth``, ``reader`` and ``serialize`` phases. Phases are accumulated in a
+per-request :class:`RequestTimings` held in a context variable, which the
+authentication dependency and the reader facade write to.
+"""
+
+import abc
+import bisect
+import contextvars
+import functools
+import inspect
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+SIZE_BUCKETS = tuple(float(4**i) for i in range(4, 13))  # 256 B .. 16 MiB
+SERVER_TIMING_PHASES = ("auth", "reader", "serialize")
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels) -> str:
+    # An empty label is the same as none to Prometheus, so leave it out.
+    labels = tuple((name, value) for name, value in labels if value)
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> Labels:
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    @abc.abstractmethod
+    def samples(self) -> Iterator[tuple[str, Labels, float]]:
+        """Yield the (sample name, labels, value) of each exported sample."""
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[str, Labels, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, key, value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (non-cumulative) + overflow, sum]
+        self._values: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[slot] += 1
+            total[0] += value
+
+    def count(self, **labels: Any) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterator[tuple[str, Labels, float]]:
+        with self._lock:
+            items = [
+                (key, list(counts), total[0])
+                for key, (counts, total) in self._values.items()
+            ]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    (*key, ("le", _format_value(bound))),
+                    cumulative,
+                )
+            yield f"{self.name}_sum", key, total
+            yield f"{self.name}_count", key, cumulative
+
+
+class CallbackMetric(_Metric):
+    """Counter or gauge whose samples are read from ``callback`` at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[tuple[dict[str, Any], float]]],
+        labelnames: Iterable[str] = (),
+        type: str = "gauge",
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.type = type
+
+    def samples(self) -> Iterator[tuple[str, Labels, float]]:
+        for labels, value in self.callback():
+            yield self.name, self._key(labels), value
+
+
+class MetricsRegistry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self):
+        self.metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> Any:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class RequestTimings:
+    """Time spent in each phase of one request, in seconds."""
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+        self.handler_end: float | None = None
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        parts = [
+            f"{phase};dur={self.phases[phase] * 1000:.2f}"
+            for phase in SERVER_TIMING_PHASES
+            if phase in self.phases
+        ]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current_timings: contextvars.ContextVar[RequestTimings | None] = (
+    contextvars.ContextVar("request_timings", default=None)
+)
+
+
+@contextmanager
+def request_phase(phase: str) -> Iterator[None]:
+    """Add the time spent in the block to ``phase`` of the current request."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - started)
+
+
+def _mark_handler_end() -> None:
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.handler_end = time.perf_counter()
+
+
+def timed_endpoint(endpoint: Callable) -> Callable:
+    """Wrap ``endpoint`` so the time it returns is recorded for the request.
+
+    Whatever happens between that point and the start of the response
+    (validation and encoding of the return value) is reported as the
+    ``serialize`` phase.
+    """
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_handler_end()
+
+    else:
+
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _mark_handler_end()
+
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """``APIRoute`` that records when its endpoint returns.
+
+    Use as ``APIRouter(route_class=TimedRoute)``.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        super().__init__(path, self.wrap_endpoint(endpoint), **kwargs)
+
+    @staticmethod
+    def wrap_endpoint(endpoint: Callable) -> Callable:
+        """The endpoint the route actually calls."""
+        return timed_endpoint(endpoint)
+
+
+class Metrics:
+    """The instruments of one app instance."""
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        register = self.registry.register
+        self.requests = register(
+            Counter(
+                "http_requests_total",
+                "HTTP requests by route and status.",
+                ("method", "route", "status"),
+            )
+        )
+        self.request_duration = register(
+            Histogram(
+                "http_request_duration_seconds",
+                "Time until the response is fully sent, by route.",
+                ("method", "route"),
+            )
+        )
+        self.in_flight = register(
+            Gauge("http_requests_in_flight", "Requests currently being served.")
+        )
+        self.response_size = register(
+            Histogram(
+                "http_response_size_bytes",
+                "Response body size, by route.",
+                ("route",),
+                SIZE_BUCKETS,
+            )
+        )
+        self.reader_duration = register(
+            Histogram(
+                "graph_reader_call_duration_seconds",
+                "Execution time of graph reader calls on the pool, by graph "
+                "and method.",
+                ("graph", "method"),
+            )
+        )
+        self.reader_rejections = register(
+            Counter(
+                "graph_reader_rejections_total",
+                "Reader calls rejected or abandoned, by graph and reason.",
+                ("graph", "reason"),
+            )
+        )
+        self.admission_rejections = register(
+            Counter(
+                "http_admission_rejections_total",
+                "Requests refused by admission control, by reason (rate, "
+                "concurrency or overload).",
+                ("reason",),
+            )
+        )
+        self.reader_coalesced = register(
+            Counter(
+                "graph_reader_coalesced_total",
+                "Reader calls that joined an identical call already in flight "
+                "instead of running, by graph and method.",
+                ("graph", "method"),
+            )
+        )
+
+    def add_callback(self, metric: CallbackMetric) -> None:
+        """Register a metric sampled from its callback at scrape time."""
+        self.registry.register(metric)
+
+    def observe_reader_call(self, graph: str, method: str, seconds: float) -> None:
+        self.reader_duration.observe(seconds, graph=graph, method=method)
+
+    def observe_coalesced_call(self, graph: str, method: str) -> None:
+        self.reader_coalesced.inc(graph=graph, method=method)
+
+    def observe_reader_rejection(self, graph: str, reason: str) -> None:
+        self.reader_rejections.inc(graph=graph, reason=reason)
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+def route_label(scope: Scope) -> str:
+    """Route template of a request, so label cardinality stays bounded."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path is not None else "unmatched"
+
+
+class MetricsMiddleware:
+    """Record per-route request metrics and add a ``Server-Timing`` header.
+
+    Pure ASGI, so it measures streamed responses up to their last chunk.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                status = message["status"]
+                if timings.handler_end is not None:
+                    timings.add("serialize", now - timings.handler_end)
+                header = timings.server_timing(now - started)
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", header.encode()),
+                ]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            self.metrics.in_flight.dec()
+            _current_timings.reset(token)
+            route = route_label(scope)
+            method = scope["method"]
+            self.metrics.requests.inc(method=method, route=route, status=status)
+            self.metrics.request_duration.observe(
+                time.perf_counter() - started, method=method, route=route
+            )
+            self.metrics.response_size.observe(size, route=route)
+
+
+def add_app_collectors(metrics: Metrics, state: Any) -> None:
+    """Sample the readers, caches and log ingestion of an app at scrape time.
+
+    Series about a graph carry a ``graph`` label, for every graph the registry
+    has open.
+
+    Args:
+        metrics: Instruments to register the collectors with.
+        state: The app's ``state``, holding ``registry``, ``auth_cache`` and
+            ``ingest``.
+    """
+
+    def reader_pending():
+        for graph, reader in state.registry.open_readers():
+            yield {"graph": graph}, reader.pending
+
+    def store_caches():
+        # Only loaded graphs are listed, so no graph is loaded just to report
+        # on it.
+        for graph, reader in state.registry.open_readers():
+            for name, cache in reader.reader.caches.items():
+                yield {"cache": name, "graph": graph}, cache.stats()
+
+    def cache_lookups():
+        for labels, stats in store_caches():
+            yield {**labels, "result": "hit"}, stats["hits"]
+            yield {**labels, "result": "miss"}, stats["misses"]
+        auth = state.auth_cache.stats()
+        auth_labels = {"cache": "auth", "graph": ""}
+        yield {**auth_labels, "result": "hit"}, auth["hits"] + auth["negative_hits"]
+        yield {**auth_labels, "result": "miss"}, auth["misses"]
+
+    def cache_hit_ratio():
+        lookups: dict[tuple[str, str], dict[str, float]] = {}
+        for labels, value in cache_lookups():
+            key = labels["cache"], labels["graph"]
+            lookups.setdefault(key, {})[labels["result"]] = value
+        for (cache, graph), counts in lookups.items():
+            total = counts["hit"] + counts["miss"]
+            ratio = counts["hit"] / total if total else 0.0
+            yield {"cache": cache, "graph": graph}, ratio
+
+    def cache_evictions():
+        for labels, stats in store_caches():
+            yield labels, stats["evictions"]
+
+    def cache_bytes():
+        for labels, stats in store_caches():
+            yield labels, stats["bytes"]
+
+    def ingest_lag():
+        if state.ingest is not None:
+            for graph, stats in state.ingest.stats()["graphs"].items():
+                if stats["lag_seconds"] is not None:
+                    yield {"graph": graph}, stats["lag_seconds"]
+
+    def graphs_open():
+        yield {}, sum(graph["open"] for graph in state.registry.stats())
+
+    def graphs_memory():
+        yield {}, state.registry.memory_used
+
+    def graph_loads():
+        yield {}, state.registry.loads
+
+    def graph_evictions():
+        yield {}, state.registry.evictions
+
+    for metric in (
+        CallbackMetric(
+            "graph_reader_pending",
+            "Reader calls running or queued on the pool.",
+            reader_pending,
+            ("graph",),
+        ),
+        CallbackMetric(
+            "cache_lookups_total",
+            "Cache lookups by cache and result.",
+            cache_lookups,
+            ("cache", "graph", "result"),
+            type="counter",
+        ),
+        CallbackMetric(
+            "cache_hit_ratio",
+            "Fraction of cache lookups that hit, since startup.",
+            cache_hit_ratio,
+            ("cache", "graph"),
+        ),
+        CallbackMetric(
+            "cache_evictions_total",
+            "Entries evicted from, or refused by, the graph store caches.",
+            cache_evictions,
+            ("cache", "graph"),
+            type="counter",
+        ),
+        CallbackMetric(
+            "cache_bytes",
+            "Estimated bytes held by the graph store caches.",
+            cache_bytes,
+            ("cache", "graph"),
+        ),
+        CallbackMetric(
+            "ingest_lag_seconds",
+            "Time since the newest applied log update was written.",
+            ingest_lag,
+            ("graph",),
+        ),
+        CallbackMetric(
+            "graphs_open",
+            "Graphs currently loaded by the registry.",
+            graphs_open,
+        ),
+        CallbackMetric(
+            "graphs_memory_bytes",
+            "Estimated memory held by the loaded graphs.",
+            graphs_memory,
+        ),
+        CallbackMetric(
+            "graph_loads_total",
+            "Graphs loaded by the registry.",
+            graph_loads,
+            type="counter",
+        ),
+        CallbackMetric(
+            "graph_evictions_total",
+            "Graphs closed to stay within the memory budget.",
+            graph_evictions,
+            type="counter",
+        ),
+    ):
+        metrics.add_callback(metric)
@@ -0,0 +1,120 @@
+"""Read view of log updates not yet compacted into the shards."""
+
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Overlay:
+    """Entity and relation updates layered over the compacted shards.
+
+    An overlay is never mutated once published: :meth:`with_updates` returns a
+    new one, which the store swaps in with a single attribute assignment. A
+    reader that grabbed the previous overlay keeps a consistent view for the
+    rest of its call.
+
+    IDs are keyed by ``str(id)``, like ``GraphReader``'s own caches.
+
+    Attributes:
+        seq: Number of update batches applied since the shards were loaded.
+        entities: Full raw entity records, with the logged properties merged
+            over the compacted ones.
+        relations: Validated relation records, as ``get_neighbors`` returns.
+        outgoing: IDs of the relations the overlay added, keyed by source ID.
+        incoming: IDs of the relations the overlay added, keyed by target ID.
+        sources: IDs of the entities any overlay relation, added or updated,
+            starts at. Relations of other entities read from the shards are
+            served as they are. Updates are assumed to keep a relation's
+            endpoints, as the log records carry only the new ones.
+        targets: Like ``sources``, for the entities relations point at.
+    """
+
+    seq: int = 0
+    entities: Mapping[str, dict] = field(default_factory=dict)
+    relations: Mapping[str, dict] = field(default_factory=dict)
+    outgoing: Mapping[str, tuple[str, ...]] = field(default_factory=dict)
+    incoming: Mapping[str, tuple[str, ...]] = field(default_factory=dict)
+    sources: frozenset[str] = frozenset()
+    targets: frozenset[str] = frozenset()
+
+    def with_updates(self, entities: Iterable[dict], relations: Iterable[dict]):
+        """Return a new overlay with the given records applied."""
+        new_entities = dict(self.entities)
+        for record in entities:
+            new_entities[str(record["entity_id"])] = record
+        new_relations = dict(self.relations)
+        outgoing = dict(self.outgoing)
+        incoming = dict(self.incoming)
+        sources = set(self.sources)
+        targets = set(self.targets)
+        for record in relations:
+            key = str(record["relation_id"])
+            source = str(record["source_id"])
+            target = str(record["target_id"])
+            if key not in new_relations:
+                outgoing[source] = (*outgoing.get(source, ()), key)
+                incoming[target] = (*incoming.get(target, ()), key)
+            sources.add(source)
+            targets.add(target)
+            new_relations[key] = record
+        return Overlay(
+            self.seq + 1,
+            new_entities,
+            new_relations,
+            outgoing,
+            incoming,
+            frozenset(sources),
+            frozenset(targets),
+        )
+
+    def touches_outgoing(self, source: Any) -> bool:
+        """Whether the overlay adds or updates relations starting at ``source``."""
+        return str(source) in self.sources
+
+    def touches_incoming(self, target: Any) -> bool:
+        """Whether the overlay adds or updates relations pointing at ``target``."""
+        return str(target) in self.targets
+
+    def merge_relations(self, source: Any, base: list[dict]) -> list[dict]:
+        """Apply overlay updates and additions to ``source``'s base relations.
+
+        Args:
+            source: ID of the source entity.
+            base: Validated relation records read from the shards.
+
+        Returns:
+            list[dict]: ``base`` with updated records substituted and the
+            overlay's new relations appended.
+        """
+        return self._merge(base, self.outgoing.get(str(source), ()))
+
+    def merge_incoming(self, target: Any, base: list[dict]) -> list[dict]:
+        """Like :meth:`merge_relations`, for the relations pointing at ``target``."""
+        return self._merge(base, self.incoming.get(str(target), ()))
+
+    def _merge(self, base: list[dict], added: tuple[str, ...]) -> list[dict]:
+        if not self.relations:
+            return base
+        merged = [self.relations.get(str(r["relation_id"]), r) for r in base]
+        seen = {str(r["relation_id"]) for r in base}
+        merged.extend(self.relations[key] for key in added if key not in seen)
+        return merged
+
+    def filter_entities(
+        self, base_ids: Iterable[Any], matches: Callable[[dict], bool]
+    ) -> Iterator[Any]:
+        """Correct an entity-ID result set computed from the shards.
+
+        IDs the overlay changed are dropped from ``base_ids`` and re-added only
+        if their updated properties satisfy ``matches``.
+        """
+        if not self.entities:
+            yield from base_ids
+            return
+        for entity_id in base_ids:
+            if str(entity_id) not in self.entities:
+                yield entity_id
+        for record in self.entities.values():
+            if matches(record["properties"]):
+                yield record["entity_id"]
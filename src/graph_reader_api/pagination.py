@@ -0,0 +1,116 @@
+"""Cursor pagination and NDJSON streaming helpers for list endpoints."""
+
+import base64
+import binascii
+import contextlib
+import itertools
+import json
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from .serialization import encode
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MAX_PAGE_SIZE = 10000
+
+
+def encode_cursor(offset: int) -> str:
+    """Encode a result offset as an opaque cursor."""
+    payload = json.dumps({"offset": offset}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> int:
+    """Decode a cursor produced by :func:`encode_cursor`.
+
+    Args:
+        cursor: Cursor sent by the client, or None for the first page.
+
+    Returns:
+        int: Number of results to skip.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    if cursor is None:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded))["offset"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+
+def take_page(items: Iterable[Any], offset: int, limit: int) -> tuple[list, int | None]:
+    """Take one page from an iterable without materializing the rest.
+
+    Returns:
+        tuple[list, int | None]: The page and the offset of the next page, or
+        None when the iterable is exhausted.
+    """
+    page = list(itertools.islice(items, offset, offset + limit + 1))
+    if len(page) > limit:
+        return page[:limit], offset + limit
+    return page, None
+
+
+def page_cursor(next_offset: int | None) -> str | None:
+    """Return the cursor for ``next_offset``, or None on the last page."""
+    return None if next_offset is None else encode_cursor(next_offset)
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Return True if the client asked for an NDJSON stream."""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+@dataclass
+class PageParams:
+    """Pagination parameters shared by list endpoints."""
+
+    offset: int
+    limit: int | None
+    stream: bool
+
+    @property
+    def paginated(self) -> bool:
+        return self.limit is not None or self.offset > 0
+
+
+def page_params(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+) -> PageParams:
+    """Dependency that parses ``limit``/``cursor`` and the ``Accept`` header."""
+    return PageParams(decode_cursor(cursor), limit, wants_ndjson(request))
+
+
+def ndjson_response(
+    items: AsyncIterator[Any], field: str, page: PageParams
+) -> StreamingResponse:
+    """Stream ``items`` as NDJSON, one ``{field: item}`` document per line.
+
+    When ``limit`` cuts the stream short, the last line is
+    ``{"next_cursor": ...}`` so the client can resume from there.
+    """
+
+    async def lines():
+        count = 0
+        async with contextlib.aclosing(items):
+            async for item in items:
+                if count == page.limit:
+                    cursor = encode_cursor(page.offset + count)
+                    yield encode({"next_cursor": cursor}) + b"\n"
+                    break
+                count += 1
+                yield encode({field: item}) + b"\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
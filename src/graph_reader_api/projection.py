@@ -0,0 +1,90 @@
+"""Property projection and entity expansion.
+
+``fields=name,type`` limits the properties returned for each entity: the
+projection is built from the requested keys alone, so large property maps
+are never copied into the response. ``expand=entity`` resolves the entities
+that list endpoints (neighbors, community members) refer to by ID, with one
+batched read per call instead of one lookup per ID.
+"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from fastapi import Depends, Query
+
+from .store import GraphStore
+
+Expand = Literal["entity"]
+
+
+def field_projection(
+    fields: str | None = Query(
+        None, description="Comma-separated properties to return, e.g. name,type"
+    ),
+) -> frozenset[str] | None:
+    """Dependency that parses ``fields`` into the set of properties to keep."""
+    if fields is None:
+        return None
+    return frozenset(name.strip() for name in fields.split(",") if name.strip())
+
+
+def project(entity: dict | None, fields: frozenset[str] | None) -> dict | None:
+    """``entity`` with only the properties in ``fields`` (all if None)."""
+    if entity is None or fields is None:
+        return entity
+    properties = entity["properties"]
+    return {
+        **entity,
+        "properties": {key: properties[key] for key in fields if key in properties},
+    }
+
+
+def resolve_entities(
+    store: GraphStore, entity_ids: Iterable[Any], fields: frozenset[str] | None
+) -> list[dict | None]:
+    """Projected entities of ``entity_ids``, in order; None for unknown IDs."""
+    entity_ids = list(entity_ids)
+    found, _ = store.get_entities(entity_ids)
+    return [project(found.get(entity_id), fields) for entity_id in entity_ids]
+
+
+def attach_entities(
+    store: GraphStore,
+    entity_id: Any,
+    relations: list[dict],
+    fields: frozenset[str] | None,
+) -> list[dict]:
+    """``relations`` of ``entity_id``, each with the ``entity`` at its other end.
+
+    That is the target of outgoing relations and the source of incoming ones.
+    """
+    others = resolve_entities(
+        store,
+        (
+            r["source_id"] if r["target_id"] == entity_id else r["target_id"]
+            for r in relations
+        ),
+        fields,
+    )
+    return [
+        {**relation, "entity": other}
+        for relation, other in zip(relations, others, strict=True)
+    ]
+
+
+@dataclass(frozen=True)
+class Expansion:
+    """Resolve referenced entities, keeping ``fields`` (all if None)."""
+
+    fields: frozenset[str] | None = None
+
+
+def entity_expansion(
+    expand: Expand | None = Query(
+        None, description="`entity` to return the referenced entities"
+    ),
+    fields: frozenset[str] | None = Depends(field_projection),
+) -> Expansion | None:
+    """Dependency for ``expand=entity`` and the ``fields`` of its entities."""
+    return Expansion(fields) if expand == "entity" else None
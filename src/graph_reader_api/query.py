@@ -0,0 +1,113 @@
+"""Multi-predicate property queries.
+
+A :class:`PropertyQuery` combines equality and prefix predicates with AND or
+OR. With a :class:`~graph_reader_api.indexes.properties.PropertyIndex` it is
+answered from sorted posting lists: an AND intersects them starting from the
+most selective predicate, so the work is bounded by the smallest list rather
+than by the number of entities.
+"""
+
+import heapq
+from bisect import bisect_left
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Literal
+
+from .indexes.properties import PropertyIndex, index_tokens
+
+PREFIX_MARKER = "^"
+
+
+@dataclass(frozen=True)
+class Predicate:
+    """``key`` equals ``value``, or starts with it when ``prefix`` is set."""
+
+    key: str
+    value: str
+    prefix: bool = False
+
+    def matches(self, properties: dict) -> bool:
+        tokens = index_tokens(properties.get(self.key))
+        if self.prefix:
+            return any(token.startswith(self.value) for token in tokens)
+        return self.value in tokens
+
+
+def parse_predicate(text: str) -> Predicate:
+    """Parse ``key:value`` (equality) or ``key:^value`` (prefix).
+
+    Raises:
+        ValueError: If ``text`` has no ``:`` or an empty key.
+    """
+    key, sep, value = text.partition(":")
+    if not sep or not key:
+        raise ValueError(f"Invalid predicate {text!r}, expected key:value")
+    if value.startswith(PREFIX_MARKER):
+        return Predicate(key, value[len(PREFIX_MARKER) :], prefix=True)
+    return Predicate(key, value)
+
+
+@dataclass(frozen=True)
+class PropertyQuery:
+    """Predicates combined with ``"and"`` (all match) or ``"or"`` (any)."""
+
+    predicates: tuple[Predicate, ...]
+    op: Literal["and", "or"] = "and"
+
+    def matches(self, properties: dict) -> bool:
+        combine = all if self.op == "and" else any
+        return combine(predicate.matches(properties) for predicate in self.predicates)
+
+
+def intersect(small: Sequence[int], large: Sequence[int]) -> list[int]:
+    """Intersect two sorted ID lists by binary-searching ``large``.
+
+    Costs O(len(small) * log(len(large))), and the search window only moves
+    forward, so it stays cheap when ``large`` is much bigger than ``small``.
+    """
+    result = []
+    lo = 0
+    for entity_id in small:
+        lo = bisect_left(large, entity_id, lo)
+        if lo == len(large):
+            break
+        if large[lo] == entity_id:
+            result.append(entity_id)
+    return result
+
+
+def union(lists: Iterable[Sequence[int]]) -> list[int]:
+    """Merge sorted ID lists into one sorted list without duplicates."""
+    result: list[int] = []
+    for entity_id in heapq.merge(*lists):
+        if not result or result[-1] != entity_id:
+            result.append(entity_id)
+    return result
+
+
+def evaluate(index: PropertyIndex, query: PropertyQuery) -> list[int]:
+    """Answer ``query`` from ``index``.
+
+    Returns:
+        list[int]: Matching entity IDs in ascending order.
+    """
+
+    def postings(predicate: Predicate) -> Sequence[int]:
+        lists = index.postings(predicate.key, predicate.value, predicate.prefix)
+        return lists[0] if len(lists) == 1 else union(lists)
+
+    if query.op == "or":
+        return union(postings(predicate) for predicate in query.predicates)
+
+    ordered = sorted(
+        query.predicates, key=lambda p: index.count(p.key, p.value, p.prefix)
+    )
+    result: list[int] | None = None
+    for predicate in ordered:
+        if result is None:
+            result = list(postings(predicate))
+        else:
+            result = intersect(result, postings(predicate))
+        if not result:
+            return []
+    return result or []
@@ -0,0 +1,222 @@
+"""Registry of the knowledge graphs served by one process.
+
+Requests pick a graph by name, either with the ``/graphs/{graph}`` path
+prefix or with the ``X-Graph`` header; requests that name none are served
+from the default graph. Graphs are opened on first use, each behind its own
+:class:`AsyncGraphReader`, and when their estimated memory (see
+:meth:`GraphStore.footprint`) exceeds the budget, the least recently used
+idle graphs are closed again, releasing their files. The default graph is
+never closed.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+from fastapi import HTTPException, Request
+
+from .async_reader import AsyncGraphReader
+
+logger = logging.getLogger(__name__)
+
+GRAPH_HEADER = "X-Graph"
+GRAPH_PREFIX = "/graphs/{graph}"
+
+
+class UnknownGraphError(LookupError):
+    """Raised when a request names a graph that is not configured."""
+
+
+class GraphRegistry:
+    """Open graphs lazily and keep their estimated memory within a budget.
+
+    Args:
+        graphs: Base directory of every graph, by name.
+        open_reader: Creates the (not yet loaded) reader of a graph, given its
+            name and base directory.
+        default: Name of the graph used when a request names none.
+        memory_budget: Estimated bytes the open graphs may hold; None keeps
+            every graph open once loaded.
+    """
+
+    def __init__(
+        self,
+        graphs: dict[str, str],
+        open_reader: Callable[[str, str], AsyncGraphReader],
+        default: str,
+        memory_budget: int | None = None,
+    ):
+        if default not in graphs:
+            raise ValueError(f"Default graph {default!r} is not configured")
+        self.graphs = graphs
+        self.open_reader = open_reader
+        self.default = default
+        self.memory_budget = memory_budget
+        # Least recently used first.
+        self._readers: OrderedDict[str, AsyncGraphReader] = OrderedDict()
+        self._footprints: dict[str, int] = {}
+        # Graphs being loaded, see _open().
+        self._opening: dict[str, asyncio.Future] = {}
+        # Requests using each reader, see lease(); never evicted while > 0.
+        self._leases: dict[AsyncGraphReader, int] = {}
+        self.loads = 0
+        self.evictions = 0
+        # Called with the name and reader of each graph once it is loaded,
+        # before requests are served from it, and with the name of each graph
+        # that is closed; see graph_reader_api.ingest.
+        self.on_open: Callable[[str, AsyncGraphReader], Awaitable[None]] | None = None
+        self.on_close: Callable[[str], None] | None = None
+        self._readers[default] = open_reader(default, graphs[default])
+
+    @property
+    def default_reader(self) -> AsyncGraphReader:
+        return self._readers[self.default]
+
+    @property
+    def memory_used(self) -> int:
+        """Estimated bytes held by the loaded graphs."""
+        return sum(self._footprints.values())
+
+    def is_open(self, name: str) -> bool:
+        reader = self._readers.get(name)
+        return reader is not None and reader.loaded
+
+    async def acquire(self, name: str | None = None) -> AsyncGraphReader:
+        """The reader of graph ``name`` (default graph if None), loaded.
+
+        Loading runs off the event loop; concurrent requests for a graph that
+        is still loading wait for the same load.
+
+        Raises:
+            UnknownGraphError: If ``name`` is not a configured graph.
+        """
+        name = name or self.default
+        reader = self._readers.get(name)
+        if reader is None:
+            if name not in self.graphs:
+                raise UnknownGraphError(f"Graph {name!r} not found")
+            reader = self._readers[name] = self.open_reader(name, self.graphs[name])
+        self._readers.move_to_end(name)
+        if name not in self._footprints:
+            opening = self._opening.get(name)
+            if opening is None:
+                opening = self._opening[name] = asyncio.ensure_future(
+                    self._open(name, reader)
+                )
+            await asyncio.shield(opening)
+        # Also retried on later requests, in case busy graphs were skipped.
+        self._evict(keep=name)
+        return reader
+
+    async def lease(self, name: str | None = None) -> AsyncGraphReader:
+        """Like :meth:`acquire`, but keep the graph open until :meth:`release`.
+
+        Requests hold a lease for as long as they use a reader, including
+        between reader calls and while streaming, which ``pending`` does not
+        cover.
+        """
+        reader = await self.acquire(name)
+        self._leases[reader] = self._leases.get(reader, 0) + 1
+        return reader
+
+    def release(self, reader: AsyncGraphReader) -> None:
+        """Give back a lease taken with :meth:`lease`."""
+        if self._leases[reader] == 1:
+            del self._leases[reader]
+        else:
+            self._leases[reader] -= 1
+
+    async def _open(self, name: str, reader: AsyncGraphReader) -> None:
+        """Load graph ``name`` and run :attr:`on_open`, once for all requests."""
+        try:
+            if not reader.loaded:
+                await asyncio.to_thread(reader.load)
+            if self.on_open is not None:
+                await self.on_open(name, reader)
+            if self._readers.get(name) is reader:
+                self._footprints[name] = reader.reader.footprint()
+                self.loads += 1
+                logger.info("Opened graph %s (~%d bytes)", name, self._footprints[name])
+        finally:
+            del self._opening[name]
+
+    def open_readers(self) -> list[tuple[str, AsyncGraphReader]]:
+        """The name and reader of every loaded graph."""
+        return [(name, r) for name, r in self._readers.items() if r.loaded]
+
+    def _evict(self, keep: str) -> None:
+        """Close least recently used graphs until the budget is met.
+
+        Leased graphs and graphs with reader calls in flight are skipped, so
+        evicting never cancels a request; the budget may be exceeded until
+        they are idle.
+        """
+        if self.memory_budget is None:
+            return
+        for name in list(self._readers):
+            if self.memory_used <= self.memory_budget:
+                return
+            reader = self._readers[name]
+            if (
+                name in (keep, self.default)
+                or name in self._opening
+                or not reader.loaded
+                or reader.pending
+                or reader in self._leases
+            ):
+                continue
+            del self._readers[name]
+            self._footprints.pop(name, None)
+            if self.on_close is not None:
+                self.on_close(name)
+            reader.close()
+            self.evictions += 1
+            logger.info("Closed graph %s to stay within the memory budget", name)
+        if self.memory_used > self.memory_budget:
+            logger.warning(
+                "Open graphs use ~%d bytes, over the budget of %d",
+                self.memory_used,
+                self.memory_budget,
+            )
+
+    def stats(self) -> list[dict]:
+        """Every configured graph, with whether it is open and its footprint."""
+        return [
+            {
+                "name": name,
+                "default": name == self.default,
+                "open": self.is_open(name),
+                "footprint_bytes": self._footprints.get(name),
+            }
+            for name in sorted(self.graphs)
+        ]
+
+    def close(self) -> None:
+        """Shut down the reader pools and close the stores of every open graph.
+
+        Graphs are opened again (and :attr:`on_open` run again) on next use.
+        """
+        for reader in self._readers.values():
+            reader.close()
+        self._footprints.clear()
+
+
+async def current_reader(request: Request) -> AsyncIterator[AsyncGraphReader]:
+    """Dependency resolving the reader of the graph a request names.
+
+    The ``graph`` path parameter (from :data:`GRAPH_PREFIX`) takes precedence
+    over the :data:`GRAPH_HEADER` header. The graph is leased until the
+    response has been sent, streamed responses included, so it is not closed
+    under the request.
+    """
+    registry: GraphRegistry = request.app.state.registry
+    name = request.path_params.get("graph") or request.headers.get(GRAPH_HEADER)
+    try:
+        reader = await registry.lease(name)
+    except UnknownGraphError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    try:
+        yield reader
+    finally:
+        registry.release(reader)
@@ -1,13 +1,86 @@
-from apikey.dependencies import get_current_user
-from fastapi import APIRouter, Depends
-from graph_reader.reader import GraphReader
+from typing import Literal
 
+from fastapi import APIRouter, Depends, HTTPException, Query
 
-def init_router(reader: GraphReader) -> APIRouter:
-    router = APIRouter(prefix="/community", tags=["community"])
+from ..async_reader import AsyncGraphReader
+from ..auth.dependencies import get_current_user
+from ..caching import conditional_get
+from ..pagination import (
+    MAX_PAGE_SIZE,
+    PageParams,
+    decode_cursor,
+    ndjson_response,
+    page_cursor,
+    page_params,
+)
+from ..projection import Expansion, entity_expansion
+from ..registry import current_reader
+from ..serialization import GraphRoute
+
+DEFAULT_COMMUNITY_PAGE = 100
+
+
+def init_router() -> APIRouter:
+    router = APIRouter(
+        prefix="/community",
+        tags=["community"],
+        dependencies=[Depends(conditional_get)],
+        route_class=GraphRoute,
+    )
+
+    @router.get("")
+    async def list_communities(
+        order: Literal["id", "size"] = "id",
+        limit: int = Query(DEFAULT_COMMUNITY_PAGE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: str | None = Query(None),
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
+    ):
+        communities, next_offset, total = await reader.list_communities(
+            decode_cursor(cursor), limit, order
+        )
+        return {
+            "communities": communities,
+            "total": total,
+            "next_cursor": page_cursor(next_offset),
+        }
+
+    @router.get("/{community_id}/stats")
+    async def get_community_stats(
+        community_id: str,
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
+    ):
+        stats = await reader.community_stats(community_id)
+        if stats is None:
+            raise HTTPException(status_code=404, detail="Community not found")
+        return stats
 
     @router.get("/{community_id}/members")
-    async def get_community_members(community_id: str, user=Depends(get_current_user)):
-        return {"members": reader.get_community_members(community_id)}
+    async def get_community_members(
+        community_id: str,
+        page: PageParams = Depends(page_params),
+        expansion: Expansion | None = Depends(entity_expansion),
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
+    ):
+        if page.stream:
+            if expansion is not None:
+                entities = reader.iter_community_member_entities(
+                    community_id, page.offset, expansion.fields
+                )
+                return ndjson_response(entities, "entity", page)
+            members = reader.iter_community_members(community_id, page.offset)
+            return ndjson_response(members, "entity_id", page)
+        if not page.paginated:
+            members = await reader.get_community_members(community_id)
+            next_offset = None
+        else:
+            members, next_offset = await reader.get_community_members_page(
+                community_id, page.offset, page.limit or MAX_PAGE_SIZE
+            )
+        if expansion is not None:
+            members = await reader.resolve_entities(members, expansion.fields)
+        return {"members": members, "next_cursor": page_cursor(next_offset)}
 
     return router
@@ -1,25 +1,149 @@
-from apikey.dependencies import get_current_user
-from fastapi import APIRouter, Depends, HTTPException
-from graph_reader.reader import GraphReader
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
 
+from ..async_reader import AsyncGraphReader
+from ..auth.dependencies import get_current_user
+from ..caching import conditional_get
+from ..config import APIConfig
+from ..context import ContextQuery
+from ..pagination import PageParams, page_cursor, page_params
+from ..projection import Expansion, entity_expansion, field_projection
+from ..registry import current_reader
+from ..serialization import GraphRoute
+from ..store import Direction, NeighborQuery
+from ..traversal import TraversalBudget
 
-def init_router(reader: GraphReader) -> APIRouter:
-    router = APIRouter(prefix="/entity", tags=["entity"])
+MAX_BATCH_SIZE = 1000
+
+
+class EntityBatchRequest(BaseModel):
+    entity_ids: list[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+def neighbor_query(
+    entity_id: int,
+    direction: Direction = Query(
+        "out", description="`out`, `in`, or `both` (outgoing first)"
+    ),
+    relation_type: list[str] | None = Query(None),
+) -> NeighborQuery:
+    """Dependency for the entity, ``direction`` and ``relation_type`` filter."""
+    relation_types = frozenset(relation_type) if relation_type else None
+    return NeighborQuery(entity_id, direction, relation_types)
+
+
+def init_router(config: APIConfig) -> APIRouter:
+    router = APIRouter(
+        prefix="/entity",
+        tags=["entity"],
+        dependencies=[Depends(conditional_get)],
+        route_class=GraphRoute,
+    )
+
+    @router.post("/batch")
+    async def get_entities(
+        request: EntityBatchRequest,
+        fields: frozenset[str] | None = Depends(field_projection),
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
+    ):
+        entities, missing = await reader.get_entities(request.entity_ids, fields)
+        return {"entities": entities, "missing": missing}
 
     @router.get("/{entity_id}")
-    async def get_entity(entity_id: int, user=Depends(get_current_user)):
-        entity = reader.get_entity(entity_id)
+    async def get_entity(
+        entity_id: int,
+        fields: frozenset[str] | None = Depends(field_projection),
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
+    ):
+        entity = await reader.get_entity(entity_id, fields)
         if not entity:
             raise HTTPException(status_code=404, detail="Entity not found")
         return entity
 
     @router.get("/{entity_id}/neighbors")
-    async def get_neighbors(entity_id: int, user=Depends(get_current_user)):
-        return {"neighbors": reader.get_neighbors(entity_id)}
+    async def get_neighbors(
+        query: NeighborQuery = Depends(neighbor_query),
+        page: PageParams = Depends(page_params),
+        expansion: Expansion | None = Depends(entity_expansion),
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
+    ):
+        neighbors, next_offset = await reader.get_neighbor_page(
+            query, page.offset, page.limit
+        )
+        if expansion is not None:
+            neighbors = await reader.attach_entities(
+                query.entity_id, neighbors, expansion.fields
+            )
+        return {"neighbors": neighbors, "next_cursor": page_cursor(next_offset)}
+
+    def subgraph_budget(
+        depth: int = Query(2, ge=1, le=config.subgraph_max_depth),
+        max_nodes: int = Query(100, ge=1, le=config.subgraph_max_nodes),
+    ) -> TraversalBudget:
+        return TraversalBudget(depth, max_nodes, config.subgraph_time_budget)
+
+    @router.get("/{entity_id}/subgraph")
+    async def get_subgraph(
+        entity_id: int,
+        budget: TraversalBudget = Depends(subgraph_budget),
+        relation_type: list[str] | None = Query(None),
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
+    ):
+        relation_types = set(relation_type) if relation_type else None
+        return await reader.subgraph(entity_id, budget, relation_types)
+
+    @router.get("/{entity_id}/centrality")
+    async def get_centrality(
+        entity_id: int,
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
+    ):
+        try:
+            centrality = await reader.get_centrality(entity_id)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+        if centrality is None:
+            raise HTTPException(status_code=404, detail="Entity not found")
+        return centrality
+
+    @router.get("/{entity_id}/context")
+    async def get_entity_context(
+        entity_id: int,
+        max_tokens: int = Query(
+            config.context_default_tokens, ge=1, le=config.context_max_tokens
+        ),
+        property: list[str] | None = Query(None),
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
+    ):
+        """Get an entity with its community and neighbors in one call.
+
+        Returns the entity, its community statistics, and its neighbors in
+        both directions with their ``property`` values (by default ``name``
+        and ``type``) and the relations linking them. Neighbors are ordered by
+        relevance (number of linking relations, then PageRank) and added until
+        the response would exceed about ``max_tokens`` tokens; ``truncated``
+        tells whether some were left out.
+        """
+        properties = tuple(property or config.context_properties)
+        result = await reader.entity_context(
+            ContextQuery(entity_id, max_tokens, properties)
+        )
+        if result is None:
+            raise HTTPException(status_code=404, detail="Entity not found")
+        return result
 
     @router.get("/{entity_id}/community")
-    async def get_entity_community(entity_id: int, user=Depends(get_current_user)):
-        community_id = reader.get_entity_community(entity_id)
+    async def get_entity_community(
+        entity_id: int,
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
+    ):
+        community_id = await reader.get_entity_community(entity_id)
         if not community_id:
             raise HTTPException(status_code=404, detail="Community not found")
         return {"community_id": community_id}
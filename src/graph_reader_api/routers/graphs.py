@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+
+from ..auth.dependencies import get_current_user
+from ..registry import GraphRegistry
+from ..serialization import GraphRoute
+
+
+def init_router(registry: GraphRegistry) -> APIRouter:
+    router = APIRouter(prefix="/graphs", tags=["graphs"], route_class=GraphRoute)
+
+    @router.get("")
+    async def list_graphs(user=Depends(get_current_user)):
+        """List the graphs this service can serve, and which are open."""
+        return {
+            "graphs": registry.stats(),
+            "memory_used": registry.memory_used,
+            "memory_budget": registry.memory_budget,
+        }
+
+    return router
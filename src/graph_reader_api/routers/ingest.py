@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Request
+
+from ..auth.dependencies import get_current_user
+from ..serialization import GraphRoute
+
+
+def init_router() -> APIRouter:
+    router = APIRouter(prefix="/ingest", tags=["ingest"], route_class=GraphRoute)
+
+    @router.get("/status")
+    async def ingest_status(request: Request, user=Depends(get_current_user)):
+        """Report log ingestion progress and lag.
+
+        The default graph's progress is reported at the top level, and that of
+        every open graph under ``graphs``.
+        """
+        ingestion = request.app.state.ingest
+        if ingestion is None:
+            return {"enabled": False}
+        return ingestion.stats()
+
+    return router
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, Query
+
+from ..async_reader import AsyncGraphReader
+from ..auth.dependencies import get_current_user
+from ..caching import conditional_get
+from ..config import APIConfig
+from ..registry import current_reader
+from ..serialization import GraphRoute
+from ..traversal import PathQuery, TraversalBudget
+
+
+def init_router(config: APIConfig) -> APIRouter:
+    router = APIRouter(
+        prefix="/path",
+        tags=["path"],
+        dependencies=[Depends(conditional_get)],
+        route_class=GraphRoute,
+    )
+
+    def path_query(
+        source: int,
+        target: int,
+        k: int = Query(1, ge=1, le=config.path_max_k),
+        relation_type: list[str] | None = Query(None),
+    ) -> PathQuery:
+        relation_types = frozenset(relation_type) if relation_type else None
+        return PathQuery(source, target, k, relation_types)
+
+    def path_budget(
+        max_depth: int = Query(4, ge=1, le=config.path_max_depth),
+        max_nodes: int = Query(config.path_max_nodes, ge=1, le=config.path_max_nodes),
+    ) -> TraversalBudget:
+        return TraversalBudget(max_depth, max_nodes, config.path_time_budget)
+
+    @router.get("")
+    async def get_paths(
+        query: PathQuery = Depends(path_query),
+        budget: TraversalBudget = Depends(path_budget),
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
+    ):
+        return await reader.shortest_paths(query, budget)
+
+    return router
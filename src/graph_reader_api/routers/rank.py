@@ -0,0 +1,38 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ..async_reader import AsyncGraphReader
+from ..auth.dependencies import get_current_user
+from ..caching import conditional_get
+from ..registry import current_reader
+from ..serialization import GraphRoute
+
+MAX_RANK_SIZE = 1000
+
+Metric = Literal["degree", "in_degree", "out_degree", "pagerank", "betweenness"]
+
+
+def init_router() -> APIRouter:
+    router = APIRouter(
+        prefix="/rank",
+        tags=["rank"],
+        dependencies=[Depends(conditional_get)],
+        route_class=GraphRoute,
+    )
+
+    @router.get("")
+    async def rank_entities(
+        metric: Metric = "pagerank",
+        k: int = Query(10, ge=1, le=MAX_RANK_SIZE),
+        community_id: str | None = None,
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
+    ):
+        try:
+            entities = await reader.rank_entities(metric, k, community_id)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+        return {"metric": metric, "community_id": community_id, "entities": entities}
+
+    return router
@@ -1,16 +1,84 @@
-from apikey.dependencies import get_current_user
-from fastapi import APIRouter, Depends, Query
-from graph_reader.reader import GraphReader
+from typing import Literal
 
+from fastapi import APIRouter, Depends, HTTPException, Query
 
-def init_router(reader: GraphReader) -> APIRouter:
-    router = APIRouter(tags=["search"])
+from ..async_reader import AsyncGraphReader
+from ..auth.dependencies import get_current_user
+from ..caching import conditional_get
+from ..pagination import (
+    MAX_PAGE_SIZE,
+    PageParams,
+    ndjson_response,
+    page_cursor,
+    page_params,
+    take_page,
+)
+from ..query import PropertyQuery, parse_predicate
+from ..registry import current_reader
+from ..serialization import GraphRoute
+
+MAX_PREDICATES = 32
+
+
+def init_router() -> APIRouter:
+    router = APIRouter(
+        tags=["search"],
+        dependencies=[Depends(conditional_get)],
+        route_class=GraphRoute,
+    )
 
     @router.get("/search")
     async def search_by_property(
-        key: str = Query(...), value: str = Query(...), user=Depends(get_current_user)
+        key: str = Query(...),
+        value: str = Query(...),
+        page: PageParams = Depends(page_params),
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
     ):
-        matches = reader.search_by_property(key, value)
-        return {"entity_ids": matches}
+        if page.stream:
+            matches = reader.iter_search_by_property(key, value, page.offset)
+            return ndjson_response(matches, "entity_id", page)
+        if not page.paginated:
+            matches = await reader.search_by_property(key, value)
+            return {"entity_ids": matches, "next_cursor": None}
+        matches, next_offset = await reader.search_by_property_page(
+            key, value, page.offset, page.limit or MAX_PAGE_SIZE
+        )
+        return {"entity_ids": matches, "next_cursor": page_cursor(next_offset)}
+
+    def property_query(
+        where: list[str] = Query(..., min_length=1, max_length=MAX_PREDICATES),
+        op: Literal["and", "or"] = Query("and"),
+    ) -> PropertyQuery:
+        try:
+            return PropertyQuery(tuple(parse_predicate(w) for w in where), op)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    @router.get("/search/query")
+    async def query_properties(
+        query: PropertyQuery = Depends(property_query),
+        count_only: bool = Query(False),
+        page: PageParams = Depends(page_params),
+        user=Depends(get_current_user),
+        reader: AsyncGraphReader = Depends(current_reader),
+    ):
+        """Find entities matching several property predicates.
+
+        Each ``where`` is ``key:value`` for equality or ``key:^value`` for a
+        prefix match; ``op`` combines them. Results are entity IDs in
+        ascending order, with the total ``count``.
+        """
+        matches = await reader.query_properties(query)
+        if count_only:
+            return {"count": len(matches)}
+        entity_ids, next_offset = take_page(
+            matches, page.offset, page.limit or MAX_PAGE_SIZE
+        )
+        return {
+            "entity_ids": entity_ids,
+            "count": len(matches),
+            "next_cursor": page_cursor(next_offset),
+        }
 
     return router
@@ -0,0 +1,113 @@
+"""Serve the API from several worker processes sharing one graph snapshot.
+
+The read-only structures of a graph (CSR adjacency, entity offsets, the
+property and community indexes and centrality scores) are files that every
+worker memory-maps, so their pages live once in the page cache however many
+workers serve them. The parent process preloads the graph before starting
+the workers: it builds the index files that are missing or stale and pages
+them in, so workers start without rebuilding anything and each adds only its
+caches and the app's own objects::
+
+    python -m graph_reader_api.serve resources/kg --workers 4
+
+Caches, the ingested log overlay and admission limits are per worker.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+
+import uvicorn
+from apikey.db import init_db
+from fastapi import FastAPI
+from graph_reader.config import GraphReaderConfig
+
+from .app import create_app
+from .config import APIConfig
+from .store import GraphStore
+
+# Environment variables passing the graph to the worker processes.
+BASE_DIR_ENV = "GRAPH_READER_BASE_DIR"
+INDEXER_ENV = "GRAPH_READER_INDEXER"
+
+logger = logging.getLogger(__name__)
+
+
+def preload(base_dir: str, indexer_type: str = "memory") -> GraphStore:
+    """Build the missing or stale index files of ``base_dir`` and page them in.
+
+    Returns:
+        GraphStore: A store over the preloaded files.
+    """
+    store = GraphStore(GraphReaderConfig(base_dir=base_dir, indexer_type=indexer_type))
+    store.prefetch_indexes()
+    return store
+
+
+def private_memory(pid: int | str = "self") -> int | None:
+    """Bytes of memory only process ``pid`` holds, or None if unknown.
+
+    That is the anonymous memory of ``/proc/<pid>/smaps_rollup`` (Linux): the
+    mapped index pages are left out, since they belong to the page cache and
+    are shared with every other process mapping the same files.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("Anonymous:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def create_worker_app() -> FastAPI:
+    """App factory run by each worker, for the graph given by :func:`main`."""
+    return create_app(
+        config=APIConfig(
+            base_dir=os.environ[BASE_DIR_ENV],
+            indexer_type=os.environ.get(INDEXER_ENV, "memory"),
+            # Created by main() before the workers start.
+            init_auth_db=False,
+        )
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base_dir", help="Knowledge graph directory")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("WEB_CONCURRENCY", "1")),
+        help="Worker processes (default: $WEB_CONCURRENCY or 1)",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--indexer-type", default="memory")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    store = preload(args.base_dir, args.indexer_type)
+    logger.info(
+        "Preloaded %s (%.1f MiB mapped and shared by the workers)",
+        args.base_dir,
+        store.mapped_bytes() / 2**20,
+    )
+    # Create the auth tables once, rather than racing to in every worker.
+    asyncio.run(init_db())
+
+    os.environ[BASE_DIR_ENV] = args.base_dir
+    os.environ[INDEXER_ENV] = args.indexer_type
+    uvicorn.run(
+        "graph_reader_api.serve:create_worker_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
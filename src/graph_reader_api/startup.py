@@ -0,0 +1,95 @@
+"""Startup phases: graph loading, warmup and readiness.
+
+Creating the app only wires routes together; the graph is loaded by the
+lifespan, and an optional warmup then pages the indexes in and fills the
+entity cache with the configured hot entities. ``/ready`` only passes once
+warmup has finished, while ``/health`` reports liveness from the start.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from .async_reader import AsyncGraphReader
+from .config import APIConfig
+from .store import GraphStore
+
+logger = logging.getLogger(__name__)
+
+WARMUP_CHUNK_SIZE = 256
+
+
+class StartupState:
+    """Readiness flag and per-phase durations of one app instance."""
+
+    def __init__(self):
+        self.ready = False
+        self.timings: dict[str, float] = {}
+        self.error: str | None = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a startup phase and log its duration."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - started, 4)
+            logger.info("Startup phase %s took %.3fs", name, self.timings[name])
+
+    def status(self) -> dict:
+        status = "ready" if self.ready else "failed" if self.error else "starting"
+        result: dict[str, Any] = {"status": status, "timings": self.timings}
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+async def warmup(reader: AsyncGraphReader, hot_entities: list[Any]) -> None:
+    """Prefetch the indexes and load ``hot_entities`` into the entity cache.
+
+    The work is split into chunks that run concurrently on the reader pool,
+    at most one per worker so warmup never trips the admission limit. The
+    neighbor lists of the hot entities are read as well, which pages in the
+    parts of the adjacency snapshot they use.
+    """
+    store = reader.reader
+    slots = asyncio.Semaphore(reader.max_workers)
+
+    async def bounded(func, *args) -> None:
+        async with slots:
+            await reader.run(func, *args)
+
+    chunks = [
+        hot_entities[i : i + WARMUP_CHUNK_SIZE]
+        for i in range(0, len(hot_entities), WARMUP_CHUNK_SIZE)
+    ]
+    await asyncio.gather(
+        bounded(store.prefetch_indexes),
+        *(bounded(_warm_entities, store, chunk) for chunk in chunks),
+    )
+
+
+def _warm_entities(store: GraphStore, entity_ids: list[Any]) -> None:
+    store.get_entities(entity_ids)
+    for entity_id in entity_ids:
+        store.get_neighbors(entity_id)
+
+
+async def run_warmup(
+    reader: AsyncGraphReader, state: StartupState, config: APIConfig
+) -> None:
+    """Run the warmup phase, if enabled, then mark the app ready."""
+    try:
+        if config.warmup:
+            with state.phase("warmup"):
+                await warmup(reader, config.warmup_entities)
+    except Exception as e:
+        state.error = str(e) or type(e).__name__
+        logger.exception("Warmup failed")
+        return
+    state.ready = True
+    logger.info("Ready after %.3fs", sum(state.timings.values()))
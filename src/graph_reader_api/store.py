@@ -0,0 +1,783 @@
+"""Graph store used by the API.
+
+:class:`GraphStore` extends ``GraphReader`` with the bulk read paths the
+routers need, while keeping the record shapes ``GraphReader`` returns.
+"""
+
+import glob
+import json
+import os
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from itertools import chain, islice
+from typing import Any, Literal
+
+from graph_reader.indexers import get_indexer
+from graph_reader.indexers.memory_indexer import MemoryIndexer
+from graph_reader.indexers.search_expression import (
+    SearchCondition,
+    SearchExpressionEvaluator,
+    SearchOperator,
+)
+from graph_reader.reader import GraphReader
+from graph_reader.schema import Entity, Relation
+
+from .cache import CacheBudgets, TinyLFUCache
+from .indexes.centrality import CentralityIndex, open_centrality
+from .indexes.communities import (
+    CommunityIndex,
+    CommunitySummary,
+    open_community_index,
+    ordered_keys,
+    summarize_communities,
+)
+from .indexes.csr import CSRAdjacency, open_csr
+from .indexes.entity_offsets import EntityOffsetIndex, open_entity_offsets
+from .indexes.files import prefetch, snapshot_version
+from .indexes.properties import PropertyIndex, open_property_index
+from .overlay import Overlay
+from .pagination import take_page
+from .query import Predicate, PropertyQuery, evaluate
+
+# Property index candidates whose records are read at once by /search.
+VERIFY_BATCH_SIZE = 256
+
+# Relations of an entity to read: outgoing, incoming, or both (outgoing first).
+Direction = Literal["out", "in", "both"]
+
+
+@dataclass(frozen=True)
+class NeighborQuery:
+    """Relations of one entity to read, by direction and type."""
+
+    entity_id: Any
+    direction: Direction = "out"
+    # Only relations of these types when given.
+    relation_types: frozenset[str] | None = None
+
+    @property
+    def outgoing(self) -> bool:
+        return self.direction != "in"
+
+    @property
+    def incoming(self) -> bool:
+        return self.direction != "out"
+
+
+def relation_type(relation: dict) -> str:
+    """Return the type of a relation record.
+
+    Builders commonly store the type in ``properties["type"]``; fall back to
+    the top-level ``type`` field otherwise.
+    """
+    return relation["properties"].get("type", relation["type"])
+
+
+def _merge_overlay(
+    result: dict[Any, list[dict]],
+    merge: Callable[[Any, list[dict]], list[dict]],
+    relation_types: set[str] | None,
+) -> dict[Any, list[dict]]:
+    # An update may change a relation's type, so filter after merging.
+    for entity_id, relations in result.items():
+        result[entity_id] = [
+            relation
+            for relation in merge(entity_id, relations)
+            if not relation_types or relation_type(relation) in relation_types
+        ]
+    return result
+
+
+class GraphStore(GraphReader):
+    """``GraphReader`` with bulk entity and relation reads.
+
+    When the graph uses integer IDs, adjacency is served from a memory-mapped
+    CSR snapshot (see :mod:`graph_reader_api.indexes.csr`) instead of the
+    ``adjacency_map`` dictionary ``GraphReader`` builds from JSON, and entities
+    are fetched by seeking through a byte-offset index
+    (see :mod:`graph_reader_api.indexes.entity_offsets`) instead of scanning
+    the shards. Multi-predicate property queries are answered from an inverted
+    index (see :mod:`graph_reader_api.indexes.properties`), and community
+    members and statistics from a community index
+    (see :mod:`graph_reader_api.indexes.communities`). Centrality scores are
+    read from the output of the offline job in
+    :mod:`graph_reader_api.centrality`, when it has been run.
+
+    Entities, the neighbor lists read from the CSR snapshot and search
+    results are cached in byte-budgeted W-TinyLFU caches (see
+    :mod:`graph_reader_api.cache`), named in :attr:`caches`.
+
+    Updates ingested from the logs since the shards were compacted live in
+    :attr:`overlay` (see :mod:`graph_reader_api.ingest`). Every read path
+    takes the overlay once per call and applies it over the shard data.
+    """
+
+    def __init__(self, config, cache_budgets: CacheBudgets | None = None):
+        self.csr: CSRAdjacency | None = None
+        self.overlay = Overlay()
+        # Community statistics computed by scanning, when there is no index.
+        self._community_summaries: dict[str, CommunitySummary] | None = None
+        # Set up what ``GraphReader.__init__`` does, except for the indexer:
+        # the in-memory one copies every entity's properties into each worker
+        # process, so it is only built if a search cannot use the property
+        # index (see :attr:`indexer`).
+        self.config = config
+        self._indexer = None
+        self._indexer_lock = threading.Lock()
+        self.entity_files = sorted(
+            glob.glob(os.path.join(config.base_dir, "entities", "shard_*.jsonl"))
+        )
+        self.relation_files = sorted(
+            glob.glob(os.path.join(config.base_dir, "relations", "shard_*.jsonl"))
+        )
+        self.adjacency_file = os.path.join(
+            config.base_dir, "adjacency", "adjacency.jsonl"
+        )
+        self.adjacency_map = self._load_adjacency()
+        budgets = cache_budgets or CacheBudgets()
+        self.entity_cache = TinyLFUCache(budgets.entities)
+        # Unfiltered relation lists by ("out" | "in", entity ID).
+        self.neighbor_cache = TinyLFUCache(budgets.neighbors)
+        # Search result ID lists, keyed with the overlay sequence number so
+        # ingested updates are never answered from stale results.
+        self.search_cache = TinyLFUCache(budgets.search)
+        self.caches = {
+            "entity": self.entity_cache,
+            "neighbors": self.neighbor_cache,
+            "search": self.search_cache,
+        }
+        self.entity_index: EntityOffsetIndex | None = open_entity_offsets(
+            config.base_dir
+        )
+        self.property_index: PropertyIndex | None = open_property_index(config.base_dir)
+        self.community_index: CommunityIndex | None = open_community_index(
+            config.base_dir, self.csr
+        )
+        self.centrality: CentralityIndex | None = open_centrality(config.base_dir)
+        # Identifies the published shards; changes whenever the builder
+        # republishes.
+        self.base_version = snapshot_version(
+            [*self.entity_files, *self.relation_files, self.adjacency_file]
+        )
+
+    @property
+    def indexer(self):
+        """The ``graph_reader`` search indexer, built on first use."""
+        if self._indexer is None:
+            with self._indexer_lock:
+                if self._indexer is None:
+                    self._indexer = get_indexer(
+                        self.config.indexer_type, self.config.base_dir
+                    )
+        return self._indexer
+
+    @property
+    def version(self) -> str:
+        """Version of the data served, used to derive HTTP ETags.
+
+        Combines the shard snapshot with the number of overlay updates, so it
+        changes whenever either does.
+        """
+        seq = self.overlay.seq
+        return f"{self.base_version}.{seq}" if seq else self.base_version
+
+    def _indexes(self) -> Iterator:
+        for index in (
+            self.csr,
+            self.entity_index,
+            self.property_index,
+            self.community_index,
+            self.centrality,
+        ):
+            if index is not None:
+                yield index
+
+    def _index_buffers(self) -> Iterator:
+        for index in self._indexes():
+            yield from index.buffers()
+
+    def close(self) -> None:
+        """Unmap the indexes and close the files they hold open.
+
+        The store must not be used afterwards.
+        """
+        for index in self._indexes():
+            index.close()
+
+    def prefetch_indexes(self) -> None:
+        """Start paging the memory-mapped indexes in ahead of first use."""
+        for buffer in self._index_buffers():
+            prefetch(buffer)
+
+    def mapped_bytes(self) -> int:
+        """Bytes of the memory-mapped indexes.
+
+        They are shared through the page cache by every process serving the
+        graph rather than held by each.
+        """
+        return sum(len(buffer) for buffer in self._index_buffers())
+
+    def footprint(self) -> int:
+        """Estimated memory the store can hold, in bytes.
+
+        The mapped indexes count in full, and the shards stand in for the
+        structures ``GraphReader`` builds from them (the in-memory indexer, the
+        adjacency map and the entity cache), which grow with their size.
+        """
+        shards = [*self.entity_files, *self.relation_files, self.adjacency_file]
+        return self.mapped_bytes() + sum(
+            os.path.getsize(path) for path in shards if os.path.exists(path)
+        )
+
+    def apply_overlay(self, overlay: Overlay) -> None:
+        """Publish ``overlay`` to subsequent reads."""
+        self.overlay = overlay
+
+    def get_entity_record(self, entity_id: Any) -> dict | None:
+        """Return the raw shard record of ``entity_id``, ignoring the overlay."""
+        key = self._make_hashable(entity_id)
+        return next(iter(self._read_entity_records({key: entity_id})), None)
+
+    def _load_adjacency(self):
+        self.csr = open_csr(self.config.base_dir)
+        if self.csr is not None:
+            return {}
+        return super()._load_adjacency()
+
+    def _cache_entity(self, entity_id: str, record: dict) -> None:
+        self.entity_cache.put(entity_id, record)
+
+    def get_entity(self, entity_id: Any) -> dict | None:
+        key = self._make_hashable(entity_id)
+        # Overlay records shadow the cache, so cached shard records of
+        # updated entities never need invalidating.
+        record = self.overlay.entities.get(key)
+        if record is not None:
+            return Entity(**record).model_dump()
+        cached = self.entity_cache.get(key)
+        if cached is not None:
+            return cached
+        if self.entity_index is None:
+            return super().get_entity(entity_id)
+        record = self.entity_index.read(entity_id)
+        if record is None:
+            return None
+        entity = Entity(**record).model_dump()
+        self._cache_entity(key, entity)
+        return entity
+
+    def get_neighbors(self, entity_id: Any) -> list[dict]:
+        overlay = self.overlay
+        if self.csr is not None:
+            relations = self._csr_relations("out", entity_id)
+        else:
+            relations = super().get_neighbors(entity_id)
+        return overlay.merge_relations(entity_id, relations)
+
+    def get_entities(self, entity_ids: Iterable[Any]) -> tuple[dict, list]:
+        """Get many entities, reading each entity shard at most once.
+
+        With the offset index, lookups are grouped by shard and read in file
+        order; without it, each shard is scanned once until every ID is found.
+
+        Args:
+            entity_ids: Identifiers of the entities to fetch. Duplicates are
+                ignored.
+
+        Returns:
+            tuple[dict, list]: A mapping of entity ID to entity data for the
+            entities found, and the list of requested IDs that were not found,
+            in request order.
+        """
+        overlay = self.overlay
+        requested = list(dict.fromkeys(entity_ids))
+        wanted: dict[str, Any] = {}
+        found: dict[Any, dict] = {}
+        for entity_id in requested:
+            key = self._make_hashable(entity_id)
+            record = overlay.entities.get(key)
+            if record is not None:
+                found[entity_id] = Entity(**record).model_dump()
+                continue
+            cached = self.entity_cache.get(key)
+            if cached is not None:
+                found[entity_id] = cached
+            else:
+                wanted[key] = entity_id
+
+        for record in self._read_entity_records(wanted):
+            key = self._make_hashable(record["entity_id"])
+            entity = Entity(**record).model_dump()
+            self._cache_entity(key, entity)
+            found[wanted.pop(key)] = entity
+
+        missing = [entity_id for entity_id in requested if entity_id not in found]
+        return found, missing
+
+    def _read_entity_records(self, wanted: dict[str, Any]) -> Iterator[dict]:
+        """Yield the raw records of ``wanted`` (hashable key -> entity ID)."""
+        if self.entity_index is not None:
+            yield from self.entity_index.read_many(list(wanted.values())).values()
+            return
+        remaining = set(wanted)
+        for file in self.entity_files:
+            if not remaining:
+                return
+            with open(file, encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    key = self._make_hashable(record["entity_id"])
+                    if key in remaining:
+                        remaining.discard(key)
+                        yield record
+                        if not remaining:
+                            return
+
+    def get_relations(
+        self, entity_ids: Iterable[Any], relation_types: set[str] | None = None
+    ) -> dict[Any, list[dict]]:
+        """Get the outgoing relations of many entities in one pass.
+
+        Args:
+            entity_ids: Identifiers of the source entities.
+            relation_types: Only return relations of these types when given.
+
+        Returns:
+            dict[Any, list[dict]]: Relation records keyed by source entity ID.
+            Every requested ID is present, with an empty list when it has no
+            relations.
+        """
+        overlay = self.overlay
+        return self._with_overlay(
+            entity_ids,
+            relation_types,
+            self._get_base_relations,
+            overlay.merge_relations,
+            overlay.touches_outgoing,
+        )
+
+    def get_incoming_relations(
+        self, entity_ids: Iterable[Any], relation_types: set[str] | None = None
+    ) -> dict[Any, list[dict]]:
+        """Get the relations pointing at many entities in one pass.
+
+        Args:
+            entity_ids: Identifiers of the target entities.
+            relation_types: Only return relations of these types when given.
+
+        Returns:
+            dict[Any, list[dict]]: Relation records keyed by target entity ID.
+            Every requested ID is present, with an empty list when nothing
+            points at it.
+        """
+        overlay = self.overlay
+        return self._with_overlay(
+            entity_ids,
+            relation_types,
+            self._get_base_incoming,
+            overlay.merge_incoming,
+            overlay.touches_incoming,
+        )
+
+    def _with_overlay(
+        self,
+        entity_ids: Iterable[Any],
+        relation_types: set[str] | None,
+        read_base: Callable[..., dict[Any, list[dict]]],
+        merge: Callable[[Any, list[dict]], list[dict]],
+        touches: Callable[[Any], bool],
+    ) -> dict[Any, list[dict]]:
+        """Read relations with ``read_base``, merging the overlay where needed.
+
+        Only the entities the overlay touches are read in full and merged;
+        the others keep the type-filtered read of the base path.
+        """
+        entity_ids = list(entity_ids)
+        touched = {entity_id for entity_id in entity_ids if touches(entity_id)}
+        if not touched:
+            return read_base(entity_ids, relation_types)
+        if self.csr is None:
+            # Each base read scans the shards, so make a single one.
+            return _merge_overlay(read_base(entity_ids), merge, relation_types)
+        result = read_base(
+            [entity_id for entity_id in entity_ids if entity_id not in touched],
+            relation_types,
+        )
+        result.update(_merge_overlay(read_base(list(touched)), merge, relation_types))
+        return {entity_id: result[entity_id] for entity_id in entity_ids}
+
+    def get_neighbor_page(
+        self, query: NeighborQuery, offset: int = 0, limit: int | None = None
+    ) -> tuple[list[dict], int | None]:
+        """Get one page of the relations of an entity.
+
+        With the CSR snapshot, unless ingested relation updates touch the
+        entity, the page is sliced from the type-partitioned edge lists, so
+        only the relations on the page are read from the shards and a type
+        filter skips straight to the edges of those types. Otherwise the
+        relations are read in full, with the overlay applied, and sliced.
+
+        Args:
+            query: Entity, direction and relation types to read.
+            offset: Number of relations to skip.
+            limit: Maximum number of relations to return; None for all.
+
+        Returns:
+            tuple[list[dict], int | None]: The relation records and the offset
+            of the next page, or None on the last page.
+        """
+        entity_id, relation_types = query.entity_id, query.relation_types
+        overlay = self.overlay
+        touched = (query.outgoing and overlay.touches_outgoing(entity_id)) or (
+            query.incoming and overlay.touches_incoming(entity_id)
+        )
+        if self.csr is not None and not touched:
+            edges = []
+            if query.outgoing:
+                edges.append(self.csr.edges(entity_id, relation_types))
+            if query.incoming:
+                edges.append(self.csr.incoming_edges(entity_id, relation_types))
+            page, next_offset = self._page(chain(*edges), offset, limit)
+            return [self.csr.relation(edge) for edge in page], next_offset
+        relations = []
+        if query.outgoing:
+            outgoing = self.get_relations([entity_id], relation_types)
+            relations += outgoing[entity_id]
+        if query.incoming:
+            incoming = self.get_incoming_relations([entity_id], relation_types)
+            relations += incoming[entity_id]
+        return self._page(relations, offset, limit)
+
+    @staticmethod
+    def _page(
+        items: Iterable[Any], offset: int, limit: int | None
+    ) -> tuple[list, int | None]:
+        if limit is None:
+            return list(items)[offset:], None
+        return take_page(items, offset, limit)
+
+    def _csr_relations(
+        self,
+        direction: str,
+        entity_id: Any,
+        relation_types: set[str] | None = None,
+    ) -> list[dict]:
+        """Relations of ``entity_id`` in ``direction`` from the CSR snapshot.
+
+        Full lists go through the neighbor cache. Filtered reads are served
+        from a cached full list when there is one, and otherwise read just
+        the edges of the wanted types, without caching the partial list.
+        """
+        key = (direction, entity_id)
+        read = self.csr.relations if direction == "out" else self.csr.incoming_relations
+        relations = self.neighbor_cache.get(key)
+        if relations is None:
+            if relation_types is not None:
+                return read(entity_id, relation_types)
+            relations = read(entity_id)
+            self.neighbor_cache.put(key, relations)
+        if relation_types is None:
+            return relations
+        return [r for r in relations if relation_type(r) in relation_types]
+
+    def _get_base_incoming(
+        self, entity_ids: Iterable[Any], relation_types: set[str] | None = None
+    ) -> dict[Any, list[dict]]:
+        if self.csr is not None:
+            return {
+                entity_id: self._csr_relations("in", entity_id, relation_types)
+                for entity_id in entity_ids
+            }
+        result: dict[Any, list[dict]] = {}
+        wanted: dict[str, Any] = {}
+        for entity_id in entity_ids:
+            result[entity_id] = []
+            wanted[self._make_hashable(entity_id)] = entity_id
+        listed = {
+            self._make_hashable(rel_id)
+            for rel_ids in self.adjacency_map.values()
+            for rel_id in rel_ids
+        }
+        for file in self.relation_files:
+            with open(file, encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    target = wanted.get(self._make_hashable(record["target_id"]))
+                    if target is None:
+                        continue
+                    if self._make_hashable(record["relation_id"]) not in listed:
+                        continue
+                    relation = Relation(**record).model_dump()
+                    if relation_types and relation_type(relation) not in relation_types:
+                        continue
+                    result[target].append(relation)
+        return result
+
+    def _get_base_relations(
+        self, entity_ids: Iterable[Any], relation_types: set[str] | None = None
+    ) -> dict[Any, list[dict]]:
+        if self.csr is not None:
+            return {
+                entity_id: self._csr_relations("out", entity_id, relation_types)
+                for entity_id in entity_ids
+            }
+        result: dict[Any, list[dict]] = {}
+        owners: dict[str, Any] = {}
+        for entity_id in entity_ids:
+            result[entity_id] = []
+            for rel_id in self.adjacency_map.get(self._make_hashable(entity_id), []):
+                owners[self._make_hashable(rel_id)] = entity_id
+
+        for file in self.relation_files:
+            if not owners:
+                break
+            with open(file, encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    key = self._make_hashable(record["relation_id"])
+                    if key not in owners:
+                        continue
+                    relation = Relation(**record).model_dump()
+                    if relation_types and relation_type(relation) not in relation_types:
+                        continue
+                    result[owners[key]].append(relation)
+        return result
+
+    def get_community_members(self, community_id: Any) -> list[Any]:
+        return list(self.iter_community_members(community_id))
+
+    def search_by_property(self, key: str, value: Any) -> list[Any]:
+        return self._cached_search(
+            ("property", key, value),
+            lambda: list(self.iter_search_by_property(key, value)),
+        )
+
+    def _cached_search(self, key: tuple, search: Callable[[], list[Any]]) -> list[Any]:
+        key = (*key, self.overlay.seq)
+        try:
+            result = self.search_cache.get(key)
+        except TypeError:
+            # Unhashable search values are never cached.
+            return search()
+        if result is None:
+            result = search()
+            self.search_cache.put(key, result)
+        return result
+
+    def iter_community_members(self, community_id: Any) -> Iterator[Any]:
+        """Lazily yield the IDs of the entities in a community.
+
+        Unlike ``GraphReader.get_community_members`` this never holds the full
+        member list in memory, so callers can page or stream through large
+        communities.
+        """
+        community_key = self._make_hashable(community_id)
+
+        def in_community(properties: dict) -> bool:
+            value = properties.get("community_id")
+            return self._make_hashable(value) == community_key
+
+        overlay = self.overlay
+        if self.community_index is not None:
+            base = iter(self.community_index.members(community_id))
+        else:
+            base = self._scan_entity_ids(in_community)
+        yield from overlay.filter_entities(base, in_community)
+
+    def community_stats(self, community_id: Any) -> dict | None:
+        """Get the size and edge statistics of a community.
+
+        Statistics describe the published shards; updates ingested since are
+        not reflected until the shards are compacted and the index rebuilt.
+
+        Returns:
+            dict | None: The statistics, or None if no entity belongs to the
+            community.
+        """
+        if self.community_index is not None:
+            return self.community_index.stats(community_id)
+        summary = self._summarize_communities().get(self._make_hashable(community_id))
+        return None if summary is None else summary.stats()
+
+    def list_communities(
+        self, offset: int, limit: int, order: str = "id"
+    ) -> tuple[list[dict], int | None, int]:
+        """Get the statistics of one page of communities.
+
+        Args:
+            offset: Number of communities to skip.
+            limit: Maximum number of communities to return.
+            order: ``"id"`` to list by community ID, or ``"size"`` to list the
+                largest communities first.
+
+        Returns:
+            tuple[list[dict], int | None, int]: The page, the offset of the
+            next page or None on the last page, and the number of communities.
+        """
+        if self.community_index is not None:
+            total = len(self.community_index)
+            page = self.community_index.page(offset, limit, order)
+        else:
+            summaries = self._summarize_communities()
+            total = len(summaries)
+            keys = ordered_keys(summaries)[order][offset : offset + limit]
+            page = [summaries[key].stats() for key in keys]
+        next_offset = offset + limit if offset + limit < total else None
+        return page, next_offset, total
+
+    def get_centrality(self, entity_id: Any) -> dict | None:
+        """Get the precomputed centrality scores and ranks of an entity.
+
+        Returns:
+            dict | None: ``scores`` and 1-based ``ranks`` keyed by metric, or
+            None if the entity has no scores.
+
+        Raises:
+            LookupError: If centrality has not been computed for the graph.
+        """
+        return self._require_centrality().entity(entity_id)
+
+    def rank_entities(
+        self, metric: str, k: int, community_id: Any | None = None
+    ) -> list[dict]:
+        """Get the ``k`` entities with the highest ``metric`` score.
+
+        Args:
+            metric: One of the metrics in
+                :data:`graph_reader_api.indexes.centrality.METRICS`.
+            k: Number of entities to return.
+            community_id: Only rank the members of this community when given.
+
+        Returns:
+            list[dict]: ``entity_id`` and ``score``, highest score first.
+
+        Raises:
+            LookupError: If centrality has not been computed for the graph.
+        """
+        centrality = self._require_centrality()
+        if community_id is None:
+            return centrality.top(metric, k)
+        return centrality.top(metric, k, self.iter_community_members(community_id))
+
+    def _require_centrality(self) -> CentralityIndex:
+        if self.centrality is None:
+            raise LookupError("Centrality has not been computed for this graph")
+        return self.centrality
+
+    def _summarize_communities(self) -> dict[str, CommunitySummary]:
+        """Compute community statistics by scanning the shards, once."""
+        if self._community_summaries is None:
+            self._community_summaries = summarize_communities(
+                self._scan_memberships(), self._scan_edges()
+            )
+        return self._community_summaries
+
+    def _scan_memberships(self) -> Iterator[tuple[Any, Any]]:
+        for file in self.entity_files:
+            with open(file, encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    community_id = record["properties"].get("community_id")
+                    yield record["entity_id"], community_id
+
+    def _scan_edges(self) -> Iterator[tuple[Any, Any]]:
+        if self.csr is not None:
+            yield from self.csr.edge_pairs()
+            return
+        owners = {
+            self._make_hashable(rel_id): source
+            for source, rel_ids in self.adjacency_map.items()
+            for rel_id in rel_ids
+        }
+        for file in self.relation_files:
+            with open(file, encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    source = owners.get(self._make_hashable(record["relation_id"]))
+                    if source is not None:
+                        yield source, record["target_id"]
+
+    def _scan_entity_ids(self, matches: Callable[[dict], bool]) -> Iterator[Any]:
+        """Yield the IDs of the shard records whose properties satisfy ``matches``."""
+        for file in self.entity_files:
+            with open(file, encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if matches(record["properties"]):
+                        yield record["entity_id"]
+
+    def iter_search_by_property(self, key: str, value: Any) -> Iterator[Any]:
+        """Lazily yield the IDs of the entities whose ``key`` equals ``value``.
+
+        Matches use the equality of the ``graph_reader`` search evaluator
+        (``==``, or membership for list properties), whichever path answers.
+        For string values on graphs with a property index, the index narrows
+        the candidates, which are then checked against their shard records,
+        since it also matches values whose JSON encoding equals ``value``.
+        Other searches go to the ``graph_reader`` indexer.
+        """
+        condition = SearchCondition(key, SearchOperator.EQUALS, value)
+        evaluator = SearchExpressionEvaluator()
+
+        def matches(properties: dict) -> bool:
+            return evaluator.evaluate_expression(condition, properties)
+
+        overlay = self.overlay
+        if (
+            isinstance(value, str)
+            and self.property_index is not None
+            and self.entity_index is not None
+        ):
+            query = PropertyQuery((Predicate(key, value),))
+            candidates = evaluate(self.property_index, query)
+            base = self._verify_candidates(candidates, matches)
+        elif isinstance(self.indexer, MemoryIndexer):
+            base = (
+                entity_id
+                for entity_id, properties in self.indexer.map.items()
+                if matches(properties)
+            )
+        else:
+            base = iter(self.indexer.search_by_property(key, value))
+        yield from overlay.filter_entities(base, matches)
+
+    def _verify_candidates(
+        self, candidates: Iterable[Any], matches: Callable[[dict], bool]
+    ) -> Iterator[Any]:
+        """Yield the ``candidates`` whose shard record satisfies ``matches``.
+
+        Records are read a batch at a time, keeping the candidates' order.
+        """
+        candidates = iter(candidates)
+        while batch := list(islice(candidates, VERIFY_BATCH_SIZE)):
+            records = self.entity_index.read_many(batch)
+            for entity_id in batch:
+                record = records.get(entity_id)
+                if record is not None and matches(record["properties"]):
+                    yield entity_id
+
+    def query_properties(self, query: PropertyQuery) -> list[Any]:
+        """Get the IDs of the entities matching a multi-predicate query.
+
+        Answered from the inverted property index when the graph has one, and
+        by scanning the entity shards otherwise.
+
+        Returns:
+            list[Any]: Matching entity IDs, in ascending order when the index
+            is used and in shard order otherwise.
+        """
+        return self._cached_search(("query", query), lambda: self._query(query))
+
+    def _query(self, query: PropertyQuery) -> list[Any]:
+        overlay = self.overlay
+        if self.property_index is None:
+            return list(
+                overlay.filter_entities(
+                    self._scan_entity_ids(query.matches), query.matches
+                )
+            )
+        matches = evaluate(self.property_index, query)
+        if not overlay.entities:
+            return matches
+        return sorted(set(overlay.filter_entities(matches, query.matches)))
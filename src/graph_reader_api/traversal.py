@@ -0,0 +1,324 @@
+"""Server-side graph traversals.
+
+Traversals run on the reader pool and expand one BFS level at a time, so each
+level costs a single batched relation read regardless of its width.
+"""
+
+import heapq
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from .store import GraphStore, relation_type
+
+
+@dataclass(frozen=True)
+class TraversalBudget:
+    """Limits that bound the cost of a traversal."""
+
+    max_depth: int
+    max_nodes: int
+    # Seconds after which the traversal stops; None for no limit.
+    time_budget: float | None = None
+
+    def deadline(self) -> float | None:
+        if self.time_budget is None:
+            return None
+        return time.monotonic() + self.time_budget
+
+
+def subgraph(
+    store: GraphStore,
+    root: Any,
+    budget: TraversalBudget,
+    relation_types: set[str] | None = None,
+) -> dict:
+    """Collect the k-hop neighborhood of ``root`` following outgoing relations.
+
+    Args:
+        store: Graph store to read from.
+        root: Entity ID to start from.
+        budget: Maximum hops from ``root``, maximum number of nodes in the
+            result (``root`` included) and time budget.
+        relation_types: Only follow relations of these types when given.
+
+    Returns:
+        dict: ``nodes`` (entity ID and hop distance), ``edges`` (relation
+        records between returned nodes) and ``truncated``, which names the
+        limit that cut the traversal short (``"max_nodes"`` or
+        ``"time_budget"``) or is None when the neighborhood is complete.
+    """
+    deadline = budget.deadline()
+    visited = {root: 0}
+    edges: list[dict] = []
+    frontier = [root]
+    truncated = None
+
+    for level in range(1, budget.max_depth + 1):
+        if not frontier:
+            break
+        if deadline is not None and time.monotonic() > deadline:
+            truncated = "time_budget"
+            break
+        next_frontier = []
+        for relations in store.get_relations(frontier, relation_types).values():
+            for relation in relations:
+                target = relation["target_id"]
+                if target not in visited:
+                    if len(visited) >= budget.max_nodes:
+                        truncated = "max_nodes"
+                        continue
+                    visited[target] = level
+                    next_frontier.append(target)
+                edges.append(relation)
+        frontier = next_frontier
+
+    return {
+        "nodes": [
+            {"entity_id": entity_id, "depth": hops}
+            for entity_id, hops in visited.items()
+        ],
+        "edges": edges,
+        "truncated": truncated,
+    }
+
+
+class BudgetExceededError(Exception):
+    """Raised inside a path search when a budget runs out."""
+
+    def __init__(self, limit: str):
+        super().__init__(limit)
+        self.limit = limit
+
+
+@dataclass
+class Path:
+    """A path as its node IDs and the relation records between them."""
+
+    nodes: list[Any]
+    relations: list[dict]
+
+    def key(self) -> tuple:
+        return tuple(relation["relation_id"] for relation in self.relations)
+
+    def to_dict(self) -> dict:
+        return {
+            "length": len(self.relations),
+            "nodes": self.nodes,
+            "relation_types": [relation_type(r) for r in self.relations],
+            "relations": self.relations,
+        }
+
+
+class _PathSearch:
+    """Bidirectional BFS between two entities, sharing one budget across runs.
+
+    ``max_nodes`` caps the number of nodes discovered over every search run
+    by :func:`shortest_paths`, so finding k paths costs at most as much as the
+    budget allows no matter how many spur searches Yen's algorithm makes.
+    """
+
+    def __init__(
+        self,
+        store: GraphStore,
+        budget: TraversalBudget,
+        relation_types: set[str] | None,
+    ):
+        self.store = store
+        self.budget = budget
+        self.relation_types = relation_types
+        self.deadline = budget.deadline()
+        self.discovered = 0
+
+    def _discover(self) -> None:
+        self.discovered += 1
+        if self.discovered > self.budget.max_nodes:
+            raise BudgetExceededError("max_nodes")
+
+    def _expand(
+        self,
+        frontier: list[Any],
+        parents: dict[Any, tuple[Any, dict] | None],
+        forward: bool,
+        banned_nodes: set[Any],
+        banned_relations: set[Any],
+    ) -> list[Any]:
+        """Expand one BFS level and return the newly discovered nodes."""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceededError("time_budget")
+        if forward:
+            levels = self.store.get_relations(frontier, self.relation_types)
+        else:
+            levels = self.store.get_incoming_relations(frontier, self.relation_types)
+        end = "target_id" if forward else "source_id"
+        discovered = []
+        for node in frontier:
+            for relation in levels[node]:
+                neighbor = relation[end]
+                if (
+                    neighbor in parents
+                    or neighbor in banned_nodes
+                    or relation["relation_id"] in banned_relations
+                ):
+                    continue
+                self._discover()
+                parents[neighbor] = (node, relation)
+                discovered.append(neighbor)
+        return discovered
+
+    def shortest(
+        self,
+        source: Any,
+        target: Any,
+        max_depth: int,
+        banned_nodes: set[Any] = frozenset(),
+        banned_relations: set[Any] = frozenset(),
+    ) -> Path | None:
+        """Find one shortest path of at most ``max_depth`` relations.
+
+        Each step expands whichever side has the smaller frontier, so the
+        search touches roughly the square root of the nodes a one-sided BFS
+        would on graphs with a high branching factor.
+
+        Raises:
+            BudgetExceededError: If the node or time budget runs out first.
+        """
+        if source == target:
+            return Path([source], [])
+        forward: dict[Any, tuple[Any, dict] | None] = {source: None}
+        backward: dict[Any, tuple[Any, dict] | None] = {target: None}
+        depth_f, depth_b = {source: 0}, {target: 0}
+        frontier_f, frontier_b = [source], [target]
+        level_f = level_b = 0
+        while frontier_f and frontier_b and level_f + level_b < max_depth:
+            if len(frontier_f) <= len(frontier_b):
+                level_f += 1
+                frontier_f = self._expand(
+                    frontier_f, forward, True, banned_nodes, banned_relations
+                )
+                depth_f.update((node, level_f) for node in frontier_f)
+                meetings = [node for node in frontier_f if node in backward]
+            else:
+                level_b += 1
+                frontier_b = self._expand(
+                    frontier_b, backward, False, banned_nodes, banned_relations
+                )
+                depth_b.update((node, level_b) for node in frontier_b)
+                meetings = [node for node in frontier_b if node in forward]
+            if meetings:
+                meeting = min(meetings, key=lambda n: depth_f[n] + depth_b[n])
+                return _join(meeting, forward, backward)
+        return None
+
+
+def _join(
+    meeting: Any,
+    forward: dict[Any, tuple[Any, dict] | None],
+    backward: dict[Any, tuple[Any, dict] | None],
+) -> Path:
+    nodes, relations = [meeting], []
+    step = forward[meeting]
+    while step is not None:
+        node, relation = step
+        nodes.append(node)
+        relations.append(relation)
+        step = forward[node]
+    nodes.reverse()
+    relations.reverse()
+    step = backward[meeting]
+    while step is not None:
+        node, relation = step
+        nodes.append(node)
+        relations.append(relation)
+        step = backward[node]
+    return Path(nodes, relations)
+
+
+@dataclass(frozen=True)
+class PathQuery:
+    """The ``k`` shortest paths from ``source`` to ``target``.
+
+    Only relations of ``relation_types`` are followed when it is given.
+    """
+
+    source: Any
+    target: Any
+    k: int = 1
+    relation_types: frozenset[str] | None = None
+
+
+def shortest_paths(
+    store: GraphStore, query: PathQuery, budget: TraversalBudget
+) -> dict:
+    """Find up to ``query.k`` shortest paths from its source to its target.
+
+    The first path comes from a bidirectional BFS; further ones from Yen's
+    algorithm, which reruns the search from each node of the previous path
+    with the edges already used from there removed. Paths follow relations
+    in their direction and never visit a node twice.
+
+    Args:
+        store: Graph store to read from.
+        query: Endpoints, number of paths and relation types to follow.
+        budget: Maximum path length (``max_depth`` relations), maximum number
+            of nodes discovered over the whole search, and time budget.
+
+    Returns:
+        dict: ``paths`` (each with its ``length``, ``nodes``, the
+        ``relation_types`` along it and the ``relations`` records) and
+        ``truncated``, which names the budget that stopped the search
+        (``"max_nodes"`` or ``"time_budget"``) or is None when it completed.
+        Paths found before a budget ran out are still returned.
+    """
+    relation_types = set(query.relation_types) if query.relation_types else None
+    search = _PathSearch(store, budget, relation_types)
+    found: list[Path] = []
+    truncated = None
+    try:
+        first = search.shortest(query.source, query.target, budget.max_depth)
+        if first is not None:
+            found.append(first)
+            _more_paths(search, found, query.target, query.k)
+    except BudgetExceededError as e:
+        truncated = e.limit
+    return {
+        "source": query.source,
+        "target": query.target,
+        "paths": [path.to_dict() for path in found],
+        "truncated": truncated,
+    }
+
+
+def _more_paths(search: _PathSearch, found: list[Path], target: Any, k: int) -> None:
+    """Extend ``found`` (holding the shortest path) to ``k`` paths, Yen-style."""
+    candidates: list[tuple[int, int, Path]] = []
+    seen = {found[0].key()}
+    counter = 0
+    while len(found) < k:
+        previous = found[-1]
+        for i in range(len(previous.relations)):
+            root_nodes = previous.nodes[: i + 1]
+            banned_relations = {
+                path.relations[i]["relation_id"]
+                for path in found
+                if len(path.relations) > i and path.nodes[: i + 1] == root_nodes
+            }
+            spur = search.shortest(
+                root_nodes[-1],
+                target,
+                search.budget.max_depth - i,
+                set(root_nodes[:-1]),
+                banned_relations,
+            )
+            if spur is None:
+                continue
+            path = Path(
+                root_nodes[:-1] + spur.nodes, previous.relations[:i] + spur.relations
+            )
+            if path.key() not in seen:
+                seen.add(path.key())
+                counter += 1
+                heapq.heappush(candidates, (len(path.relations), counter, path))
+        if not candidates:
+            return
+        found.append(heapq.heappop(candidates)[2])
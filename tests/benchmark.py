@@ -0,0 +1,394 @@
+"""Load benchmark for the Graph Reader API.
+
+Drives the app in-process through httpx's ASGI transport, so results measure
+the service itself (routing, auth, reader, serialization) without network or
+server overhead. Generate a graph first, then run and store a baseline::
+
+    python tests/fixture_generator.py /tmp/kg --entities 1000000
+    python tests/benchmark.py /tmp/kg --requests 2000 --output baseline.json
+
+Later runs can be compared against it; endpoints whose p95 regressed by more
+than ``--threshold`` are reported and make the command exit non-zero::
+
+    python tests/benchmark.py /tmp/kg --requests 2000 --compare baseline.json
+
+``--accept`` and ``--accept-encoding`` set the headers sent with every
+request (e.g. ``application/msgpack`` and ``zstd``); each endpoint reports
+the mean bytes on the wire and the process CPU time per request. To see what
+the encoders and compressors cost and save on real responses, run::
+
+    python tests/benchmark.py /tmp/kg --requests 200 --serialization
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+import httpx
+import zstandard
+from apikey.dependencies import ALGORITHM, JWT_SECRET
+from fastapi.encoders import jsonable_encoder
+from jose import jwt
+
+from graph_reader_api.app import create_app, lifespan
+from graph_reader_api.config import APIConfig
+from graph_reader_api.serialization import MSGPACK_MEDIA_TYPE, encode
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    method: str
+    # Formatted with a random entity ID and values derived from it.
+    path: str
+    # Send a batch of IDs starting at the random entity ID as the JSON body.
+    body: bool = False
+
+
+ENDPOINTS = [
+    Endpoint("entity", "GET", "/entity/{id}"),
+    Endpoint("neighbors", "GET", "/entity/{id}/neighbors"),
+    Endpoint("community", "GET", "/entity/{id}/community"),
+    Endpoint("batch", "POST", "/entity/batch", body=True),
+    Endpoint("subgraph", "GET", "/entity/{id}/subgraph?depth=2&max_nodes=100"),
+    Endpoint("context", "GET", "/entity/{id}/context?max_tokens=2000"),
+    Endpoint("members", "GET", "/community/community_{community}/members?limit=100"),
+    Endpoint("path", "GET", "/path?source={id}&target={other}&max_depth=4"),
+    Endpoint("stats", "GET", "/community/community_{community}/stats"),
+    Endpoint("search", "GET", "/search?key=name&value=entity_{id}&limit=100"),
+    Endpoint(
+        "query",
+        "GET",
+        "/search/query?where=type:Person&where=tag:tag_{tag}&limit=100",
+    ),
+]
+
+
+def stdlib_json(content) -> bytes:
+    """What FastAPI's default JSONResponse does with a returned dict."""
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode()
+
+
+# Encodings compared by --serialization; the first one is the baseline.
+ENCODERS = {
+    "stdlib": stdlib_json,
+    "orjson": encode,
+    "msgpack": lambda content: encode(content, MSGPACK_MEDIA_TYPE),
+}
+COMPRESSORS = {
+    "gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0),
+    "zstd": zstandard.ZstdCompressor(level=3).compress,
+}
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def summarize(
+    latencies: list[float], errors: int, elapsed: float, usage: tuple[int, float]
+) -> dict:
+    """Latency percentiles; ``usage`` is the bytes received and CPU seconds."""
+    ordered = sorted(latencies)
+    received, cpu_seconds = usage
+    count = max(len(latencies), 1)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "bytes_mean": round(received / count),
+        "cpu_ms": round(cpu_seconds * 1000 / count, 3),
+    }
+
+
+def auth_token() -> str:
+    now = datetime.now(UTC)
+    claims = {
+        "sub": str(uuid.uuid4()),
+        "email": "benchmark@example.com",
+        "aud": "fastapi-users:auth",
+        "iat": now,
+        "exp": now + timedelta(hours=1),
+    }
+    return jwt.encode(claims, JWT_SECRET, algorithm=ALGORITHM)
+
+
+def graph_shape(base_dir: str) -> tuple[int, int]:
+    """Entity count, and the number of communities among the first entities."""
+    entities = 0
+    communities = set()
+    for name in sorted(os.listdir(os.path.join(base_dir, "entities"))):
+        if not name.endswith(".jsonl"):
+            continue
+        with open(os.path.join(base_dir, "entities", name), encoding="utf-8") as f:
+            for line in f:
+                entities += 1
+                if len(communities) < 10000:
+                    record = json.loads(line)
+                    communities.add(record["properties"].get("community_id"))
+    return entities, len(communities)
+
+
+def request_for(
+    endpoint: Endpoint, entity_id: int, shape: tuple[int, int]
+) -> tuple[str, dict | None]:
+    """The path and JSON body of one request to ``endpoint``."""
+    entities, communities = shape
+    path = endpoint.path.format(
+        id=entity_id,
+        community=entity_id % max(communities, 1),
+        tag=entity_id % 50,
+        # Targets skew towards low IDs, so these have in-edges.
+        other=(entity_id * 7919) % max(entities // 100, 1),
+    )
+    body = (
+        {"entity_ids": [(entity_id + i) % entities for i in range(50)]}
+        if endpoint.body
+        else None
+    )
+    return path, body
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    endpoint: Endpoint,
+    args: argparse.Namespace,
+    shape: tuple[int, int],
+) -> dict:
+    rng = random.Random(args.seed)
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(args.requests):
+        queue.put_nowait(rng.randrange(shape[0]))
+    latencies: list[float] = []
+    errors = 0
+    received = 0
+
+    async def worker() -> None:
+        nonlocal errors, received
+        while not queue.empty():
+            path, body = request_for(endpoint, queue.get_nowait(), shape)
+            started = time.perf_counter()
+            response = await client.request(endpoint.method, path, json=body)
+            latencies.append(time.perf_counter() - started)
+            received += response.num_bytes_downloaded
+            if response.status_code >= 400 and response.status_code != 404:
+                errors += 1
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    usage = (received, time.process_time() - cpu_started)
+    return summarize(latencies, errors, time.perf_counter() - started, usage)
+
+
+async def sample_payloads(
+    client: httpx.AsyncClient,
+    endpoint: Endpoint,
+    args: argparse.Namespace,
+    shape: tuple[int, int],
+) -> list:
+    """Decoded JSON responses of ``args.requests`` random requests."""
+    rng = random.Random(args.seed)
+    payloads = []
+    for _ in range(args.requests):
+        path, body = request_for(endpoint, rng.randrange(shape[0]), shape)
+        response = await client.request(
+            endpoint.method,
+            path,
+            json=body,
+            headers={"Accept": "application/json", "Accept-Encoding": "identity"},
+        )
+        if response.status_code == 200:
+            payloads.append(response.json())
+    return payloads
+
+
+def measure_serialization(payloads: list) -> dict:
+    """Mean size and CPU time of each encoding of ``payloads``.
+
+    Compressors are applied to the orjson output. ``saved_*`` compare each
+    row with the stdlib baseline.
+    """
+    count = max(len(payloads), 1)
+    rows: dict[str, dict] = {}
+
+    def record(name: str, bodies: list[bytes], cpu_seconds: float) -> None:
+        rows[name] = {
+            "bytes_mean": round(sum(map(len, bodies)) / count),
+            "cpu_us": round(cpu_seconds * 1e6 / count, 1),
+        }
+
+    for name, encoder in ENCODERS.items():
+        started = time.process_time()
+        bodies = [encoder(payload) for payload in payloads]
+        record(name, bodies, time.process_time() - started)
+        if name == "orjson":
+            encoded = bodies
+    for name, compressor in COMPRESSORS.items():
+        started = time.process_time()
+        bodies = [compressor(body) for body in encoded]
+        record(f"orjson+{name}", bodies, time.process_time() - started)
+    baseline = rows["stdlib"]
+    for row in rows.values():
+        row["saved_bytes"] = baseline["bytes_mean"] - row["bytes_mean"]
+        row["saved_cpu_us"] = round(baseline["cpu_us"] - row["cpu_us"], 1)
+    return rows
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    config = APIConfig(
+        base_dir=args.base_dir,
+        reader_workers=args.workers,
+        reader_max_pending=max(args.workers, args.concurrency * 2),
+        ingest_logs=False,
+        warmup=False,
+    )
+    app = create_app(config=config)
+    shape = graph_shape(args.base_dir)
+    selected = [e for e in ENDPOINTS if not args.endpoint or e.name in args.endpoint]
+    results = {}
+    started = time.perf_counter()
+    async with lifespan(app):
+        load_seconds = time.perf_counter() - started
+        transport = httpx.ASGITransport(app=app)
+        headers = {"Authorization": f"Bearer {auth_token()}"}
+        if args.accept:
+            headers["Accept"] = args.accept
+        if args.accept_encoding:
+            headers["Accept-Encoding"] = args.accept_encoding
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark", headers=headers
+        ) as client:
+            for endpoint in selected:
+                if args.serialization:
+                    payloads = await sample_payloads(client, endpoint, args, shape)
+                    results[endpoint.name] = measure_serialization(payloads)
+                else:
+                    results[endpoint.name] = await run_endpoint(
+                        client, endpoint, args, shape
+                    )
+    return {
+        "created": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "graph": {"base_dir": args.base_dir, "entities": shape[0]},
+        "settings": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "accept": args.accept,
+            "accept_encoding": args.accept_encoding,
+            "serialization": args.serialization,
+        },
+        "startup_seconds": round(load_seconds, 3),
+        "endpoints": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Describe endpoints whose p95 grew by more than ``threshold`` (a ratio)."""
+    regressions = []
+    for name, result in current["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if not before or not before.get("p95_ms") or "p95_ms" not in result:
+            continue
+        ratio = result["p95_ms"] / before["p95_ms"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{name}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms "
+                f"(+{(ratio - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def print_table(report: dict) -> None:
+    if report["settings"]["serialization"]:
+        print_serialization_table(report)
+        return
+    columns = (
+        "requests",
+        "errors",
+        "throughput_rps",
+        "p50_ms",
+        "p95_ms",
+        "p99_ms",
+        "bytes_mean",
+        "cpu_ms",
+    )
+    print(f"{'endpoint':<12}" + "".join(f"{c:>16}" for c in columns))
+    for name, result in report["endpoints"].items():
+        print(f"{name:<12}" + "".join(f"{result[c]:>16}" for c in columns))
+
+
+def print_serialization_table(report: dict) -> None:
+    columns = ("bytes_mean", "cpu_us", "saved_bytes", "saved_cpu_us")
+    print(f"{'endpoint':<12}{'encoding':<16}" + "".join(f"{c:>14}" for c in columns))
+    for name, rows in report["endpoints"].items():
+        for encoding, row in rows.items():
+            print(
+                f"{name:<12}{encoding:<16}" + "".join(f"{row[c]:>14}" for c in columns)
+            )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base_dir", help="Knowledge graph directory")
+    parser.add_argument("--requests", type=int, default=500, help="Per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4, help="Reader pool size")
+    parser.add_argument("--endpoint", action="append", help="Only run these")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--accept", help="Accept header, e.g. application/msgpack")
+    parser.add_argument(
+        "--accept-encoding", help="Accept-Encoding header, e.g. zstd or identity"
+    )
+    parser.add_argument(
+        "--serialization",
+        action="store_true",
+        help="Compare encoders and compressors on sampled responses instead",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Allowed p95 growth ratio"
+    )
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_benchmark(args))
+    print_table(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
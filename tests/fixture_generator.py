@@ -1,5 +1,11 @@
+import argparse
 import json
 import os
+import random
+from dataclasses import dataclass, fields
+from datetime import UTC, datetime, timedelta
+
+SYNTHETIC_EPOCH = datetime(2025, 1, 1, tzinfo=UTC)
 
 
 def create_test_graph_fixture(base_dir="test_graph_fixture"):
@@ -136,5 +142,194 @@ def create_test_graph_fixture(base_dir="test_graph_fixture"):
     return base_dir
 
 
+@dataclass
+class SyntheticGraphParams:
+    """Shape of a generated graph.
+
+    Out-degrees follow a power law with mean ``avg_degree`` (exponent
+    ``degree_exponent``), and targets are drawn with a bias towards low IDs
+    (``target_skew``) so in-degrees are heavy-tailed as well. A fraction
+    ``intra_community`` of the relations stays within the source's community.
+    """
+
+    entities: int = 10_000
+    avg_degree: float = 8.0
+    degree_exponent: float = 2.1
+    target_skew: float = 2.0
+    communities: int = 100
+    intra_community: float = 0.8
+    # Distinct values of the low-cardinality "category" and "tag" properties.
+    property_cardinality: int = 50
+    relation_types: int = 5
+    entity_shards: int = 4
+    relation_shards: int = 4
+    # Records appended to logs/*.jsonl after the compacted shards.
+    update_log_size: int = 1000
+    seed: int = 42
+
+
+def _open_shards(base_dir, kind, count):
+    return [
+        open(
+            os.path.join(base_dir, kind, f"shard_{index}.jsonl"),
+            "w",
+            encoding="utf-8",
+        )
+        for index in range(count)
+    ]
+
+
+def _timestamp(seconds):
+    moment = SYNTHETIC_EPOCH + timedelta(seconds=seconds)
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _synthetic_entity(entity_id, params, rng):
+    # Skewed, so some categories are much more common than others.
+    category = int(params.property_cardinality * rng.random() ** 2)
+    return {
+        "entity_id": entity_id,
+        "properties": {
+            "name": f"entity_{entity_id}",
+            "type": "Person" if entity_id % 3 else "Organization",
+            "category": f"category_{category}",
+            "tag": f"tag_{rng.randrange(params.property_cardinality)}",
+            "score": rng.randrange(1000),
+            "community_id": f"community_{entity_id % params.communities}",
+        },
+        "last_update_time": _timestamp(entity_id % 86400),
+    }
+
+
+def _synthetic_target(source, params, rng):
+    n = params.entities
+    if rng.random() < params.intra_community:
+        community = source % params.communities
+        members = (n - community + params.communities - 1) // params.communities
+        return community + params.communities * int(
+            members * rng.random() ** params.target_skew
+        )
+    return int(n * rng.random() ** params.target_skew)
+
+
+def _synthetic_degree(params, rng):
+    alpha = params.degree_exponent
+    scale = params.avg_degree * (alpha - 1) / alpha
+    return min(int(scale * rng.paretovariate(alpha)), params.entities - 1)
+
+
+def generate_synthetic_graph(base_dir, params=None):
+    """Write a synthetic KG directory of arbitrary size.
+
+    Records are streamed to disk one entity at a time, so memory use does not
+    grow with the graph and multi-million-entity graphs can be generated.
+
+    Returns:
+        dict: Counts of what was written.
+    """
+    params = params or SyntheticGraphParams()
+    rng = random.Random(params.seed)
+    for kind in ("logs", "entities", "relations", "adjacency"):
+        os.makedirs(os.path.join(base_dir, kind), exist_ok=True)
+
+    entity_files = _open_shards(base_dir, "entities", params.entity_shards)
+    relation_files = _open_shards(base_dir, "relations", params.relation_shards)
+    adjacency_path = os.path.join(base_dir, "adjacency", "adjacency.jsonl")
+    relation_id = 0
+    per_entity_shard = -(-params.entities // params.entity_shards)
+    per_relation_shard = -(-params.entities // params.relation_shards)
+    try:
+        with open(adjacency_path, "w", encoding="utf-8") as adjacency:
+            for entity_id in range(params.entities):
+                entity = _synthetic_entity(entity_id, params, rng)
+                entity_files[entity_id // per_entity_shard].write(
+                    json.dumps(entity) + "\n"
+                )
+                relation_ids = []
+                shard = relation_files[entity_id // per_relation_shard]
+                for _ in range(_synthetic_degree(params, rng)):
+                    relation_id += 1
+                    relation_ids.append(relation_id)
+                    relation = {
+                        "relation_id": relation_id,
+                        "source_id": entity_id,
+                        "target_id": _synthetic_target(entity_id, params, rng),
+                        "properties": {
+                            "type": f"REL_{rng.randrange(params.relation_types)}"
+                        },
+                        "update_time": _timestamp(relation_id % 86400),
+                    }
+                    shard.write(json.dumps(relation) + "\n")
+                if relation_ids:
+                    adjacency.write(
+                        json.dumps({"entity_id": entity_id, "relations": relation_ids})
+                        + "\n"
+                    )
+    finally:
+        for f in entity_files + relation_files:
+            f.close()
+
+    updates = _write_update_logs(base_dir, params, rng, relation_id)
+    return {"entities": params.entities, "relations": relation_id, **updates}
+
+
+def _write_update_logs(base_dir, params, rng, last_relation_id):
+    entity_updates = relation_updates = 0
+    with (
+        open(
+            os.path.join(base_dir, "logs", "entity_updates.jsonl"),
+            "w",
+            encoding="utf-8",
+        ) as entity_log,
+        open(
+            os.path.join(base_dir, "logs", "relation_updates.jsonl"),
+            "w",
+            encoding="utf-8",
+        ) as relation_log,
+    ):
+        for index in range(params.update_log_size):
+            update_time = _timestamp(86400 + index)
+            if rng.random() < 0.8:
+                entity_updates += 1
+                record = {
+                    "entity_id": rng.randrange(params.entities),
+                    "properties": {"score": rng.randrange(1000)},
+                    "update_time": update_time,
+                }
+                entity_log.write(json.dumps(record) + "\n")
+            else:
+                relation_updates += 1
+                source = rng.randrange(params.entities)
+                record = {
+                    "relation_id": last_relation_id + relation_updates,
+                    "source_id": source,
+                    "target_id": _synthetic_target(source, params, rng),
+                    "properties": {
+                        "type": f"REL_{rng.randrange(params.relation_types)}"
+                    },
+                    "update_time": update_time,
+                }
+                relation_log.write(json.dumps(record) + "\n")
+    return {"entity_updates": entity_updates, "relation_updates": relation_updates}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic KG directory.")
+    parser.add_argument("base_dir")
+    for field in fields(SyntheticGraphParams):
+        parser.add_argument(
+            "--" + field.name.replace("_", "-"),
+            type=type(field.default),
+            default=field.default,
+        )
+    args = vars(parser.parse_args(argv))
+    base_dir = args.pop("base_dir")
+    print(json.dumps(generate_synthetic_graph(base_dir, SyntheticGraphParams(**args))))
+
+
 # Run and return path
 create_test_graph_fixture()
+
+
+if __name__ == "__main__":
+    main()
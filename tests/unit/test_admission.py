@@ -0,0 +1,128 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from graph_reader_api.admission import (
+    AdmissionController,
+    LoadSheddingMiddleware,
+    RateLimitedError,
+    TokenBucket,
+)
+from graph_reader_api.app import create_app
+from graph_reader_api.config import APIConfig
+from graph_reader_api.metrics import Metrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope="module")
+def client(setup_graph_fixture):
+    config = APIConfig(
+        base_dir=str(setup_graph_fixture),
+        rate_limit=0.001,
+        rate_limit_burst=6,
+        admission_costs={"/search": 5},
+    )
+    return TestClient(create_app(config=config))
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(rate=2, burst=4, now=0)
+    assert bucket.take(3, now=0) == 0
+    assert bucket.take(3, now=0) == pytest.approx(1.0)
+    assert bucket.take(3, now=1) == 0
+    # Costs above the burst are capped, so they are not refused forever.
+    assert bucket.take(10, now=3) == 0
+
+
+def test_controller_limits_in_flight_per_principal():
+    clock = FakeClock()
+    controller = AdmissionController(rate=None, burst=1, max_in_flight=2, clock=clock)
+    controller.acquire("alice", "/entity/{entity_id}")
+    controller.acquire("alice", "/entity/{entity_id}")
+    with pytest.raises(RateLimitedError) as raised:
+        controller.acquire("alice", "/entity/{entity_id}")
+    assert raised.value.reason == "concurrency"
+    controller.acquire("bob", "/entity/{entity_id}")
+    controller.release("alice")
+    controller.acquire("alice", "/entity/{entity_id}")
+    assert controller.in_flight("alice") == 2
+
+
+def test_controller_charges_route_costs():
+    clock = FakeClock()
+    controller = AdmissionController(
+        rate=1, burst=10, costs={"/search": 8}, clock=clock
+    )
+    assert controller.cost("/graphs/{graph}/search") == 8
+    controller.acquire("alice", "/search")
+    controller.release("alice")
+    with pytest.raises(RateLimitedError) as raised:
+        controller.acquire("alice", "/search")
+    assert raised.value.reason == "rate"
+    assert raised.value.retry_after_header == "6"
+    controller.acquire("alice", "/entity/{entity_id}")
+
+
+def test_rate_limit_by_cost(client, auth_header):
+    assert client.get("/search?key=name&value=Alice", headers=auth_header).is_success
+    assert client.get("/entity/1", headers=auth_header).status_code == 200
+    response = client.get("/entity/1", headers=auth_header)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert client.get("/health").status_code == 200
+    metrics = client.get("/metrics").text
+    assert 'http_admission_rejections_total{reason="rate"} 1' in metrics
+
+
+def test_load_shedding():
+    release = asyncio.Event()
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {}
+
+    @app.get("/health")
+    async def health():
+        return {}
+
+    metrics = Metrics()
+    shedding = LoadSheddingMiddleware(app, max_in_flight=1, metrics=metrics)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=shedding)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            first = asyncio.create_task(c.get("/slow"))
+            while shedding.in_flight == 0:
+                await asyncio.sleep(0)
+            shed = await c.get("/slow")
+            assert shed.status_code == 503
+            assert shed.headers["retry-after"] == "1"
+            assert (await c.get("/health")).status_code == 200
+            release.set()
+            assert (await first).status_code == 200
+            assert (await c.get("/slow")).status_code == 200
+
+    asyncio.run(scenario())
+    assert metrics.admission_rejections.value(reason="overload") == 1
+
+
+def test_refusals_carry_cors_headers(setup_graph_fixture, auth_header, monkeypatch):
+    monkeypatch.setenv("ALLOWED_ORIGINS", "http://client.test")
+    config = APIConfig(base_dir=str(setup_graph_fixture), max_requests_in_flight=0)
+    client = TestClient(create_app(config=config))
+    headers = {**auth_header, "Origin": "http://client.test"}
+    response = client.get("/entity/1", headers=headers)
+    assert response.status_code == 503
+    assert response.headers["access-control-allow-origin"] == "http://client.test"
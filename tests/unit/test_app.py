@@ -27,9 +27,9 @@ async def test_lifespan_initializes_database():
     async with lifespan(app) as _:
         # The database should be initialized after the app starts
         assert DBState.engine is not None, "Database engine should be initialized"
-        assert (
-            DBState.async_session_maker is not None
-        ), "Session maker should be initialized"
+        assert DBState.async_session_maker is not None, (
+            "Session maker should be initialized"
+        )
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,164 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from graph_reader.config import GraphReaderConfig
+from graph_reader.reader import GraphReader
+
+from graph_reader_api.app import create_app
+from graph_reader_api.async_reader import (
+    AsyncGraphReader,
+    ReaderOverloadedError,
+    ReaderTimeoutError,
+)
+from graph_reader_api.config import APIConfig
+from graph_reader_api.store import GraphStore
+
+
+@pytest.fixture
+def reader(setup_graph_fixture):
+    async_reader = AsyncGraphReader(
+        GraphReader(GraphReaderConfig(base_dir=setup_graph_fixture)),
+        max_workers=1,
+        max_pending=1,
+        timeout=0.2,
+    )
+    yield async_reader
+    async_reader.close()
+
+
+@pytest.mark.asyncio
+async def test_reader_calls_run_off_the_event_loop(reader):
+    loop_thread = threading.get_ident()
+    worker_thread = await reader.run(threading.get_ident)
+    assert worker_thread != loop_thread
+    entity = await reader.get_entity(1)
+    assert entity["properties"]["name"] == "Alice"
+
+
+@pytest.mark.asyncio
+async def test_reader_rejects_calls_beyond_max_pending(reader):
+    release = threading.Event()
+    blocked = asyncio.ensure_future(reader.run(release.wait, 1))
+    await asyncio.sleep(0.01)
+    with pytest.raises(ReaderOverloadedError):
+        await reader.get_entity(1)
+    release.set()
+    await blocked
+    assert reader.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_reader_call_times_out(reader):
+    release = threading.Event()
+    with pytest.raises(ReaderTimeoutError):
+        await reader.run(release.wait, 1)
+    # The slot stays held until the worker finishes.
+    assert reader.pending == 1
+    release.set()
+    await asyncio.sleep(0.05)
+    assert reader.pending == 0
+
+
+def test_overloaded_reader_returns_503(setup_graph_fixture, auth_header):
+    config = APIConfig(
+        base_dir=setup_graph_fixture, reader_workers=1, reader_max_pending=1
+    )
+    application = create_app(config=config)
+    client = TestClient(application)
+    application.state.reader._pending = 1
+    response = client.get("/entity/1", headers=auth_header)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    application.state.reader._pending = 0
+    assert client.get("/entity/1", headers=auth_header).status_code == 200
+    metrics = client.get("/metrics").text
+    assert (
+        'graph_reader_rejections_total{graph="default",reason="overloaded"} 1'
+        in metrics
+    )
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_are_coalesced(reader):
+    release = threading.Event()
+    calls = []
+    coalesced = []
+    reader.coalesced_observer = coalesced.append
+
+    def lookup(entity_id):
+        calls.append(entity_id)
+        release.wait(1)
+        return {"entity_id": entity_id}
+
+    first = asyncio.ensure_future(reader.run(lookup, [1]))
+    await asyncio.sleep(0.01)
+    # Joining calls take no slot, so max_pending=1 does not reject them.
+    others = [asyncio.ensure_future(reader.run(lookup, [1])) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    others[0].cancel()
+    release.set()
+    results = await asyncio.gather(first, *others[1:])
+    assert calls == [[1]]
+    assert all(result == results[0] for result in results)
+    assert coalesced == ["lookup"] * 3
+    # Once finished, the next identical call runs again.
+    await reader.run(lookup, [1])
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_coalesced_waiters_can_modify_their_result(reader):
+    release = threading.Event()
+
+    def lookup(entity_id):
+        release.wait(1)
+        return {"entity_id": entity_id}, [entity_id]
+
+    first = asyncio.ensure_future(reader.run(lookup, 1))
+    await asyncio.sleep(0.01)
+    second = asyncio.ensure_future(reader.run(lookup, 1))
+    await asyncio.sleep(0.01)
+    release.set()
+    (entity, ids), (other_entity, other_ids) = await asyncio.gather(first, second)
+    entity["name"] = "changed"
+    ids.append(2)
+    assert other_entity == {"entity_id": 1}
+    assert other_ids == [1]
+
+
+@pytest.mark.asyncio
+async def test_calls_are_not_shared_across_versions(setup_graph_fixture):
+    store = GraphStore(GraphReaderConfig(base_dir=setup_graph_fixture))
+    reader = AsyncGraphReader(store, max_workers=2, max_pending=2)
+    release = threading.Event()
+    calls = []
+
+    def lookup(entity_id):
+        calls.append(entity_id)
+        release.wait(1)
+        return store.version
+
+    first = asyncio.ensure_future(reader.run(lookup, 1))
+    await asyncio.sleep(0.01)
+    store.apply_overlay(store.overlay.with_updates([], []))
+    second = asyncio.ensure_future(reader.run(lookup, 1))
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(first, second)
+    assert calls == [1, 1]
+    assert second.result() == store.version
+    reader.close()
+
+
+@pytest.mark.asyncio
+async def test_coalescing_can_be_disabled(reader):
+    reader.coalesce = False
+    release = threading.Event()
+    blocked = asyncio.ensure_future(reader.run(release.wait, 1))
+    await asyncio.sleep(0.01)
+    with pytest.raises(ReaderOverloadedError):
+        await reader.run(release.wait, 1)
+    release.set()
+    await blocked
@@ -0,0 +1,134 @@
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from apikey.dependencies import API_KEY_HEADER
+from apikey.models import APIKey
+from apikey.utils import hash_api_key
+from fastapi.testclient import TestClient
+
+from graph_reader_api.app import create_app
+from graph_reader_api.auth import dependencies
+from graph_reader_api.auth.cache import TokenCache, credential_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TokenCache(ttl=10, clock=clock)
+    cache.put("k", "user")
+    assert cache.get("k") == (True, "user")
+    clock.now = 11
+    assert cache.get("k") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_is_capped_by_token_expiry():
+    clock = FakeClock()
+    cache = TokenCache(ttl=60, clock=clock)
+    cache.put("k", "user", ttl=5)
+    clock.now = 6
+    assert cache.get("k") is None
+
+
+def test_cache_is_bounded():
+    cache = TokenCache(max_size=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_negative_entries_use_negative_ttl():
+    clock = FakeClock()
+    cache = TokenCache(ttl=60, negative_ttl=1, clock=clock)
+    cache.put_negative("k", "Invalid token")
+    assert cache.get("k") == (False, "Invalid token")
+    clock.now = 2
+    assert cache.get("k") is None
+
+
+def test_credential_key_does_not_contain_the_credential():
+    assert "secret" not in credential_key("jwt", "secret")
+    assert credential_key("jwt", "x") != credential_key("api_key", "x")
+
+
+@pytest.fixture
+def counting_validate_jwt(monkeypatch):
+    calls = []
+    validate_jwt = dependencies.validate_jwt
+
+    async def counting(credentials):
+        calls.append(credentials.credentials)
+        return await validate_jwt(credentials)
+
+    monkeypatch.setattr(dependencies, "validate_jwt", counting)
+    return calls
+
+
+def test_repeated_requests_validate_the_token_once(
+    setup_graph_fixture, auth_header, counting_validate_jwt
+):
+    application = create_app(base_dir=setup_graph_fixture)
+    client = TestClient(application)
+    for _ in range(3):
+        assert client.get("/entity/1", headers=auth_header).status_code == 200
+    assert len(counting_validate_jwt) == 1
+    assert application.state.auth_cache.stats()["hits"] == 2
+
+
+def test_invalid_tokens_are_negatively_cached(
+    setup_graph_fixture, counting_validate_jwt
+):
+    client = TestClient(create_app(base_dir=setup_graph_fixture))
+    headers = {"Authorization": "Bearer not-a-jwt"}
+    for _ in range(2):
+        response = client.get("/entity/1", headers=headers)
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Invalid token"
+    assert len(counting_validate_jwt) == 1
+
+
+def test_missing_credentials_are_rejected(setup_graph_fixture):
+    client = TestClient(create_app(base_dir=setup_graph_fixture))
+    response = client.get("/entity/1")
+    assert response.status_code == 401
+
+
+def test_api_keys_are_cached_until_they_expire(setup_graph_fixture):
+    api_key = f"test-{uuid4()}"
+    expires_at = datetime.now(UTC) + timedelta(seconds=5)
+    application = create_app(base_dir=setup_graph_fixture)
+    clock = FakeClock()
+    application.state.auth_cache = TokenCache(ttl=60, clock=clock)
+
+    async def add_key():
+        async with dependencies.session_scope() as session:
+            session.add(
+                APIKey(
+                    user_id=str(uuid4()),
+                    key_hash=hash_api_key(api_key),
+                    service_id="test",
+                    expires_at=expires_at,
+                )
+            )
+            await session.commit()
+
+    with TestClient(application) as client:
+        client.portal.call(add_key)
+        response = client.get("/entity/1", headers={API_KEY_HEADER: api_key})
+    assert response.status_code == 200
+    key = credential_key("api_key", api_key)
+    clock.now = 4
+    assert application.state.auth_cache.get(key) is not None
+    clock.now = 6
+    assert application.state.auth_cache.get(key) is None
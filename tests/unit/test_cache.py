@@ -0,0 +1,79 @@
+import pytest
+from graph_reader.config import GraphReaderConfig
+
+from graph_reader_api.cache import FrequencySketch, TinyLFUCache, estimate_size
+from graph_reader_api.store import GraphStore
+
+
+def test_estimate_size_counts_contents():
+    small = {"entity_id": 1, "properties": {}}
+    large = {"entity_id": 1, "properties": {"bio": "x" * 1000}}
+    assert estimate_size(large) - estimate_size(small) > 1000
+
+
+def test_sketch_counts_and_ages():
+    sketch = FrequencySketch(16)
+    for _ in range(3):
+        sketch.increment("hot")
+    assert sketch.frequency("hot") >= 3
+    assert sketch.frequency("cold") < 3
+    for _ in range(20):
+        sketch.increment("hot")
+    while sketch.additions < sketch.sample_size - 1:
+        sketch.increment("other")
+    assert sketch.frequency("hot") == FrequencySketch.MAX_COUNT
+    # Completes the sample, which halves every counter.
+    sketch.increment("other")
+    assert sketch.frequency("hot") == FrequencySketch.MAX_COUNT // 2
+
+
+def test_cache_stays_within_budget():
+    cache = TinyLFUCache(10_000, sizeof=len)
+    for i in range(1000):
+        cache.put(i, "x" * 100)
+        cache.get(i)
+    stats = cache.stats()
+    assert stats["bytes"] <= 10_000
+    assert stats["entries"] == len(cache) <= 100
+    assert stats["evictions"] >= 900
+
+
+def test_scan_does_not_flush_hot_entries():
+    cache = TinyLFUCache(10_000, sizeof=len)
+    for _ in range(5):
+        for key in range(50):
+            if cache.get(key) is None:
+                cache.put(key, "x" * 100)
+    for key in range(1000, 5000):
+        if cache.get(key) is None:
+            cache.put(key, "x" * 100)
+    assert sum(key in cache for key in range(50)) >= 45
+
+
+def test_values_larger_than_the_budget_are_not_cached():
+    cache = TinyLFUCache(1000, sizeof=len)
+    cache.put("big", "x" * 2000)
+    assert "big" not in cache
+    cache["small"] = "x"
+    assert cache["small"] == "x"
+    with pytest.raises(KeyError):
+        cache["big"]
+
+
+def test_store_caches_neighbor_lists(setup_graph_fixture):
+    store = GraphStore(GraphReaderConfig(base_dir=str(setup_graph_fixture)))
+    first = store.get_neighbors(1)
+    assert store.get_neighbors(1) is first
+    assert store.neighbor_cache.stats()["hits"] == 1
+    assert store.get_relations([1], {"FRIENDS_WITH"})[1] == first
+    assert store.get_relations([1], {"COWORKERS_WITH"})[1] == []
+
+
+def test_search_cache_follows_overlay(setup_graph_fixture):
+    store = GraphStore(GraphReaderConfig(base_dir=str(setup_graph_fixture)))
+    assert store.search_by_property("name", "Alice") == [1]
+    assert store.search_by_property("name", "Alice") == [1]
+    assert store.search_cache.stats()["hits"] == 1
+    renamed = {"entity_id": 1, "properties": {"name": "Alicia"}}
+    store.apply_overlay(store.overlay.with_updates([renamed], []))
+    assert store.search_by_property("name", "Alice") == []
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from fixture_generator import create_test_graph_fixture
+
+from graph_reader_api.app import create_app
+from graph_reader_api.caching import etag_matches
+
+
+@pytest.fixture(scope="module")
+def client(setup_graph_fixture):
+    return TestClient(create_app(base_dir=str(setup_graph_fixture)))
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/entity/1",
+        "/entity/1/neighbors",
+        "/community/team_alpha/members",
+        "/search?key=name&value=Alice",
+    ],
+)
+def test_get_responses_carry_etag(client, auth_header, path):
+    response = client.get(path, headers=auth_header)
+    assert response.status_code == 200
+    assert response.headers["ETag"].startswith('"')
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+
+def test_matching_if_none_match_returns_304_without_reading(client, auth_header):
+    etag = client.get("/entity/1", headers=auth_header).headers["ETag"]
+    reader = client.app.state.reader
+    reader_calls = []
+    original_run = reader.run
+
+    async def counting_run(*args, **kwargs):
+        reader_calls.append(args)
+        return await original_run(*args, **kwargs)
+
+    reader.run = counting_run
+    try:
+        response = client.get(
+            "/entity/1", headers={**auth_header, "If-None-Match": etag}
+        )
+    finally:
+        del reader.run
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert reader_calls == []
+
+
+def test_etag_differs_per_resource(client, auth_header):
+    first = client.get("/entity/1", headers=auth_header).headers["ETag"]
+    second = client.get("/entity/2", headers=auth_header).headers["ETag"]
+    assert first != second
+
+
+def test_unauthenticated_conditional_get_is_rejected(client, auth_header):
+    etag = client.get("/entity/1", headers=auth_header).headers["ETag"]
+    response = client.get("/entity/1", headers={"If-None-Match": etag})
+    assert response.status_code == 401
+
+
+def test_errors_carry_no_etag(client, auth_header):
+    response = client.get("/entity/999", headers=auth_header)
+    assert response.status_code == 404
+    assert "ETag" not in response.headers
+
+
+def test_etag_changes_when_shards_are_republished(tmp_path):
+    create_test_graph_fixture(base_dir=str(tmp_path))
+    before = create_app(base_dir=str(tmp_path)).state.reader.version
+    shard = os.path.join(tmp_path, "entities", "shard_0.jsonl")
+    with open(shard, "a") as f:
+        f.write('{"entity_id": 9, "properties": {"name": "Ivy"}}\n')
+    after = create_app(base_dir=str(tmp_path)).state.reader.version
+    assert before != after
+
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
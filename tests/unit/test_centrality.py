@@ -0,0 +1,95 @@
+import json
+import os
+from typing import get_args
+
+import pytest
+from fastapi.testclient import TestClient
+from fixture_generator import create_test_graph_fixture
+from graph_reader.config import GraphReaderConfig
+
+from graph_reader_api.app import create_app
+from graph_reader_api.indexes.centrality import METRICS, centrality_path
+from graph_reader_api.routers.rank import Metric
+from graph_reader_api.store import GraphStore
+
+np = pytest.importorskip("numpy")
+sparse = pytest.importorskip("scipy.sparse")
+
+from graph_reader_api import centrality  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def graph_dir(tmp_path_factory):
+    base_dir = str(tmp_path_factory.mktemp("centrality"))
+    create_test_graph_fixture(base_dir=base_dir)
+    centrality.main([base_dir])
+    return base_dir
+
+
+@pytest.fixture(scope="module")
+def client(graph_dir):
+    return TestClient(create_app(base_dir=graph_dir))
+
+
+def test_scores(graph_dir):
+    store = GraphStore(GraphReaderConfig(base_dir=graph_dir))
+    result = store.get_centrality(2)
+    assert result["scores"]["degree"] == 2
+    assert result["scores"]["in_degree"] == 1
+    # 2 is on the only path between two other entities, out of 3 * 2 pairs.
+    assert result["scores"]["betweenness"] == pytest.approx(1 / 6)
+    assert result["ranks"]["betweenness"] == 1
+    total = sum(store.get_centrality(i)["scores"]["pagerank"] for i in range(4))
+    assert total == pytest.approx(1.0)
+    assert store.get_centrality(99) is None
+
+
+def test_pagerank_favours_sinks():
+    chain = sparse.csr_array(np.array([[0, 1, 0], [0, 0, 1], [0, 0, 0]], float))
+    ranks = centrality.pagerank(chain, centrality.CentralityParams())
+    assert ranks.sum() == pytest.approx(1.0)
+    assert ranks[0] < ranks[1] < ranks[2]
+
+
+def test_entity_centrality_endpoint(client, auth_header):
+    response = client.get("/entity/3/centrality", headers=auth_header)
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["scores"]) == set(METRICS)
+    assert data["ranks"]["pagerank"] == 1
+
+    response = client.get("/entity/99/centrality", headers=auth_header)
+    assert response.status_code == 404
+
+
+def test_rank_endpoint(client, auth_header):
+    response = client.get("/rank?metric=degree&k=2", headers=auth_header)
+    assert response.status_code == 200
+    assert response.json()["entities"] == [
+        {"entity_id": 2, "score": 2},
+        {"entity_id": 1, "score": 1},
+    ]
+    response = client.get(
+        "/rank?metric=out_degree&k=5&community_id=team_alpha", headers=auth_header
+    )
+    assert [e["entity_id"] for e in response.json()["entities"]] == [1, 2]
+
+
+def test_rank_rejects_unknown_metric(client, auth_header):
+    response = client.get("/rank?metric=closeness", headers=auth_header)
+    assert response.status_code == 422
+    assert get_args(Metric) == METRICS
+
+
+def test_missing_or_stale_scores_are_unavailable(tmp_path, auth_header):
+    create_test_graph_fixture(base_dir=str(tmp_path))
+    with TestClient(create_app(base_dir=str(tmp_path))) as client:
+        response = client.get("/rank", headers=auth_header)
+    assert response.status_code == 404
+
+    centrality.main([str(tmp_path)])
+    assert os.path.exists(centrality_path(str(tmp_path)))
+    with open(tmp_path / "adjacency" / "adjacency.jsonl", "a") as f:
+        f.write(json.dumps({"entity_id": 3, "relations": []}) + "\n")
+    store = GraphStore(GraphReaderConfig(base_dir=str(tmp_path)))
+    assert store.centrality is None
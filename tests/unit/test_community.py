@@ -1,7 +1,11 @@
+import json
+
 import pytest
 from fastapi.testclient import TestClient
+from graph_reader.config import GraphReaderConfig
 
 from graph_reader_api.app import create_app
+from graph_reader_api.store import GraphStore
 
 
 @pytest.fixture(scope="module")
@@ -16,3 +20,112 @@ def test_get_members(client, auth_header):
     data = response.json()
     assert "members" in data
     assert set(data["members"]) == {1, 2}
+
+
+def test_get_members_paginated(client, auth_header):
+    response = client.get("/community/team_alpha/members?limit=1", headers=auth_header)
+    assert response.status_code == 200
+    first = response.json()
+    assert len(first["members"]) == 1
+    assert first["next_cursor"] is not None
+
+    response = client.get(
+        f"/community/team_alpha/members?limit=1&cursor={first['next_cursor']}",
+        headers=auth_header,
+    )
+    second = response.json()
+    assert second["next_cursor"] is None
+    assert set(first["members"] + second["members"]) == {1, 2}
+
+
+def test_get_members_invalid_cursor(client, auth_header):
+    response = client.get(
+        "/community/team_alpha/members?cursor=bogus", headers=auth_header
+    )
+    assert response.status_code == 400
+
+
+def test_get_members_ndjson_stream(client, auth_header):
+    headers = {**auth_header, "Accept": "application/x-ndjson"}
+    response = client.get("/community/team_alpha/members?limit=1", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 2
+    assert "entity_id" in lines[0]
+    assert "next_cursor" in lines[1]
+
+
+def test_get_members_expanded(client, auth_header):
+    response = client.get(
+        "/community/team_alpha/members?expand=entity&fields=name&limit=1",
+        headers=auth_header,
+    )
+    data = response.json()
+    assert data["members"] == [{**data["members"][0], "properties": {"name": "Alice"}}]
+    assert data["members"][0]["entity_id"] == 1
+    assert data["next_cursor"] is not None
+
+
+def test_get_members_expanded_ndjson_stream(client, auth_header):
+    response = client.get(
+        "/community/team_alpha/members?expand=entity&fields=name,type",
+        headers={**auth_header, "Accept": "application/x-ndjson"},
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["entity"]["properties"] for line in lines] == [
+        {"name": "Alice", "type": "Person"},
+        {"name": "Bobby", "type": "Person"},
+    ]
+
+
+def test_get_community_stats(client, auth_header):
+    response = client.get("/community/team_alpha/stats", headers=auth_header)
+    assert response.status_code == 200
+    assert response.json() == {
+        "community_id": "team_alpha",
+        "size": 2,
+        "internal_edges": 1,
+        "external_edges": 1,
+        "density": 0.5,
+        "top_members": [
+            {"entity_id": 2, "degree": 2},
+            {"entity_id": 1, "degree": 1},
+        ],
+    }
+
+
+def test_get_community_stats_not_found(client, auth_header):
+    response = client.get("/community/unknown/stats", headers=auth_header)
+    assert response.status_code == 404
+
+
+def test_list_communities(client, auth_header):
+    response = client.get("/community?limit=1", headers=auth_header)
+    assert response.status_code == 200
+    first = response.json()
+    assert first["total"] == 2
+    assert [c["community_id"] for c in first["communities"]] == ["team_alpha"]
+
+    response = client.get(
+        f"/community?limit=1&cursor={first['next_cursor']}", headers=auth_header
+    )
+    second = response.json()
+    assert [c["community_id"] for c in second["communities"]] == ["team_beta"]
+    assert second["communities"][0]["external_edges"] == 1
+    assert second["next_cursor"] is None
+
+
+def test_list_communities_by_size(client, auth_header):
+    response = client.get("/community?order=size", headers=auth_header)
+    sizes = [c["size"] for c in response.json()["communities"]]
+    assert sizes == [2, 1]
+
+
+def test_community_stats_without_index(setup_graph_fixture):
+    store = GraphStore(GraphReaderConfig(base_dir=setup_graph_fixture))
+    indexed = store.list_communities(0, 10)
+    store.community_index = None
+    assert store.list_communities(0, 10) == indexed
+    assert store.community_stats("team_beta") == indexed[0][1]
+    assert sorted(store.get_community_members("team_alpha")) == [1, 2]
@@ -0,0 +1,117 @@
+import json
+import os
+
+import pytest
+from fixture_generator import (
+    SyntheticGraphParams,
+    create_test_graph_fixture,
+    generate_synthetic_graph,
+)
+from graph_reader.config import GraphReaderConfig
+from graph_reader.reader import GraphReader
+
+from graph_reader_api.indexes.build import main as build_main
+from graph_reader_api.indexes.csr import (
+    CSRAdjacency,
+    csr_path,
+    open_csr,
+)
+from graph_reader_api.indexes.files import StaleIndexError
+from graph_reader_api.store import GraphStore, NeighborQuery, relation_type
+
+
+@pytest.fixture
+def graph_dir(tmp_path):
+    create_test_graph_fixture(base_dir=str(tmp_path))
+    return str(tmp_path)
+
+
+def test_build_and_load_snapshot(graph_dir, capsys):
+    build_main([graph_dir])
+    assert csr_path(graph_dir) in capsys.readouterr().out.splitlines()
+    csr = CSRAdjacency.load(graph_dir)
+    assert list(csr.neighbor_ids(1)) == [2]
+    assert list(csr.neighbor_ids(3)) == []
+    assert csr.degree(2) == 1
+    assert csr.edge_count == 2
+
+
+def test_csr_relations_match_graph_reader(graph_dir):
+    reader = GraphReader(GraphReaderConfig(base_dir=graph_dir))
+    store = GraphStore(GraphReaderConfig(base_dir=graph_dir))
+    assert store.csr is not None
+    assert store.adjacency_map == {}
+    for entity_id in (1, 2, 3):
+        assert store.get_neighbors(entity_id) == reader.get_neighbors(entity_id)
+
+
+def test_csr_filters_by_relation_type(graph_dir):
+    csr = open_csr(graph_dir)
+    assert csr.relations(1, {"FRIENDS_WITH"})[0]["relation_id"] == 101
+    assert csr.relations(1, {"COWORKERS_WITH"}) == []
+
+
+def test_stale_snapshot_is_rebuilt(graph_dir):
+    open_csr(graph_dir)
+    with open(os.path.join(graph_dir, "adjacency", "adjacency.jsonl"), "a") as f:
+        f.write(json.dumps({"entity_id": 3, "relations": [101]}) + "\n")
+    with pytest.raises(StaleIndexError):
+        CSRAdjacency.load(graph_dir)
+    assert list(open_csr(graph_dir).neighbor_ids(3)) == [2]
+
+
+def test_non_integer_ids_fall_back_to_json_adjacency(graph_dir):
+    with open(os.path.join(graph_dir, "adjacency", "adjacency.jsonl"), "w") as f:
+        f.write(json.dumps({"entity_id": "a", "relations": [101]}) + "\n")
+    store = GraphStore(GraphReaderConfig(base_dir=graph_dir))
+    assert store.csr is None
+    assert store.get_neighbors("a")[0]["target_id"] == 2
+
+
+def test_incoming_edges(graph_dir):
+    csr = open_csr(graph_dir)
+    assert [r["relation_id"] for r in csr.incoming_relations(3)] == [102]
+    assert csr.in_degree(2) == 1
+    assert csr.in_degree(1) == 0
+    assert csr.incoming_relations(2, {"COWORKERS_WITH"}) == []
+
+
+def test_incoming_relations_without_csr(graph_dir):
+    indexed = GraphStore(GraphReaderConfig(base_dir=graph_dir))
+    with open(os.path.join(graph_dir, "adjacency", "adjacency.jsonl"), "a") as f:
+        f.write(json.dumps({"entity_id": "a", "relations": []}) + "\n")
+    store = GraphStore(GraphReaderConfig(base_dir=graph_dir))
+    assert store.csr is None
+    assert store.get_incoming_relations([2, 3]) == indexed.get_incoming_relations(
+        [2, 3]
+    )
+
+
+def test_type_partitioned_neighbor_pages(tmp_path):
+    base_dir = str(tmp_path)
+    generate_synthetic_graph(
+        base_dir, SyntheticGraphParams(entities=200, update_log_size=0)
+    )
+    store = GraphStore(GraphReaderConfig(base_dir=base_dir))
+    relations = [store.csr.relation(edge) for edge in range(store.csr.edge_count)]
+    wanted = frozenset({"REL_1", "REL_3"})
+    for direction, end in (("out", "source_id"), ("in", "target_id")):
+        for relation_types in (None, wanted):
+            query = NeighborQuery(0, direction, relation_types)
+            expected = {
+                r["relation_id"]
+                for r in relations
+                if r[end] == 0
+                and (relation_types is None or relation_type(r) in relation_types)
+            }
+            everything, next_offset = store.get_neighbor_page(query)
+            assert next_offset is None
+            assert {r["relation_id"] for r in everything} == expected
+            paged, offset = [], 0
+            while offset is not None:
+                page, offset = store.get_neighbor_page(query, offset, 7)
+                paged += page
+            assert paged == everything
+            if relation_types is not None:
+                types = [relation_type(r) for r in everything]
+                assert types == sorted(types, key=store.csr.type_codes.get)
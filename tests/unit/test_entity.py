@@ -18,6 +18,35 @@ def test_get_entity(client, auth_header):
     assert data["properties"]["name"] == "Alice"
 
 
+def test_get_entity_fields(client, auth_header):
+    response = client.get("/entity/1?fields=name,missing", headers=auth_header)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["entity_id"] == 1
+    assert data["properties"] == {"name": "Alice"}
+
+
+def test_get_entities_batch_fields(client, auth_header):
+    response = client.post(
+        "/entity/batch?fields=type",
+        json={"entity_ids": [1, 2]},
+        headers=auth_header,
+    )
+    entities = response.json()["entities"]
+    assert [e["properties"] for e in entities.values()] == [{"type": "Person"}] * 2
+
+
+def test_get_neighbors_expanded(client, auth_header):
+    response = client.get(
+        "/entity/1/neighbors?expand=entity&fields=name", headers=auth_header
+    )
+    assert response.status_code == 200
+    [neighbor] = response.json()["neighbors"]
+    assert neighbor["target_id"] == 2
+    assert neighbor["entity"]["entity_id"] == 2
+    assert neighbor["entity"]["properties"] == {"name": "Bobby"}
+
+
 def test_get_entity_not_found(client, auth_header):
     response = client.get("/entity/999", headers=auth_header)
     assert response.status_code == 404
@@ -36,6 +65,41 @@ def test_get_neighbors(client, auth_header):
     assert neighbors[0]["target_id"] == 2
 
 
+def test_get_neighbors_by_direction(client, auth_header):
+    def relation_ids(query):
+        response = client.get(f"/entity/2/neighbors?{query}", headers=auth_header)
+        assert response.status_code == 200
+        return [r["relation_id"] for r in response.json()["neighbors"]]
+
+    assert relation_ids("direction=in") == [101]
+    assert relation_ids("direction=both") == [102, 101]
+    assert relation_ids("direction=both&relation_type=FRIENDS_WITH") == [101]
+    assert relation_ids("relation_type=FRIENDS_WITH") == []
+
+
+def test_get_neighbors_paged(client, auth_header):
+    first = client.get(
+        "/entity/2/neighbors?direction=both&limit=1", headers=auth_header
+    ).json()
+    assert [r["relation_id"] for r in first["neighbors"]] == [102]
+    second = client.get(
+        f"/entity/2/neighbors?direction=both&limit=1&cursor={first['next_cursor']}",
+        headers=auth_header,
+    ).json()
+    assert [r["relation_id"] for r in second["neighbors"]] == [101]
+    assert second["next_cursor"] is None
+
+
+def test_get_incoming_neighbors_expanded(client, auth_header):
+    response = client.get(
+        "/entity/2/neighbors?direction=in&expand=entity&fields=name",
+        headers=auth_header,
+    )
+    [neighbor] = response.json()["neighbors"]
+    assert neighbor["entity"]["entity_id"] == 1
+    assert neighbor["entity"]["properties"] == {"name": "Alice"}
+
+
 def test_get_entity_community(client, auth_header):
     response = client.get("/entity/1/community", headers=auth_header)
     assert response.status_code == 200
@@ -49,3 +113,78 @@ def test_get_entity_community_not_found(client, auth_header):
     assert response.status_code == 404
     data = response.json()
     assert data["detail"] == "Community not found"
+
+
+def test_get_entities_batch(client, auth_header):
+    response = client.post(
+        "/entity/batch", json={"entity_ids": [1, 3, 999, 1]}, headers=auth_header
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["entities"]) == {"1", "3"}
+    assert data["entities"]["3"]["properties"]["name"] == "Charlie"
+    assert data["missing"] == [999]
+
+
+def test_get_entities_batch_rejects_empty_list(client, auth_header):
+    response = client.post(
+        "/entity/batch", json={"entity_ids": []}, headers=auth_header
+    )
+    assert response.status_code == 422
+
+
+def test_get_subgraph(client, auth_header):
+    response = client.get("/entity/1/subgraph?depth=2", headers=auth_header)
+    assert response.status_code == 200
+    data = response.json()
+    assert {n["entity_id"]: n["depth"] for n in data["nodes"]} == {1: 0, 2: 1, 3: 2}
+    assert {e["relation_id"] for e in data["edges"]} == {101, 102}
+    assert data["truncated"] is None
+
+
+def test_get_subgraph_rejects_depth_above_limit(client, auth_header):
+    response = client.get("/entity/1/subgraph?depth=10", headers=auth_header)
+    assert response.status_code == 422
+
+
+def test_get_entity_context(client, auth_header):
+    response = client.get("/entity/2/context", headers=auth_header)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["entity"]["entity_id"] == 2
+    assert data["community"]["community_id"] == "team_alpha"
+    assert data["neighbor_count"] == 2
+    assert not data["truncated"]
+    neighbors = {n["entity_id"]: n for n in data["neighbors"]}
+    assert neighbors[1]["properties"] == {"name": "Alice", "type": "Person"}
+    assert neighbors[1]["relations"] == [{"type": "FRIENDS_WITH", "direction": "in"}]
+    assert neighbors[3]["relations"] == [{"type": "COWORKERS_WITH", "direction": "out"}]
+    assert 0 < data["estimated_tokens"] <= 2000
+
+
+def test_get_entity_context_respects_token_budget(client, auth_header):
+    data = client.get(
+        "/entity/2/context?max_tokens=1&property=community_id", headers=auth_header
+    ).json()
+    assert data["entity"]["entity_id"] == 2
+    assert data["neighbors"] == []
+    assert data["truncated"]
+    full = client.get(
+        "/entity/2/context?property=community_id", headers=auth_header
+    ).json()
+    budget = full["estimated_tokens"] - 1
+    trimmed = client.get(
+        f"/entity/2/context?max_tokens={budget}&property=community_id",
+        headers=auth_header,
+    ).json()
+    assert len(trimmed["neighbors"]) == 1
+    assert trimmed["neighbors"][0]["properties"].keys() <= {"community_id"}
+
+
+def test_get_entity_context_not_found(client, auth_header):
+    response = client.get("/entity/999/context", headers=auth_header)
+    assert response.status_code == 404
+
+
+def test_entity_context_is_an_mcp_tool(client):
+    assert "/entity/{entity_id}/context" in client.get("/openapi.json").json()["paths"]
@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+from fixture_generator import create_test_graph_fixture
+from graph_reader.config import GraphReaderConfig
+from graph_reader.reader import GraphReader
+
+from graph_reader_api.indexes.entity_offsets import (
+    EntityOffsetIndex,
+    offsets_path,
+    open_entity_offsets,
+)
+from graph_reader_api.indexes.files import StaleIndexError
+from graph_reader_api.store import GraphStore
+
+
+@pytest.fixture
+def graph_dir(tmp_path):
+    create_test_graph_fixture(base_dir=str(tmp_path))
+    return str(tmp_path)
+
+
+def test_index_is_written_next_to_the_shards(graph_dir):
+    index = open_entity_offsets(graph_dir)
+    assert os.path.exists(offsets_path(graph_dir))
+    assert len(index) == 4
+    assert index.read(2)["properties"]["name"] == "Bobby"
+    assert index.read(99) is None
+
+
+def test_store_get_entity_matches_graph_reader(graph_dir):
+    reader = GraphReader(GraphReaderConfig(base_dir=graph_dir))
+    store = GraphStore(GraphReaderConfig(base_dir=graph_dir))
+    assert store.entity_index is not None
+    for entity_id in (0, 1, 2, 3, 99):
+        assert store.get_entity(entity_id) == reader.get_entity(entity_id)
+
+
+def test_read_many_groups_by_shard(graph_dir):
+    with open(os.path.join(graph_dir, "entities", "shard_1.jsonl"), "w") as f:
+        f.write(json.dumps({"entity_id": 7, "properties": {"name": "Gus"}}) + "\n")
+    index = open_entity_offsets(graph_dir)
+    records = index.read_many([7, 3, 0, 42])
+    assert list(records) == [0, 3, 7]
+    assert records[7]["properties"]["name"] == "Gus"
+
+
+def test_stale_index_is_detected_and_rebuilt(graph_dir):
+    open_entity_offsets(graph_dir)
+    with open(os.path.join(graph_dir, "entities", "shard_0.jsonl"), "a") as f:
+        f.write(json.dumps({"entity_id": 5, "properties": {"name": "Eve"}}) + "\n")
+    with pytest.raises(StaleIndexError):
+        EntityOffsetIndex.load(graph_dir)
+    assert open_entity_offsets(graph_dir).read(5)["properties"]["name"] == "Eve"
+
+
+def test_unwritable_directory_keeps_index_in_memory(graph_dir, monkeypatch):
+    def fail(path, data):
+        raise PermissionError(path)
+
+    monkeypatch.setattr("graph_reader_api.indexes.files.write_atomic", fail)
+    index = open_entity_offsets(graph_dir)
+    assert not os.path.exists(offsets_path(graph_dir))
+    assert index.read(1)["properties"]["name"] == "Alice"
@@ -0,0 +1,245 @@
+import json
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from fixture_generator import create_test_graph_fixture
+from graph_reader.config import GraphReaderConfig
+
+from graph_reader_api import ingest
+from graph_reader_api.app import create_app
+from graph_reader_api.config import APIConfig
+from graph_reader_api.ingest import ENTITY_LOG, RELATION_LOG, LogTailer
+from graph_reader_api.store import GraphStore, NeighborQuery
+
+
+@pytest.fixture
+def graph_dir(tmp_path):
+    create_test_graph_fixture(base_dir=str(tmp_path))
+    return str(tmp_path)
+
+
+@pytest.fixture
+def store(graph_dir):
+    return GraphStore(GraphReaderConfig(base_dir=graph_dir))
+
+
+def append(graph_dir, name, *records):
+    with open(os.path.join(graph_dir, "logs", name), "a", encoding="utf-8") as f:
+        f.writelines(json.dumps(record) + "\n" for record in records)
+
+
+@pytest.fixture
+def tailer(store):
+    """A tailer that has replayed the fixture's logs."""
+    tailer = LogTailer(store)
+    tailer.poll()
+    return tailer
+
+
+def test_first_poll_replays_the_logs(store):
+    compacted = [store.get_entity(entity_id) for entity_id in (1, 2, 3)]
+    tailer = LogTailer(store)
+    assert tailer.poll() == 7
+    assert store.overlay.seq == 1
+    # The fixture's logs are compacted already; replaying them is a no-op.
+    assert [store.get_entity(entity_id) for entity_id in (1, 2, 3)] == compacted
+    assert [r["relation_id"] for r in store.get_neighbors(1)] == [101]
+    assert tailer.poll() == 0
+
+
+def test_replay_reads_the_logs_in_chunks(graph_dir, store, monkeypatch):
+    whole = GraphStore(GraphReaderConfig(base_dir=graph_dir))
+    LogTailer(whole).poll()
+    # Shorter than every line, so each batch reads one longer line.
+    monkeypatch.setattr(ingest, "READ_CHUNK_SIZE", 64)
+    tailer = LogTailer(store)
+    assert tailer.poll() == 7
+    assert store.overlay.seq > 1
+    assert store.overlay.entities == whole.overlay.entities
+    assert store.overlay.relations == whole.overlay.relations
+    assert tailer.stats()["bytes_behind"] == 0
+    assert tailer.poll() == 0
+
+
+def test_entity_updates_merge_over_shard_record(graph_dir, store, tailer):
+    version = store.version
+    store.get_entity(2)  # cached before the update arrives
+    append(
+        graph_dir,
+        ENTITY_LOG,
+        {
+            "entity_id": 2,
+            "properties": {"community_id": "team_beta"},
+            "update_time": "2025-05-01T00:00:00Z",
+        },
+    )
+    assert tailer.poll() == 1
+
+    entity = store.get_entity(2)
+    assert entity["properties"]["name"] == "Bobby"
+    assert entity["properties"]["community_id"] == "team_beta"
+    assert store.version != version
+    assert 2 not in store.get_community_members("team_alpha")
+    assert set(store.get_community_members("team_beta")) == {2, 3}
+    assert store.search_by_property("name", "Bobby") == [2]
+
+
+def test_new_entities_and_relations_become_visible(graph_dir, store, tailer):
+    append(
+        graph_dir,
+        ENTITY_LOG,
+        {
+            "entity_id": 9,
+            "properties": {"name": "Dana"},
+            "update_time": "2025-05-01T00:00:00Z",
+        },
+    )
+    append(
+        graph_dir,
+        RELATION_LOG,
+        {
+            "relation_id": 201,
+            "source_id": 1,
+            "target_id": 9,
+            "properties": {"type": "KNOWS"},
+            "update_time": "2025-05-01T00:00:00Z",
+        },
+    )
+    tailer.poll()
+
+    found, missing = store.get_entities([9, 1])
+    assert found[9]["properties"]["name"] == "Dana"
+    assert missing == []
+    assert [r["target_id"] for r in store.get_neighbors(1)] == [2, 9]
+    assert [r["target_id"] for r in store.get_relations([1], {"KNOWS"})[1]] == [9]
+    assert [r["source_id"] for r in store.get_incoming_relations([9])[9]] == [1]
+
+
+def test_partial_lines_wait_for_the_newline(graph_dir, store, tailer):
+    line = json.dumps({"entity_id": 0, "properties": {"name": "William"}})
+    path = os.path.join(graph_dir, "logs", ENTITY_LOG)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line[:10])
+    assert tailer.poll() == 0
+    assert tailer.stats()["bytes_behind"] == 10
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line[10:] + "\n")
+    assert tailer.poll() == 1
+    assert store.get_entity(0)["properties"]["name"] == "William"
+
+
+def test_invalid_updates_are_skipped(graph_dir, store, tailer):
+    append(
+        graph_dir,
+        ENTITY_LOG,
+        {"entity_id": 1, "properties": {"age": 500}},
+        {"entity_id": 1, "properties": {"status": "active"}},
+    )
+    append(graph_dir, RELATION_LOG, {"relation_id": 301, "source_id": 1})
+    assert tailer.poll() == 1
+    entity = store.get_entity(1)
+    assert entity["properties"]["status"] == "active"
+    assert entity["properties"]["age"] is None
+    assert tailer.stats()["errors"] == 2
+    assert tailer.poll() == 0
+
+
+def test_restart_rebuilds_the_overlay(graph_dir, tailer):
+    append(graph_dir, ENTITY_LOG, {"entity_id": 0, "properties": {"name": "Will"}})
+    assert tailer.poll() == 1
+
+    restarted = GraphStore(GraphReaderConfig(base_dir=graph_dir))
+    LogTailer(restarted).poll()
+    assert restarted.get_entity(0)["properties"]["name"] == "Will"
+
+
+def test_lag_reports_time_since_newest_update(graph_dir, store):
+    tailer = LogTailer(store, clock=lambda: 1746057610.0)
+    tailer.poll()
+    append(
+        graph_dir,
+        ENTITY_LOG,
+        {"entity_id": 0, "properties": {}, "update_time": "2025-05-01T00:00:00Z"},
+    )
+    tailer.poll()
+    stats = tailer.stats()
+    assert stats["lag_seconds"] == pytest.approx(10.0)
+    assert stats["applied_entities"] == 6
+    assert stats["overlay_seq"] == 2
+
+
+def test_relation_updates_only_slow_down_their_entities(store, tailer, monkeypatch):
+    # The replayed logs touch relations 101 (1 -> 2) and 102 (2 -> 3).
+    read_in_full = []
+    get_relations = store.get_relations
+    monkeypatch.setattr(
+        store,
+        "get_relations",
+        lambda ids, types=None: read_in_full.extend(ids) or get_relations(ids, types),
+    )
+    store.get_neighbor_page(NeighborQuery(3, relation_types=frozenset({"X"})), 0, 10)
+    assert read_in_full == []
+    relations, _ = store.get_neighbor_page(NeighborQuery(2), 0, 10)
+    assert read_in_full == [2]
+    assert [r["relation_id"] for r in relations] == [102]
+    typed = store.get_relations([2, 3, 1], {"COWORKERS_WITH"})
+    assert list(typed) == [2, 3, 1]
+    assert [r["relation_id"] for r in typed[2]] == [102]
+    assert typed[3] == typed[1] == []
+
+
+def test_ingest_status_endpoint(graph_dir, auth_header):
+    with TestClient(create_app(base_dir=graph_dir)) as client:
+        response = client.get("/ingest/status", headers=auth_header)
+    assert response.status_code == 200
+    assert response.json()["enabled"] is True
+
+    config = APIConfig(base_dir=graph_dir, ingest_logs=False)
+    client = TestClient(create_app(config=config))
+    response = client.get("/ingest/status", headers=auth_header)
+    assert response.json() == {"enabled": False}
+
+
+def test_lifespan_applies_updates(graph_dir, auth_header):
+    config = APIConfig(base_dir=graph_dir, ingest_poll_interval=0.01)
+    app = create_app(config=config)
+    with TestClient(app) as client:
+        # The logs were replayed before serving.
+        assert app.state.ingest.stats()["overlay_seq"] == 1
+        etag = client.get("/entity/0", headers=auth_header).headers["ETag"]
+        append(graph_dir, ENTITY_LOG, {"entity_id": 0, "properties": {"name": "Will"}})
+        for _ in range(200):
+            if app.state.ingest.stats()["overlay_seq"] > 1:
+                break
+            time.sleep(0.01)
+        response = client.get("/entity/0", headers=auth_header)
+    assert response.json()["properties"]["name"] == "Will"
+    assert response.headers["ETag"] != etag
+
+
+def test_every_open_graph_follows_its_logs(graph_dir, tmp_path_factory, auth_header):
+    other_dir = str(tmp_path_factory.mktemp("other"))
+    create_test_graph_fixture(base_dir=other_dir)
+    config = APIConfig(
+        base_dir=graph_dir, graphs={"other": other_dir}, ingest_poll_interval=0.01
+    )
+    app = create_app(config=config)
+    with TestClient(app) as client:
+        assert set(app.state.ingest.stats()["graphs"]) == {"default"}
+        client.get("/graphs/other/entity/0", headers=auth_header)
+        append(other_dir, ENTITY_LOG, {"entity_id": 0, "properties": {"name": "Will"}})
+        for _ in range(200):
+            status = client.get("/ingest/status", headers=auth_header).json()
+            if status["graphs"]["other"]["overlay_seq"] > 1:
+                break
+            time.sleep(0.01)
+        other = client.get("/graphs/other/entity/0", headers=auth_header).json()
+        default = client.get("/entity/0", headers=auth_header).json()
+        metrics = client.get("/metrics").text
+    assert other["properties"]["name"] == "Will"
+    assert default["properties"]["name"] == "Bill"
+    assert status["overlay_seq"] == 1
+    assert 'ingest_lag_seconds{graph="other"}' in metrics
+    assert 'cache_bytes{cache="entity",graph="other"}' in metrics
@@ -0,0 +1,71 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from graph_reader_api.app import create_app
+from graph_reader_api.metrics import Histogram, MetricsRegistry
+
+
+@pytest.fixture(scope="module")
+def client(setup_graph_fixture):
+    return TestClient(create_app(base_dir=str(setup_graph_fixture)))
+
+
+def parse_server_timing(header):
+    phases = {}
+    for part in header.split(","):
+        name, _, duration = part.strip().partition(";dur=")
+        phases[name] = float(duration)
+    return phases
+
+
+def test_server_timing_breaks_down_request(client, auth_header):
+    response = client.get("/entity/1", headers=auth_header)
+    assert response.status_code == 200
+    phases = parse_server_timing(response.headers["Server-Timing"])
+    assert {"auth", "reader", "serialize", "total"} <= set(phases)
+    assert phases["total"] >= phases["auth"] + phases["reader"]
+
+
+def test_metrics_endpoint_reports_routes_and_reader_calls(client, auth_header):
+    client.get("/entity/1", headers=auth_header)
+    client.get("/entity/2", headers=auth_header)
+    client.get("/entity/1", headers=auth_header)
+    client.get("/no/such/path")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert (
+        'http_requests_total{method="GET",route="/entity/{entity_id}",status="200"}'
+        in body
+    )
+    assert 'route="unmatched",status="404"' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/entity' in body
+    assert (
+        'graph_reader_call_duration_seconds_count{graph="default",method="get_entity"}'
+        in body
+    )
+    assert 'cache_lookups_total{cache="entity",graph="default",result="hit"}' in body
+    assert 'cache_hit_ratio{cache="auth"}' in body
+    assert "http_requests_in_flight 1" in body  # the scrape itself
+
+
+def test_metrics_are_not_mcp_tools(client):
+    assert "/metrics" not in client.get("/openapi.json").json()["paths"]
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("latency", "Latency.", ("route",), (1, 2)))
+    for value in (0.5, 1, 1.5, 3):
+        histogram.observe(value, route="/x")
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP latency Latency.", "# TYPE latency histogram"]
+    assert lines[2:] == [
+        'latency_bucket{route="/x",le="1"} 2',
+        'latency_bucket{route="/x",le="2"} 3',
+        'latency_bucket{route="/x",le="+Inf"} 4',
+        'latency_sum{route="/x"} 6',
+        'latency_count{route="/x"} 4',
+    ]
@@ -0,0 +1,34 @@
+import pytest
+from fastapi import HTTPException
+
+from graph_reader_api.pagination import decode_cursor, encode_cursor, take_page
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42)) == 42
+    assert decode_cursor(None) == 0
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(-1)[:-2], "e30"])
+def test_decode_cursor_rejects_malformed_cursors(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor)
+    assert exc_info.value.status_code == 400
+
+
+def test_take_page_reads_only_what_it_needs():
+    consumed = []
+
+    def numbers():
+        for n in range(100):
+            consumed.append(n)
+            yield n
+
+    page, next_offset = take_page(numbers(), 10, 5)
+    assert page == [10, 11, 12, 13, 14]
+    assert next_offset == 15
+    assert len(consumed) == 16
+
+
+def test_take_page_last_page():
+    assert take_page(iter(range(3)), 1, 5) == ([1, 2], None)
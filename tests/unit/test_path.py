@@ -0,0 +1,35 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from graph_reader_api.app import create_app
+
+
+@pytest.fixture(scope="module")
+def client(setup_graph_fixture):
+    application = create_app(base_dir=str(setup_graph_fixture))
+    return TestClient(application)
+
+
+def test_get_path(client, auth_header):
+    response = client.get("/path?source=1&target=3", headers=auth_header)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["truncated"] is None
+    assert [p["nodes"] for p in data["paths"]] == [[1, 2, 3]]
+    assert data["paths"][0]["relation_types"] == ["FRIENDS_WITH", "COWORKERS_WITH"]
+
+
+def test_get_path_no_connection(client, auth_header):
+    response = client.get("/path?source=3&target=1&k=3", headers=auth_header)
+    assert response.status_code == 200
+    assert response.json()["paths"] == []
+
+
+def test_get_path_node_budget(client, auth_header):
+    response = client.get("/path?source=1&target=3&max_nodes=1", headers=auth_header)
+    assert response.json()["truncated"] == "max_nodes"
+
+
+def test_get_path_rejects_deep_searches(client, auth_header):
+    response = client.get("/path?source=1&target=3&max_depth=50", headers=auth_header)
+    assert response.status_code == 422
@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+from fixture_generator import create_test_graph_fixture
+from graph_reader.config import GraphReaderConfig
+
+from graph_reader_api.indexes.properties import open_property_index, properties_path
+from graph_reader_api.query import (
+    Predicate,
+    PropertyQuery,
+    evaluate,
+    intersect,
+    parse_predicate,
+    union,
+)
+from graph_reader_api.store import GraphStore
+
+
+@pytest.fixture
+def graph_dir(tmp_path):
+    create_test_graph_fixture(base_dir=str(tmp_path))
+    with open(
+        os.path.join(tmp_path, "entities", "shard_1.jsonl"), "w", encoding="utf-8"
+    ) as f:
+        for record in (
+            {"entity_id": 10, "properties": {"name": "Alan", "age": 30}},
+            {"entity_id": 11, "properties": {"name": "Ann", "tags": ["a", "b"]}},
+        ):
+            f.write(json.dumps(record) + "\n")
+    return str(tmp_path)
+
+
+def query(*where, op="and"):
+    return PropertyQuery(tuple(parse_predicate(w) for w in where), op)
+
+
+def test_index_is_written_next_to_the_shards(graph_dir):
+    index = open_property_index(graph_dir)
+    assert os.path.exists(properties_path(graph_dir))
+    assert [list(p) for p in index.postings("type", "Person")] == [[0, 1, 2, 3]]
+    assert [list(p) for p in index.postings("name", "A", prefix=True)] == [
+        [10],
+        [1],
+        [11],
+    ]
+    assert index.count("community_id", "team_alpha") == 2
+    assert index.postings("missing", "x") == []
+
+
+@pytest.mark.parametrize(
+    ("where", "op", "expected"),
+    [
+        (("type:Person", "community_id:team_alpha"), "and", [1, 2]),
+        (("community_id:team_beta", "name:^A"), "or", [1, 3, 10, 11]),
+        (("name:^A", "type:Person"), "and", [1]),
+        (("age:30",), "and", [10]),
+        (("tags:b",), "and", [11]),
+        (("type:Person", "name:Nobody"), "and", []),
+    ],
+)
+def test_index_and_scan_agree(graph_dir, where, op, expected):
+    store = GraphStore(GraphReaderConfig(base_dir=graph_dir))
+    assert store.query_properties(query(*where, op=op)) == expected
+    store.property_index = None
+    assert sorted(store.query_properties(query(*where, op=op))) == expected
+
+
+def test_parse_predicate():
+    assert parse_predicate("name:Al:ice") == Predicate("name", "Al:ice")
+    assert parse_predicate("name:^Al") == Predicate("name", "Al", prefix=True)
+    with pytest.raises(ValueError):
+        parse_predicate("name")
+
+
+def test_intersect_and_union():
+    assert intersect([2, 5, 9], [1, 2, 3, 4, 5, 6]) == [2, 5]
+    assert union([[1, 4], [2, 4, 6], []]) == [1, 2, 4, 6]
+
+
+def test_evaluate_starts_from_most_selective_predicate(graph_dir):
+    index = open_property_index(graph_dir)
+    seen = []
+    postings = index.postings
+
+    def recording_postings(key, value, prefix=False):
+        seen.append(key)
+        return postings(key, value, prefix)
+
+    index.postings = recording_postings
+    evaluate(index, query("type:Person", "community_id:team_beta"))
+    assert seen == ["community_id", "type"]
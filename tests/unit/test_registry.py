@@ -0,0 +1,193 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from fixture_generator import SyntheticGraphParams, generate_synthetic_graph
+from graph_reader.config import GraphReaderConfig
+
+from graph_reader_api.app import create_app
+from graph_reader_api.async_reader import AsyncGraphReader, ReaderClosedError
+from graph_reader_api.config import APIConfig
+from graph_reader_api.registry import (
+    GraphRegistry,
+    UnknownGraphError,
+    current_reader,
+)
+from graph_reader_api.store import GraphStore
+
+
+@pytest.fixture(scope="module")
+def synthetic_dirs(tmp_path_factory):
+    dirs = {}
+    for name in ("synth", "other"):
+        base_dir = str(tmp_path_factory.mktemp(name))
+        generate_synthetic_graph(base_dir, SyntheticGraphParams(entities=100))
+        dirs[name] = base_dir
+    return dirs
+
+
+@pytest.fixture(scope="module")
+def client(setup_graph_fixture, synthetic_dirs):
+    config = APIConfig(base_dir=str(setup_graph_fixture), graphs=synthetic_dirs)
+    return TestClient(create_app(config=config))
+
+
+def open_reader(name, base_dir):
+    return AsyncGraphReader(lambda: GraphStore(GraphReaderConfig(base_dir=base_dir)))
+
+
+def test_header_selects_graph(client, auth_header):
+    assert client.get("/entity/42", headers=auth_header).status_code == 404
+    response = client.get("/entity/42", headers={**auth_header, "X-Graph": "synth"})
+    assert response.status_code == 200
+    assert response.json()["entity_id"] == 42
+
+
+def test_path_prefix_selects_graph(client, auth_header):
+    response = client.get("/graphs/synth/entity/42", headers=auth_header)
+    assert response.status_code == 200
+    assert client.get("/graphs/default/entity/1", headers=auth_header).json() == (
+        client.get("/entity/1", headers=auth_header).json()
+    )
+
+
+def test_unknown_graph(client, auth_header):
+    response = client.get("/graphs/missing/entity/1", headers=auth_header)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Graph 'missing' not found"
+
+
+def test_reader_metrics_are_labelled_by_graph(client, auth_header):
+    client.get("/graphs/synth/entity/7", headers=auth_header)
+    metrics = client.get("/metrics").text
+    assert 'graph_reader_call_duration_seconds_count{graph="synth",method=' in metrics
+
+
+def test_etag_depends_on_graph(client, auth_header):
+    default = client.get("/entity/1", headers=auth_header)
+    synth = client.get("/entity/1", headers={**auth_header, "X-Graph": "synth"})
+    assert default.headers["etag"] != synth.headers["etag"]
+    assert "X-Graph" in synth.headers["vary"]
+
+
+def test_list_graphs(client, auth_header):
+    client.get("/entity/1", headers={**auth_header, "X-Graph": "synth"})
+    data = client.get("/graphs", headers=auth_header).json()
+    graphs = {graph["name"]: graph for graph in data["graphs"]}
+    assert set(graphs) == {"default", "synth", "other"}
+    assert graphs["default"]["default"]
+    assert graphs["synth"]["open"]
+    assert graphs["synth"]["footprint_bytes"] > 0
+    assert data["memory_budget"] is None
+
+
+def test_least_recently_used_graph_is_evicted(setup_graph_fixture, synthetic_dirs):
+    graphs = {"default": str(setup_graph_fixture), **synthetic_dirs}
+    registry = GraphRegistry(graphs, open_reader, "default", memory_budget=0)
+
+    async def scenario():
+        await registry.acquire()
+        synth = (await registry.acquire("synth")).reader
+        assert registry.is_open("synth")
+        await registry.acquire("other")
+        assert not registry.is_open("synth")
+        # Evicting a graph releases its files.
+        assert synth.csr._fds == []
+        assert registry.is_open("other")
+        # The default graph is pinned, however far over budget.
+        assert registry.is_open("default")
+        assert registry.evictions == 1
+        with pytest.raises(UnknownGraphError):
+            await registry.acquire("missing")
+
+    asyncio.run(scenario())
+    registry.close()
+
+
+def test_busy_graphs_are_not_evicted(setup_graph_fixture, synthetic_dirs):
+    graphs = {"default": str(setup_graph_fixture), **synthetic_dirs}
+    registry = GraphRegistry(graphs, open_reader, "default", memory_budget=0)
+
+    async def scenario():
+        synth = await registry.acquire("synth")
+        synth._pending = 1
+        await registry.acquire("other")
+        assert registry.is_open("synth")
+        synth._pending = 0
+        await registry.acquire("synth")
+        assert not registry.is_open("other")
+
+    asyncio.run(scenario())
+    registry.close()
+
+
+def test_open_and_close_hooks(setup_graph_fixture, synthetic_dirs):
+    graphs = {"default": str(setup_graph_fixture), **synthetic_dirs}
+    registry = GraphRegistry(graphs, open_reader, "default", memory_budget=0)
+    events = []
+
+    async def on_open(name, reader):
+        assert reader.loaded
+        # Concurrent requests wait for the graph to be opened.
+        await asyncio.sleep(0.01)
+        events.append(("open", name))
+
+    registry.on_open = on_open
+    registry.on_close = lambda name: events.append(("close", name))
+
+    async def scenario():
+        await asyncio.gather(registry.acquire("synth"), registry.acquire("synth"))
+        assert events == [("open", "synth")]
+        await registry.acquire("other")
+
+    asyncio.run(scenario())
+    registry.close()
+    assert events == [("open", "synth"), ("open", "other"), ("close", "synth")]
+    assert registry.loads == 2
+
+
+def test_leased_graphs_are_not_evicted(setup_graph_fixture, synthetic_dirs):
+    graphs = {"default": str(setup_graph_fixture), **synthetic_dirs}
+    registry = GraphRegistry(graphs, open_reader, "default", memory_budget=1)
+
+    async def scenario():
+        synth = await registry.lease("synth")
+        # No call in flight, but the request still holds the graph.
+        await registry.acquire("other")
+        assert registry.is_open("synth")
+        assert (await synth.get_entity(1))["entity_id"] == 1
+        registry.release(synth)
+        await registry.acquire("other")
+        assert not registry.is_open("synth")
+        # A closed reader is never reloaded behind the registry's back.
+        with pytest.raises(ReaderClosedError):
+            await synth.get_entity(1)
+
+    asyncio.run(scenario())
+    registry.close()
+
+
+def test_streamed_responses_hold_the_lease(setup_graph_fixture):
+    registry = GraphRegistry(
+        {"default": str(setup_graph_fixture)}, open_reader, "default"
+    )
+    app = FastAPI()
+    app.state.registry = registry
+    leases = []
+
+    @app.get("/stream")
+    async def stream(reader: AsyncGraphReader = Depends(current_reader)):
+        async def chunks():
+            for _ in range(2):
+                leases.append(dict(registry._leases))
+                yield b"{}\n"
+
+        return StreamingResponse(chunks())
+
+    assert TestClient(app).get("/stream").status_code == 200
+    default = registry.default_reader
+    assert leases == [{default: 1}, {default: 1}]
+    assert registry._leases == {}
+    registry.close()
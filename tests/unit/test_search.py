@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -25,3 +27,62 @@ def test_health_endpoint(client):
     assert response.status_code == 200
     data = response.json()
     assert data == {"status": "healthy"}
+
+
+def test_search_by_property_paginated(client, auth_header):
+    response = client.get("/search?key=type&value=Person&limit=3", headers=auth_header)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["entity_ids"]) == 3
+    response = client.get(
+        f"/search?key=type&value=Person&limit=3&cursor={data['next_cursor']}",
+        headers=auth_header,
+    )
+    rest = response.json()
+    assert rest["next_cursor"] is None
+    assert sorted(data["entity_ids"] + rest["entity_ids"]) == [0, 1, 2, 3]
+
+
+def test_search_by_property_ndjson_stream(client, auth_header):
+    headers = {**auth_header, "Accept": "application/x-ndjson"}
+    response = client.get("/search?key=type&value=Person", headers=headers)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["entity_id"] for line in lines) == [0, 1, 2, 3]
+
+
+def test_query_properties(client, auth_header):
+    response = client.get(
+        "/search/query?where=type:Person&where=community_id:team_alpha",
+        headers=auth_header,
+    )
+    assert response.status_code == 200
+    assert response.json() == {"entity_ids": [1, 2], "count": 2, "next_cursor": None}
+
+
+def test_query_properties_or_prefix_count(client, auth_header):
+    response = client.get(
+        "/search/query?where=name:^B&where=community_id:team_beta&op=or"
+        "&count_only=true",
+        headers=auth_header,
+    )
+    assert response.json() == {"count": 3}
+
+
+def test_query_properties_paginated(client, auth_header):
+    response = client.get(
+        "/search/query?where=type:Person&limit=3", headers=auth_header
+    )
+    data = response.json()
+    assert data["entity_ids"] == [0, 1, 2]
+    assert data["count"] == 4
+    response = client.get(
+        f"/search/query?where=type:Person&cursor={data['next_cursor']}",
+        headers=auth_header,
+    )
+    assert response.json()["entity_ids"] == [3]
+
+
+def test_query_properties_invalid_predicate(client, auth_header):
+    response = client.get("/search/query?where=type", headers=auth_header)
+    assert response.status_code == 400
@@ -0,0 +1,102 @@
+import gzip
+import json
+
+import msgpack
+import pytest
+import zstandard
+from fastapi.testclient import TestClient
+
+from graph_reader_api.app import create_app
+from graph_reader_api.config import APIConfig
+from graph_reader_api.serialization import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    encode,
+    negotiate_coding,
+    negotiate_media_type,
+)
+
+
+@pytest.fixture(scope="module")
+def client(setup_graph_fixture):
+    config = APIConfig(base_dir=str(setup_graph_fixture), compression_min_size=1)
+    return TestClient(create_app(config=config))
+
+
+@pytest.fixture(scope="module")
+def default_client(setup_graph_fixture):
+    return TestClient(create_app(base_dir=str(setup_graph_fixture)))
+
+
+def test_negotiate_media_type():
+    assert negotiate_media_type(None) == JSON_MEDIA_TYPE
+    assert negotiate_media_type("*/*") == JSON_MEDIA_TYPE
+    assert negotiate_media_type("application/msgpack") == MSGPACK_MEDIA_TYPE
+    assert negotiate_media_type("application/x-msgpack, */*;q=0.1") == (
+        MSGPACK_MEDIA_TYPE
+    )
+    assert negotiate_media_type("application/json, application/msgpack;q=0.5") == (
+        JSON_MEDIA_TYPE
+    )
+
+
+def test_negotiate_coding():
+    assert negotiate_coding(None) is None
+    assert negotiate_coding("identity") is None
+    assert negotiate_coding("gzip, deflate") == "gzip"
+    assert negotiate_coding("gzip, zstd") == "zstd"
+    assert negotiate_coding("gzip;q=1, zstd;q=0.5") == "gzip"
+    assert negotiate_coding("zstd;q=0, *") == "gzip"
+
+
+def test_encode_stringifies_json_keys_only():
+    assert encode({1: {"ids": (1, 2)}}) == b'{"1":{"ids":[1,2]}}'
+    packed = encode({1: [1, 2]}, MSGPACK_MEDIA_TYPE)
+    assert msgpack.unpackb(packed, strict_map_key=False) == {1: [1, 2]}
+
+
+def test_msgpack_response(client, auth_header):
+    as_json = client.get("/entity/1", headers=auth_header)
+    response = client.get(
+        "/entity/1", headers={**auth_header, "Accept": "application/msgpack"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert msgpack.unpackb(response.content) == as_json.json()
+
+
+def test_msgpack_batch_keeps_integer_keys(client, auth_header):
+    response = client.post(
+        "/entity/batch",
+        json={"entity_ids": [1, 999]},
+        headers={**auth_header, "Accept": "application/msgpack"},
+    )
+    data = msgpack.unpackb(response.content, strict_map_key=False)
+    assert data["entities"][1]["entity_id"] == 1
+    assert data["missing"] == [999]
+
+
+@pytest.mark.parametrize(
+    ("coding", "decompress"),
+    [("gzip", gzip.decompress), ("zstd", zstandard.ZstdDecompressor().decompress)],
+)
+def test_compressed_response(client, auth_header, coding, decompress):
+    plain = client.get("/entity/1/neighbors", headers=auth_header)
+    headers = {**auth_header, "Accept-Encoding": coding}
+    with client.stream("GET", "/entity/1/neighbors", headers=headers) as response:
+        body = b"".join(response.iter_raw())
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == coding
+    assert response.headers["content-length"] == str(len(body))
+    assert "Accept, X-Graph, Accept-Encoding" in response.headers["vary"]
+    assert json.loads(decompress(body)) == plain.json()
+    assert response.headers["etag"] != plain.headers["etag"]
+
+
+def test_small_responses_are_not_compressed(default_client, auth_header):
+    response = default_client.get(
+        "/entity/1", headers={**auth_header, "Accept-Encoding": "gzip, zstd"}
+    )
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["vary"]
@@ -0,0 +1,121 @@
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from fixture_generator import SyntheticGraphParams, generate_synthetic_graph
+
+from graph_reader_api.indexes.properties import properties_path
+from graph_reader_api.serve import (
+    BASE_DIR_ENV,
+    create_worker_app,
+    preload,
+    private_memory,
+)
+
+
+@pytest.fixture(scope="module")
+def preloaded_graph(tmp_path_factory):
+    base_dir = str(tmp_path_factory.mktemp("shared"))
+    generate_synthetic_graph(base_dir, SyntheticGraphParams(entities=20_000))
+    return base_dir, preload(base_dir)
+
+
+def test_preload_builds_the_shared_indexes(preloaded_graph):
+    base_dir, store = preloaded_graph
+    assert os.path.exists(properties_path(base_dir))
+    assert store.csr is not None
+    assert store.mapped_bytes() > 0
+
+
+def test_worker_app_serves_the_preloaded_graph(monkeypatch, setup_graph_fixture):
+    monkeypatch.setenv(BASE_DIR_ENV, str(setup_graph_fixture))
+    app = create_worker_app()
+    assert app.state.config.base_dir == str(setup_graph_fixture)
+    with TestClient(app):
+        pass
+    # The auth tables are created by the parent process, not each worker.
+    assert "auth_db" not in app.state.startup.timings
+
+
+def worker_pids(server: subprocess.Popen) -> list[int]:
+    """The PIDs of the uvicorn workers started by ``server``."""
+    pids = []
+    with open(f"/proc/{server.pid}/task/{server.pid}/children") as f:
+        for pid in f.read().split():
+            with open(f"/proc/{pid}/cmdline", "rb") as cmdline:
+                if b"spawn_main" in cmdline.read():
+                    pids.append(int(pid))
+    return pids
+
+
+def maps_graph(pid: int, base_dir: str) -> bool:
+    with open(f"/proc/{pid}/maps") as f:
+        return properties_path(base_dir) in f.read()
+
+
+@contextlib.contextmanager
+def serve(base_dir: str, cwd: str, workers: int = 2) -> Iterator[tuple[str, list]]:
+    """Run ``python -m graph_reader_api.serve`` until every worker maps the graph.
+
+    Yields:
+        tuple[str, list]: The server URL and the PIDs of its workers.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    command = [sys.executable, "-m", "graph_reader_api.serve", base_dir]
+    command += ["--workers", str(workers), "--port", str(port)]
+    server = subprocess.Popen(
+        command,
+        cwd=cwd,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(1200):
+            assert server.poll() is None
+            pids = worker_pids(server)
+            if len(pids) == workers and all(maps_graph(p, base_dir) for p in pids):
+                break
+            time.sleep(0.05)
+        else:
+            pytest.fail("workers did not start")
+        yield f"http://127.0.0.1:{port}", pids
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def worker_growth(base_dir: str, cwd: str, headers: dict) -> list[int]:
+    """Private memory of each worker serving ``base_dir``, after a few reads."""
+    with serve(base_dir, cwd) as (url, pids), httpx.Client(base_url=url) as client:
+        # Spread over the workers by the kernel, so repeated a few times.
+        for _ in range(3 * len(pids)):
+            body = {"entity_ids": list(range(0, 2000, 7))}
+            client.post("/entity/batch", json=body, headers=headers)
+            for entity_id in range(0, 2000, 200):
+                client.get(f"/entity/{entity_id}/neighbors", headers=headers)
+            params = {"key": "community_id", "value": "community_3"}
+            client.get("/search", params=params, headers=headers)
+        return [private_memory(pid) for pid in pids]
+
+
+@pytest.mark.skipif(private_memory() is None, reason="needs /proc/self/smaps_rollup")
+def test_extra_workers_share_the_graph(
+    preloaded_graph, setup_graph_fixture, tmp_path, auth_header
+):
+    base_dir, store = preloaded_graph
+    baseline = max(worker_growth(setup_graph_fixture, str(tmp_path), auth_header))
+    for memory in worker_growth(base_dir, str(tmp_path), auth_header):
+        # Compared with workers serving the tiny fixture graph. Holding the
+        # graph in private memory would take more than the shards themselves;
+        # a worker only adds its caches.
+        assert memory - baseline < store.footprint() / 4
@@ -0,0 +1,54 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from graph_reader_api.app import create_app
+from graph_reader_api.config import APIConfig
+
+
+def test_create_app_does_not_load_the_graph(setup_graph_fixture):
+    application = create_app(base_dir=setup_graph_fixture)
+    assert not application.state.reader.loaded
+    response = TestClient(application).get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+
+
+def test_ready_after_lifespan_warmup(setup_graph_fixture):
+    config = APIConfig(base_dir=setup_graph_fixture, warmup_entities=[0, 1, 99])
+    application = create_app(config=config)
+    with TestClient(application) as client:
+        response = client.get("/ready")
+        for _ in range(100):
+            if response.status_code == 200:
+                break
+            response = client.get("/ready")
+        store = application.state.reader.reader
+    assert response.status_code == 200
+    timings = response.json()["timings"]
+    assert {"auth_db", "graph_load", "ingest_replay", "warmup"} <= set(timings)
+    # Entity 1 is served from the replayed log overlay rather than the cache.
+    assert "0" in store.entity_cache
+
+
+def test_warmup_failure_keeps_app_unready(setup_graph_fixture, monkeypatch):
+    application = create_app(base_dir=setup_graph_fixture)
+
+    async def failing_warmup(reader, hot_entities):
+        raise RuntimeError("disk unavailable")
+
+    monkeypatch.setattr("graph_reader_api.startup.warmup", failing_warmup)
+    with TestClient(application) as client:
+        response = client.get("/ready")
+        for _ in range(100):
+            if response.json()["status"] != "starting":
+                break
+            response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["error"] == "disk unavailable"
+
+
+@pytest.mark.parametrize("warmup", [True, False])
+def test_health_is_independent_of_readiness(setup_graph_fixture, warmup):
+    config = APIConfig(base_dir=setup_graph_fixture, warmup=warmup)
+    with TestClient(create_app(config=config)) as client:
+        assert client.get("/health").status_code == 200
@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+from fixture_generator import create_test_graph_fixture
+from graph_reader.config import GraphReaderConfig
+
+from graph_reader_api.store import GraphStore
+
+
+@pytest.fixture
+def store(setup_graph_fixture):
+    return GraphStore(GraphReaderConfig(base_dir=setup_graph_fixture))
+
+
+def test_get_entities_matches_get_entity(store):
+    found, missing = store.get_entities([0, 2, 42])
+    assert missing == [42]
+    assert found[0] == store.get_entity(0)
+    assert found[2] == store.get_entity(2)
+
+
+def test_get_entities_serves_cached_entities(store):
+    store.entity_cache["1"] = {"entity_id": 1, "properties": {"name": "cached"}}
+    found, missing = store.get_entities([1])
+    assert missing == []
+    assert found[1]["properties"]["name"] == "cached"
+
+
+def test_search_uses_the_property_index(store):
+    assert store.search_by_property("type", "Person") == [0, 1, 2, 3]
+    # The in-memory indexer is only built for searches the index cannot serve.
+    assert store._indexer is None
+    assert store.search_by_property("type", None) == []
+    assert store._indexer is not None
+
+
+def test_search_matches_the_indexer(tmp_path):
+    create_test_graph_fixture(base_dir=str(tmp_path))
+    ages = {10: 30, 11: "30", 12: ["30", "31"], 13: 30.0, 14: [30]}
+    with open(tmp_path / "entities" / "shard_1.jsonl", "w", encoding="utf-8") as f:
+        for entity_id, age in ages.items():
+            record = {"entity_id": entity_id, "properties": {"age": age}}
+            f.write(json.dumps(record) + "\n")
+    indexed = GraphStore(GraphReaderConfig(base_dir=str(tmp_path)))
+    scanned = GraphStore(GraphReaderConfig(base_dir=str(tmp_path)))
+    scanned.property_index = None
+    # The index also holds 30 and [30] under "30", but "30" != 30.
+    assert indexed.search_by_property("age", "30") == [11, 12]
+    assert indexed._indexer is None
+    for value in ("30", "31", 30, "Alice"):
+        assert indexed.search_by_property("age", value) == sorted(
+            scanned.search_by_property("age", value)
+        )
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_close_releases_index_files(setup_graph_fixture):
+    config = GraphReaderConfig(base_dir=setup_graph_fixture)
+    GraphStore(config).close()
+    open_fds = len(os.listdir("/proc/self/fd"))
+    stores = [GraphStore(config) for _ in range(5)]
+    assert len(os.listdir("/proc/self/fd")) > open_fds
+    members = stores[0].community_index.members("team_alpha")
+    for store in stores:
+        store.close()
+    assert len(os.listdir("/proc/self/fd")) <= open_fds + 1
+    # Views handed out before closing stay readable.
+    assert list(members) == [1, 2]
@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import json
+import os
+
+import pytest
+from benchmark import compare, percentile, run_benchmark
+from fixture_generator import SyntheticGraphParams, generate_synthetic_graph
+from graph_reader.config import GraphReaderConfig
+
+from graph_reader_api.store import GraphStore
+
+
+@pytest.fixture(scope="module")
+def synthetic_graph(tmp_path_factory):
+    base_dir = str(tmp_path_factory.mktemp("synthetic"))
+    params = SyntheticGraphParams(
+        entities=300, communities=10, update_log_size=50, entity_shards=3
+    )
+    return base_dir, generate_synthetic_graph(base_dir, params)
+
+
+def count_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+def test_generated_graph_matches_counts(synthetic_graph):
+    base_dir, counts = synthetic_graph
+    entity_dir = os.path.join(base_dir, "entities")
+    shards = sorted(n for n in os.listdir(entity_dir) if n.endswith(".jsonl"))
+    assert shards == ["shard_0.jsonl", "shard_1.jsonl", "shard_2.jsonl"]
+    assert counts["entities"] == 300
+    assert sum(count_lines(os.path.join(entity_dir, n)) for n in shards) == 300
+    relation_dir = os.path.join(base_dir, "relations")
+    assert counts["relations"] == sum(
+        count_lines(os.path.join(relation_dir, n))
+        for n in os.listdir(relation_dir)
+        if n.endswith(".jsonl")
+    )
+    assert counts["entity_updates"] + counts["relation_updates"] == 50
+
+
+def test_generated_graph_is_readable(synthetic_graph):
+    base_dir, _ = synthetic_graph
+    store = GraphStore(GraphReaderConfig(base_dir=base_dir))
+    entity = store.get_entity(42)
+    assert entity["properties"]["community_id"] == "community_2"
+    members = store.get_community_members("community_2")
+    assert len(members) == 30
+    assert all(r["source_id"] == 0 for r in store.get_neighbors(0))
+
+
+def test_generator_is_deterministic(tmp_path):
+    params = SyntheticGraphParams(entities=50, update_log_size=5, entity_shards=1)
+    generate_synthetic_graph(str(tmp_path / "a"), params)
+    generate_synthetic_graph(str(tmp_path / "b"), params)
+    for kind in ("entities", "relations", "logs"):
+        for name in os.listdir(tmp_path / "a" / kind):
+            assert (tmp_path / "a" / kind / name).read_bytes() == (
+                tmp_path / "b" / kind / name
+            ).read_bytes()
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_benchmark_reports_percentiles(synthetic_graph):
+    base_dir, _ = synthetic_graph
+    args = argparse.Namespace(
+        base_dir=base_dir,
+        requests=20,
+        concurrency=4,
+        workers=2,
+        endpoint=["entity", "query"],
+        seed=1,
+        accept=None,
+        accept_encoding=None,
+        serialization=False,
+    )
+    report = asyncio.run(run_benchmark(args))
+    json.dumps(report)
+    assert set(report["endpoints"]) == {"entity", "query"}
+    for result in report["endpoints"].values():
+        assert result["requests"] == 20
+        assert result["errors"] == 0
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert result["bytes_mean"] > 0
+
+
+def test_benchmark_compares_serialization(synthetic_graph):
+    base_dir, _ = synthetic_graph
+    args = argparse.Namespace(
+        base_dir=base_dir,
+        requests=5,
+        concurrency=1,
+        workers=1,
+        endpoint=["neighbors"],
+        seed=1,
+        accept=None,
+        accept_encoding=None,
+        serialization=True,
+    )
+    rows = asyncio.run(run_benchmark(args))["endpoints"]["neighbors"]
+    assert set(rows) == {"stdlib", "orjson", "msgpack", "orjson+gzip", "orjson+zstd"}
+    assert rows["stdlib"]["saved_bytes"] == 0
+    assert rows["orjson"]["bytes_mean"] == rows["stdlib"]["bytes_mean"]
+    assert rows["orjson+zstd"]["saved_bytes"] > 0
+
+
+def test_compare_flags_p95_regressions():
+    baseline = {"endpoints": {"entity": {"p95_ms": 10.0}, "query": {"p95_ms": 5.0}}}
+    current = {
+        "endpoints": {
+            "entity": {"p95_ms": 11.0},
+            "query": {"p95_ms": 8.0},
+            "members": {"p95_ms": 100.0},
+        }
+    }
+    regressions = compare(current, baseline, threshold=0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("query: p95 5.0ms -> 8.0ms")
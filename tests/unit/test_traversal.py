@@ -0,0 +1,121 @@
+import json
+import os
+
+import pytest
+from graph_reader.config import GraphReaderConfig
+
+from graph_reader_api.store import GraphStore
+from graph_reader_api.traversal import (
+    PathQuery,
+    TraversalBudget,
+    shortest_paths,
+    subgraph,
+)
+
+# source -> targets; relation IDs are assigned in order, starting at 1.
+DIAMOND = {1: [2, 3, 5, 7], 2: [4], 3: [4], 5: [6], 6: [4], 7: [1]}
+
+
+@pytest.fixture(scope="module")
+def store(setup_graph_fixture):
+    return GraphStore(GraphReaderConfig(base_dir=setup_graph_fixture))
+
+
+def test_subgraph_respects_depth(store):
+    result = subgraph(store, 1, TraversalBudget(max_depth=1, max_nodes=10))
+    assert [n["entity_id"] for n in result["nodes"]] == [1, 2]
+    assert [e["relation_id"] for e in result["edges"]] == [101]
+
+
+def test_subgraph_caps_node_count(store):
+    result = subgraph(store, 1, TraversalBudget(max_depth=3, max_nodes=2))
+    assert len(result["nodes"]) == 2
+    assert result["truncated"] == "max_nodes"
+
+
+def test_subgraph_filters_relation_types(store):
+    result = subgraph(
+        store, 1, TraversalBudget(max_depth=3, max_nodes=10), {"COWORKERS_WITH"}
+    )
+    assert result["nodes"] == [{"entity_id": 1, "depth": 0}]
+    assert result["edges"] == []
+
+
+def test_subgraph_stops_when_time_budget_is_spent(store):
+    result = subgraph(store, 1, TraversalBudget(3, 10, time_budget=-1))
+    assert result["truncated"] == "time_budget"
+    assert len(result["nodes"]) == 1
+
+
+@pytest.fixture(scope="module")
+def diamond(tmp_path_factory):
+    base_dir = tmp_path_factory.mktemp("diamond")
+    for kind in ("entities", "relations", "adjacency"):
+        os.makedirs(base_dir / kind)
+    with open(base_dir / "entities" / "shard_0.jsonl", "w") as f:
+        for entity_id in range(1, 8):
+            f.write(json.dumps({"entity_id": entity_id, "properties": {}}) + "\n")
+    relation_id = 0
+    with (
+        open(base_dir / "relations" / "shard_0.jsonl", "w") as relations,
+        open(base_dir / "adjacency" / "adjacency.jsonl", "w") as adjacency,
+    ):
+        for source, targets in DIAMOND.items():
+            ids = []
+            for target in targets:
+                relation_id += 1
+                ids.append(relation_id)
+                record = {
+                    "relation_id": relation_id,
+                    "source_id": source,
+                    "target_id": target,
+                    "properties": {"type": "SHORTCUT" if target == 4 else "LINK"},
+                }
+                relations.write(json.dumps(record) + "\n")
+            adjacency.write(json.dumps({"entity_id": source, "relations": ids}) + "\n")
+    return GraphStore(GraphReaderConfig(base_dir=str(base_dir)))
+
+
+def test_shortest_path_follows_relations(store):
+    result = shortest_paths(store, PathQuery(1, 3), TraversalBudget(4, 100))
+    assert result["truncated"] is None
+    [path] = result["paths"]
+    assert path["length"] == 2
+    assert path["nodes"] == [1, 2, 3]
+    assert [r["relation_id"] for r in path["relations"]] == [101, 102]
+    assert path["relation_types"] == ["FRIENDS_WITH", "COWORKERS_WITH"]
+
+
+def test_shortest_path_respects_direction_and_depth(store):
+    assert (
+        shortest_paths(store, PathQuery(3, 1), TraversalBudget(4, 100))["paths"] == []
+    )
+    assert (
+        shortest_paths(store, PathQuery(1, 3), TraversalBudget(1, 100))["paths"] == []
+    )
+    same = shortest_paths(store, PathQuery(2, 2), TraversalBudget(1, 100))["paths"]
+    assert same == [{"length": 0, "nodes": [2], "relation_types": [], "relations": []}]
+
+
+def test_k_shortest_paths(diamond):
+    result = shortest_paths(diamond, PathQuery(1, 4, k=5), TraversalBudget(4, 100))
+    assert [p["nodes"] for p in result["paths"]] == [
+        [1, 2, 4],
+        [1, 3, 4],
+        [1, 5, 6, 4],
+    ]
+    assert result["truncated"] is None
+
+
+def test_paths_filter_relation_types(diamond):
+    query = PathQuery(1, 4, k=3, relation_types=frozenset({"LINK"}))
+    assert shortest_paths(diamond, query, TraversalBudget(4, 100))["paths"] == []
+
+
+def test_path_search_stops_at_budgets(diamond):
+    result = shortest_paths(diamond, PathQuery(1, 6), TraversalBudget(4, 2))
+    assert result == {"source": 1, "target": 6, "paths": [], "truncated": "max_nodes"}
+    result = shortest_paths(
+        diamond, PathQuery(1, 4), TraversalBudget(4, 100, time_budget=-1)
+    )
+    assert result["truncated"] == "time_budget"